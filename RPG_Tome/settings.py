@@ -47,11 +47,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "library.timing.server_timing_middleware",
+    # Outside of everything that reads or sets the body
+    "library.middleware.compression_middleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
-    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "library.auth.CachedAuthenticationMiddleware",
+    "library.middleware.replica_pin_middleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -60,7 +64,8 @@ ROOT_URLCONF = "RPG_Tome.urls"
 
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        # Adds rendering time to Server-Timing, see library/timing.py
+        "BACKEND": "library.timing.DjangoTemplates",
         "DIRS": [],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -74,7 +79,24 @@ TEMPLATES = [
     },
 ]
 
+# DJANGO_TEMPLATE_PROFILE=production lists template loaders explicitly,
+# wrapped in the cached loader that compiles every template once per
+# process. Django 4.1 already does the same when no loaders are set, the
+# profile makes it independent of that default.
+if os.environ.get("DJANGO_TEMPLATE_PROFILE") == "production":
+    TEMPLATES[0]["APP_DIRS"] = False
+    TEMPLATES[0]["OPTIONS"]["loaders"] = [
+        (
+            "django.template.loaders.cached.Loader",
+            [
+                "django.template.loaders.filesystem.Loader",
+                "django.template.loaders.app_directories.Loader",
+            ],
+        )
+    ]
+
 WSGI_APPLICATION = "RPG_Tome.wsgi.application"
+ASGI_APPLICATION = "RPG_Tome.asgi.application"
 
 
 # Database
@@ -87,6 +109,174 @@ DATABASES = {
     }
 }
 
+# Read replicas of the primary database, e.g. DJANGO_DB_REPLICAS=replica.sqlite3
+# to try them locally with a copy made by "python manage.py sync_replicas".
+# Reads of library models go to replicas, see library/routers.py.
+
+LIBRARY_REPLICAS = []
+replica_names = [
+    name for name in os.environ.get("DJANGO_DB_REPLICAS", "").split(",") if name
+]
+for i, name in enumerate(replica_names):
+    alias = f"replica{i}"
+    DATABASES[alias] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / name,
+        # Tests read and write the one test database
+        "TEST": {"MIRROR": "default"},
+    }
+    LIBRARY_REPLICAS.append(alias)
+
+# Shards of library tables, e.g. DJANGO_DB_SHARDS=shard1.sqlite3,shard2.sqlite3.
+# Items, spells and stats of every user live on one shard, picked by
+# library/sharding.py, the primary database is the first shard and keeps
+# all other tables. Only ever append shards, position of a shard decides
+# the range of its ids.
+
+LIBRARY_SHARDS = ["default"]
+shard_names = [
+    name for name in os.environ.get("DJANGO_DB_SHARDS", "").split(",") if name
+]
+for i, name in enumerate(shard_names, 1):
+    alias = f"shard{i}"
+    DATABASES[alias] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / name,
+    }
+    LIBRARY_SHARDS.append(alias)
+
+# Tests other than ShardedTest run on the primary only
+TEST_RUNNER = "library.tests.runner.TestRunner"
+
+DATABASE_ROUTERS = [
+    "library.routers.ShardRouter",
+    "library.routers.ReplicaRouter",
+]
+
+# How long (in seconds) after a change user's reads stay on primary database,
+# has to be longer than replicas lag behind
+LIBRARY_REPLICA_PIN_SECONDS = int(os.environ.get("DJANGO_REPLICA_PIN_SECONDS", 10))
+
+# DJANGO_SQLITE_PROFILE=production tunes SQLite for several worker processes
+# writing at once. PRAGMAs are set on every new connection (library.sqlite)
+# and connections are kept open between requests, which is only safe under
+# WSGI, under ASGI set DJANGO_CONN_MAX_AGE=0.
+
+if os.environ.get("DJANGO_SQLITE_PROFILE") == "production":
+    for database in DATABASES.values():
+        database["CONN_MAX_AGE"] = int(os.environ.get("DJANGO_CONN_MAX_AGE", 600))
+        database["CONN_HEALTH_CHECKS"] = True
+    LIBRARY_SQLITE_PRAGMAS = {
+        # Readers don't block the writer and the writer doesn't block readers
+        "journal_mode": "wal",
+        # Sync to disk at checkpoints only, still safe from corruption in WAL
+        "synchronous": "normal",
+        # Negative is in KiB, 64 MiB of page cache per connection
+        "cache_size": -64000,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "memory",
+        # Wait up to 5 s for a lock held by another process
+        "busy_timeout": 5000,
+    }
+else:
+    LIBRARY_SQLITE_PRAGMAS = {}
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+# Local memory cache by default, DJANGO_CACHE=file shares cache between
+# worker processes through files in cache folder
+
+if os.environ.get("DJANGO_CACHE") == "file":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": BASE_DIR / "cache",
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Sessions are stored in the database. DJANGO_SESSION_ENGINE=cached_db
+# also keeps them in the cache above, so requests read them without a
+# query (with several workers only with DJANGO_CACHE=file, a logout is
+# forgotten by the cache of other workers otherwise), signed_cookies keeps
+# them in a signed cookie, with no storage on the server at all (logout
+# then cannot invalidate copies of the cookie).
+
+SESSION_ENGINE = {
+    "db": "django.contrib.sessions.backends.db",
+    "cached_db": "django.contrib.sessions.backends.cached_db",
+    "signed_cookies": "django.contrib.sessions.backends.signed_cookies",
+}[os.environ.get("DJANGO_SESSION_ENGINE", "db")]
+
+# DJANGO_AUTH_CACHE=True keeps logged in users in the cache instead of
+# loading them from auth_user on every request. Saving a user drops its
+# entries from the cache, which only reaches every worker process when they
+# share it: with several workers, turn it on only with DJANGO_CACHE=file,
+# otherwise other workers keep accepting deactivated users for up to
+# LIBRARY_AUTH_CACHE_TIMEOUT (seconds), which also limits how long changes
+# made without signals take to show. See library/auth.py.
+
+LIBRARY_AUTH_CACHE = os.environ.get("DJANGO_AUTH_CACHE") == "True"
+LIBRARY_AUTH_CACHE_TIMEOUT = 300
+
+# How long (in seconds) rendered item and spell lists stay cached. Changes
+# invalidate them immediately, only entries dated in future appear later.
+LIBRARY_LIST_CACHE_TIMEOUT = 300
+
+# How long (in seconds) rendered fragments of list pages stay cached: rows,
+# keyed by id and last change of the entry, and the filter panel, keyed by
+# parameters and facet counts. See {% fragment %} in library_tags.
+LIBRARY_FRAGMENT_CACHE_TIMEOUT = 3600
+
+# DJANGO_SERVER_TIMING=True sends time spent in SQL, forms, counting and
+# rendering in Server-Timing header and logs it for every request. With
+# DJANGO_PROFILE_SAMPLE (share of requests, e.g. 0.1) sampled requests are
+# profiled and profiles of the slowest ones are kept in "profiles" folder.
+# See library/timing.py.
+
+LIBRARY_SERVER_TIMING = os.environ.get("DJANGO_SERVER_TIMING") == "True"
+LIBRARY_PROFILE_SAMPLE = float(os.environ.get("DJANGO_PROFILE_SAMPLE", 0))
+LIBRARY_PROFILE_KEEP = int(os.environ.get("DJANGO_PROFILE_KEEP", 20))
+LIBRARY_PROFILE_DIR = BASE_DIR / "profiles"
+
+# Responses of these types are compressed with brotli or gzip, when they
+# have at least LIBRARY_COMPRESSION_MIN_SIZE bytes. DJANGO_COMPRESSION=False
+# leaves compression to a proxy in front of the application.
+# DJANGO_MINIFY_HTML=True also collapses whitespace of HTML pages. See
+# library/compression.py.
+
+LIBRARY_COMPRESSION = os.environ.get("DJANGO_COMPRESSION") != "False"
+LIBRARY_COMPRESSION_MIN_SIZE = 512
+LIBRARY_COMPRESSION_TYPES = {
+    "text/html",
+    "text/css",
+    "text/csv",
+    "text/plain",
+    "text/javascript",
+    "application/javascript",
+    "application/json",
+    "application/jsonl",
+    "image/svg+xml",
+}
+LIBRARY_MINIFY_HTML = os.environ.get("DJANGO_MINIFY_HTML") == "True"
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "library.timing": {"handlers": ["console"], "level": "INFO"},
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
@@ -123,12 +313,31 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/4.1/howto/static-files/
 
 STATIC_URL = "static/"
+STATIC_ROOT = BASE_DIR / "staticfiles"
+
+# DJANGO_STATIC_PROFILE=production loads Bootstrap, Font Awesome and
+# scripts from bundles of vendored copies instead of CDNs, so pages work
+# offline. `python manage.py collectstatic` builds the bundles, adds
+# content hashes to file names and compresses files, the application
+# serves them from STATIC_ROOT with far-future cache headers. Vendor the
+# files first with `python manage.py vendor_assets`. See library/assets.py.
+if os.environ.get("DJANGO_STATIC_PROFILE") == "production":
+    STATICFILES_STORAGE = "library.assets.CompressedManifestStaticFilesStorage"
+    LIBRARY_LOCAL_ASSETS = True
+    LIBRARY_SERVE_STATIC = True
+else:
+    LIBRARY_LOCAL_ASSETS = False
+    LIBRARY_SERVE_STATIC = False
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Pagination mode for item and spell lists, "offset" (numbered pages) or
+# "keyset" (cursor based, does not slow down on deep pages)
+LIBRARY_PAGINATION = os.environ.get("LIBRARY_PAGINATION", "offset")
+
 LOGIN_URL = "account:login"
 
 LOGIN_REDIRECT_URL = "library:item-list"
@@ -13,11 +13,20 @@ Including another URLconf
 	1. Import the include() function: from django.urls import include, path
 	2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+import re
+
+from django.conf import settings
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
+
+from library import assets
 
 urlpatterns = [
     path("", include("library.urls")),
     path("accounts/", include("users.urls")),
     path("admin/", admin.site.urls),
 ]
+
+if settings.LIBRARY_SERVE_STATIC:
+    prefix = re.escape(settings.STATIC_URL.lstrip("/"))
+    urlpatterns.append(re_path(rf"^{prefix}(?P<path>.*)$", assets.serve))
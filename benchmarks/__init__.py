@@ -0,0 +1,66 @@
+"""
+Benchmarks for RPG Tome.
+
+Run from the folder that contains manage.py, e.g.
+
+    python -m benchmarks.list_payload
+
+Every benchmark runs against a throwaway test database and prints its
+results as JSON, so runs can be saved and compared.
+"""
+
+import json
+import os
+import statistics
+import time
+from contextlib import contextmanager
+
+
+def setup_django():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "RPG_Tome.settings")
+
+    import django
+
+    django.setup()
+
+
+@contextmanager
+def test_database():
+    """
+    Creates test database with migrations applied and removes it afterwards.
+    """
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def measure(func, repeat):
+    """
+    Calls func repeat times, returns timings in milliseconds.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def summarize(timings):
+    timings = sorted(timings)
+    return {
+        "p50_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+        "max_ms": round(timings[-1], 3),
+    }
+
+
+def emit(results):
+    print(json.dumps(results, indent=2))
@@ -0,0 +1,66 @@
+"""
+Compares bytes and time per page of the HTML item list with the JSON API,
+with all fields and with a sparse fieldset.
+
+    python -m benchmarks.api_payload --items 2000 --repeat 50
+"""
+
+import argparse
+import time
+
+from benchmarks import emit, setup_django, summarize, test_database
+
+
+def run(items, repeat):
+    from django.core.cache import cache
+    from django.test import Client
+    from django.urls import reverse
+
+    from library.seed import seed
+    from library.views import ITEMS_PER_PAGE
+
+    with test_database():
+        (user,) = seed(users=1, items=items, spells=0)
+        client = Client()
+        client.force_login(user)
+
+        cases = {
+            "html": (reverse("library:item-list"), {}),
+            "api": (reverse("library:api-item-list"), {"limit": ITEMS_PER_PAGE}),
+            "api_sparse": (
+                reverse("library:api-item-list"),
+                {"limit": ITEMS_PER_PAGE, "fields": "title,value"},
+            ),
+        }
+
+        results = {"items": items, "per_page": ITEMS_PER_PAGE}
+        for name, (url, params) in cases.items():
+            timings = []
+            for _ in range(repeat):
+                # Rendered every time, list cache would hide the difference
+                cache.clear()
+                start = time.perf_counter()
+                response = client.get(url, params)
+                timings.append((time.perf_counter() - start) * 1000)
+            results[name] = {"bytes": len(response.content), **summarize(timings)}
+
+        for name in ("api", "api_sparse"):
+            results[name]["bytes_reduction"] = round(
+                1 - results[name]["bytes"] / results["html"]["bytes"], 3
+            )
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    setup_django()
+    emit(run(args.items, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Queries per request of list and detail views with each session engine,
+with users loaded from auth_user or kept in the cache, and how many of
+them each mode saves compared to database sessions without the cache.
+
+    python -m benchmarks.auth_queries --repeat 50
+
+Requests are measured after a first one, so pages, sessions and users the
+mode caches are in the cache already, as for a user browsing the library.
+"""
+
+import argparse
+import time
+
+from benchmarks import emit, setup_django, summarize, test_database
+
+ENGINES = ("db", "cached_db", "signed_cookies")
+ROUTES = (
+    "library:item-list",
+    "library:item-detail",
+    "library:spell-list",
+    "library:spell-detail",
+)
+
+
+def tables(queries):
+    """
+    Returns numbers of session and user queries among captured queries.
+    """
+    sql = [query["sql"] for query in queries]
+    return (
+        sum('"django_session"' in query for query in sql),
+        sum('"auth_user"' in query for query in sql),
+    )
+
+
+def run(repeat):
+    from django.contrib.auth.models import User
+    from django.core.cache import cache
+    from django.db import connection
+    from django.test import Client, override_settings
+    from django.test.utils import CaptureQueriesContext
+    from django.urls import reverse
+
+    from library.models import Item, Spell
+
+    with test_database():
+        user = User.objects.create_user(username="benchmark", password="x")
+        item = Item.objects.create(title="Sword", value=10, author=user)
+        spell = Spell.objects.create(title="Haste", level=3, author=user)
+        urls = {
+            route: reverse(route, args=[entry.pk] if "detail" in route else [])
+            for route, entry in zip(ROUTES, (None, item, None, spell))
+        }
+
+        modes = {}
+        for engine in ENGINES:
+            for auth_cache in (False, True):
+                mode = f"{engine}{'+auth_cache' if auth_cache else ''}"
+                with override_settings(
+                    SESSION_ENGINE=f"django.contrib.sessions.backends.{engine}",
+                    LIBRARY_AUTH_CACHE=auth_cache,
+                ):
+                    cache.clear()
+                    client = Client()
+                    client.force_login(user)
+                    result = {}
+                    for route, url in urls.items():
+                        client.get(url)
+                        timings = []
+                        with CaptureQueriesContext(connection) as context:
+                            for _ in range(repeat):
+                                start = time.perf_counter()
+                                client.get(url)
+                                timings.append((time.perf_counter() - start) * 1000)
+                        sessions, users = tables(context.captured_queries)
+                        result[route] = {
+                            "queries": len(context.captured_queries) / repeat,
+                            "session_queries": sessions / repeat,
+                            "user_queries": users / repeat,
+                            **summarize(timings),
+                        }
+                modes[mode] = result
+
+        baseline = modes["db"]
+        for result in modes.values():
+            for route, values in result.items():
+                values["saved"] = baseline[route]["queries"] - values["queries"]
+
+    return {"repeat": repeat, **modes}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    setup_django()
+    emit(run(args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Compares throughput of one worker serving concurrent requests through the
+WSGI handler (RPG_Tome/wsgi.py) and through the ASGI handler
+(RPG_Tome/asgi.py, requests as tasks of one event loop).
+
+    python -m benchmarks.concurrency --requests 400 --concurrency 1 8 32 --latency 5
+
+WSGI worker serves at most --threads requests at once, 1 like the default
+sync worker of gunicorn, 0 for a thread per concurrent request. Handlers are
+called in process, without a server, so the numbers show the cost of the
+handler and the views only. --latency adds delay to every database query,
+as a database on another machine would, which is when async views pay off:
+ASGI keeps serving other requests while one waits.
+"""
+
+import argparse
+import asyncio
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from benchmarks import emit, setup_django, test_database
+
+
+@contextmanager
+def query_latency(seconds):
+    """
+    Sleeps before every database query, in whatever thread runs it.
+    """
+    from django.db import connection
+
+    def wrapper(execute, sql, params, many, context):
+        time.sleep(seconds)
+        return execute(sql, params, many, context)
+
+    if not seconds:
+        yield
+        return
+
+    from django.db.backends.signals import connection_created
+
+    def install(sender, connection, **kwargs):
+        connection.execute_wrappers.append(wrapper)
+
+    # Connections of other threads are created later, in those threads
+    connection_created.connect(install)
+    connection.execute_wrappers.append(wrapper)
+    try:
+        yield
+    finally:
+        connection_created.disconnect(install)
+        connection.execute_wrappers.remove(wrapper)
+
+
+def wsgi_request(handler, path, query, cookie):
+    from wsgiref.util import setup_testing_defaults
+
+    environ = {
+        "PATH_INFO": path,
+        "QUERY_STRING": query,
+        "HTTP_COOKIE": cookie,
+        "HTTP_HOST": "testserver",
+        "wsgi.input": io.BytesIO(),
+    }
+    setup_testing_defaults(environ)
+    statuses = []
+
+    def start_response(status, headers, exc_info=None):
+        statuses.append(status)
+
+    body = b"".join(handler(environ, start_response))
+    if not statuses[0].startswith("200"):
+        raise RuntimeError(f"{path} returned {statuses[0]}")
+    return body
+
+
+async def asgi_request(handler, path, query, cookie):
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "headers": [(b"host", b"testserver"), (b"cookie", cookie.encode())],
+        "server": ("testserver", 80),
+        "client": ("127.0.0.1", 0),
+    }
+    received = False
+    messages = []
+
+    async def receive():
+        nonlocal received
+        if received:
+            # Request body was read, wait until the response is sent
+            await asyncio.Event().wait()
+        received = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await handler(scope, receive, send)
+    status = messages[0]["status"]
+    if status != 200:
+        raise RuntimeError(f"{path} returned {status}")
+    return b"".join(message.get("body", b"") for message in messages[1:])
+
+
+def run_wsgi(handler, requests, concurrency, cookie):
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        start = time.perf_counter()
+        list(
+            executor.map(
+                lambda request: wsgi_request(handler, *request, cookie), requests
+            )
+        )
+        return time.perf_counter() - start
+
+
+def run_asgi(handler, requests, concurrency, cookie):
+    async def main():
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one(request):
+            async with semaphore:
+                await asgi_request(handler, *request, cookie)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(request) for request in requests))
+        return time.perf_counter() - start
+
+    return asyncio.run(main())
+
+
+def run(items, requests, concurrency_levels, latency, threads):
+    from django.conf import settings
+    from django.core.asgi import get_asgi_application
+    from django.core.cache import cache
+    from django.core.wsgi import get_wsgi_application
+    from django.test import Client
+    from django.urls import reverse
+
+    from library.models import Item
+    from library.seed import seed
+
+    with test_database():
+        (user,) = seed(users=1, items=items, spells=0)
+        client = Client()
+        client.force_login(user)
+        cookie = f"{settings.SESSION_COOKIE_NAME}={client.session.session_key}"
+
+        pks = list(Item.objects.filter(author=user).values_list("pk", flat=True))
+        list_url = reverse("library:item-list")
+        cases = {
+            # Every page is rendered once, the rest come from list cache
+            "item_list": [(list_url, f"page={i % 20 + 1}") for i in range(requests)],
+            "item_detail": [
+                (reverse("library:item-detail", args=[pks[i % len(pks)]]), "")
+                for i in range(requests)
+            ],
+        }
+
+        handlers = {
+            "wsgi": (get_wsgi_application(), run_wsgi),
+            "asgi": (get_asgi_application(), run_asgi),
+        }
+
+        results = {
+            "items": items,
+            "requests": requests,
+            "query_latency_ms": latency * 1000,
+            "wsgi_threads": threads or "concurrency",
+        }
+        with query_latency(latency):
+            for case, case_requests in cases.items():
+                results[case] = {}
+                for concurrency in concurrency_levels:
+                    row = {}
+                    for name, (handler, runner) in handlers.items():
+                        workers = concurrency
+                        if name == "wsgi" and threads:
+                            workers = min(threads, concurrency)
+                        cache.clear()
+                        elapsed = runner(handler, case_requests, workers, cookie)
+                        row[f"{name}_rps"] = round(requests / elapsed, 1)
+                    row["asgi_speedup"] = round(row["asgi_rps"] / row["wsgi_rps"], 2)
+                    results[case][f"concurrency_{concurrency}"] = row
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument(
+        "--latency", type=float, default=0, help="Milliseconds added to every query"
+    )
+    args = parser.parse_args()
+
+    setup_django()
+    emit(
+        run(
+            args.items,
+            args.requests,
+            args.concurrency,
+            args.latency / 1000,
+            args.threads,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Shows that memory used by streaming export does not grow with library size.
+
+    python -m benchmarks.export_memory --rows 10000 100000
+"""
+
+import argparse
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+from benchmarks import emit, setup_django, test_database
+
+
+def run(row_counts, export_format):
+    from django.contrib.auth.models import User
+
+    from library.export import ITEM_EXPORT_FIELDS, export_response
+    from library.models import Item
+
+    results = {"format": export_format, "runs": []}
+
+    with test_database():
+        user = User.objects.create(username="benchmark")
+        request = SimpleNamespace(user=user)
+        created = 0
+
+        for rows in sorted(row_counts):
+            Item.objects.bulk_create(
+                (
+                    Item(title=f"Item {i}", description="Lore " * 40, author=user)
+                    for i in range(created, rows)
+                ),
+                batch_size=5000,
+            )
+            created = rows
+            queryset = Item.sort_queryset(Item.get_queryset(request))
+
+            tracemalloc.start()
+            start = time.perf_counter()
+            response = export_response(
+                queryset, ITEM_EXPORT_FIELDS, export_format, "items"
+            )
+            size = sum(len(chunk) for chunk in response.streaming_content)
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            results["runs"].append(
+                {
+                    "rows": rows,
+                    "bytes": size,
+                    "seconds": round(elapsed, 3),
+                    "rows_per_second": round(rows / elapsed),
+                    "peak_memory_bytes": peak,
+                }
+            )
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--format", choices=["csv", "jsonl"], default="csv")
+    args = parser.parse_args()
+
+    setup_django()
+    emit(run(args.rows, args.format))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Measures bulk import speed (rows per second) on generated CSV input.
+
+    python -m benchmarks.import_rows --rows 100000 --batch-size 500 2000 5000
+"""
+
+import argparse
+import csv
+import io
+import time
+
+from benchmarks import emit, setup_django, test_database
+
+
+def generate_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["title", "description", "value", "rarity"])
+    for i in range(rows):
+        writer.writerow([f"Item {i}", f"Lore of item {i}", i % 5000, i % 6 + 1])
+    return buffer.getvalue().encode()
+
+
+def run(rows, batch_sizes):
+    from django.contrib.auth.models import User
+
+    from library.importer import import_file
+    from library.models import Item
+
+    data = generate_csv(rows)
+    results = {"rows": rows, "runs": []}
+
+    with test_database():
+        user = User.objects.create(username="benchmark")
+
+        for batch_size in batch_sizes:
+            Item.objects.all().delete()
+
+            start = time.perf_counter()
+            result = import_file(Item, io.BytesIO(data), "csv", user, batch_size)
+            elapsed = time.perf_counter() - start
+
+            results["runs"].append(
+                {
+                    "batch_size": batch_size,
+                    "created": result.created,
+                    "errors": len(result.errors),
+                    "seconds": round(elapsed, 3),
+                    "rows_per_second": round(rows / elapsed),
+                }
+            )
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--batch-size", type=int, nargs="+", default=[500, 2000, 5000])
+    args = parser.parse_args()
+
+    setup_django()
+    emit(run(args.rows, args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Compares data loaded for one list page with and without list_queryset.
+
+    python -m benchmarks.list_payload --rows 2000 --description-size 4000
+"""
+
+import argparse
+import tracemalloc
+from types import SimpleNamespace
+
+from benchmarks import emit, measure, setup_django, summarize, test_database
+
+
+def fetched_bytes(connection, queryset):
+    # Approximate size of all values database hands over for queryset
+    sql, params = queryset.query.sql_with_params()
+    total = 0
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        for row in cursor.fetchall():
+            for value in row:
+                if isinstance(value, str):
+                    total += len(value.encode())
+                elif value is not None:
+                    total += 8
+    return total
+
+
+def peak_memory(queryset):
+    tracemalloc.start()
+    list(queryset._chain())
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def run(rows, description_size, repeat):
+    from django.contrib.auth.models import User
+
+    from library.models import Item, Spell
+    from library.views import ITEMS_PER_PAGE, SPELLS_PER_PAGE
+
+    with test_database() as connection:
+        user = User.objects.create(username="benchmark")
+        request = SimpleNamespace(user=user)
+        lore = ("Ancient lore. " * (description_size // 14 + 1))[:description_size]
+
+        Item.objects.bulk_create(
+            Item(title=f"Item {i}", description=lore, value=i, author=user)
+            for i in range(rows)
+        )
+        Spell.objects.bulk_create(
+            Spell(title=f"Spell {i}", description=lore, author=user)
+            for i in range(rows)
+        )
+
+        results = {
+            "rows": rows,
+            "description_size": description_size,
+        }
+        for model, per_page in ((Item, ITEMS_PER_PAGE), (Spell, SPELLS_PER_PAGE)):
+            full = model.sort_queryset(model.get_queryset(request))[:per_page]
+            listed = model.list_queryset(full)
+
+            result = {}
+            for name, queryset in (("full", full), ("list", listed)):
+                result[name] = {
+                    "bytes_per_page": fetched_bytes(connection, queryset),
+                    "peak_memory_bytes": peak_memory(queryset),
+                    **summarize(measure(lambda: list(queryset._chain()), repeat)),
+                }
+            result["bytes_reduction"] = round(
+                1 - result["list"]["bytes_per_page"] / result["full"]["bytes_per_page"],
+                3,
+            )
+            results[model.__name__.lower()] = result
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--description-size", type=int, default=4000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    setup_django()
+    emit(run(args.rows, args.description_size, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Compares time to render one list page: templates compiled on every request
+or kept by the cached loader, and rows and filter panel rendered every time
+or taken from fragment cache.
+
+    python -m benchmarks.render_time --rows 200 --repeat 200
+
+Rows of the page are loaded once, timings cover rendering only. "cold"
+renders with an empty cache, as the first request after entries changed,
+"warm" with every fragment cached.
+"""
+
+import argparse
+import re
+from pathlib import Path
+
+from benchmarks import emit, measure, setup_django, summarize, test_database
+
+# Removes {% fragment %} tags, leaving what they enclose
+FRAGMENT_TAGS = re.compile(r"{% (end)?fragment[^%]*%}")
+
+TEMPLATES = {
+    "item": (
+        "library/item_list.html",
+        "library/item_results.html",
+    ),
+    "spell": (
+        "library/spells/spell_list.html",
+        "library/spells/spell_results.html",
+    ),
+}
+# Templates with {% fragment %} tags
+FRAGMENT_TEMPLATES = (
+    "library/item_filters.html",
+    "library/item_results.html",
+    "library/spells/spell_filters.html",
+    "library/spells/spell_results.html",
+)
+
+
+def without_fragments():
+    # Sources of list templates as they were before fragment caching
+    from django.conf import settings
+
+    folder = Path(settings.BASE_DIR) / "library" / "templates"
+    return {
+        name: FRAGMENT_TAGS.sub("", (folder / name).read_text())
+        for name in FRAGMENT_TEMPLATES
+    }
+
+
+def engine(cached, fragments):
+    from django.conf import settings
+    from django.template.backends.django import DjangoTemplates
+
+    loaders = ["django.template.loaders.app_directories.Loader"]
+    if not fragments:
+        loaders.insert(
+            0, ("django.template.loaders.locmem.Loader", without_fragments())
+        )
+    if cached:
+        loaders = [("django.template.loaders.cached.Loader", loaders)]
+
+    options = settings.TEMPLATES[0]["OPTIONS"]
+    return DjangoTemplates(
+        {
+            "NAME": f"benchmark-{cached}-{fragments}",
+            "DIRS": [],
+            "APP_DIRS": False,
+            "OPTIONS": {**options, "loaders": loaders},
+        }
+    )
+
+
+def page_renderer(backend, request, names, context):
+    list_name, results_name = names
+
+    def render():
+        # As the list views do on a miss of the page cache
+        results = backend.get_template(results_name).render(
+            {"page_obj": context["page_obj"], "path_without_page": "?"}, request
+        )
+        return backend.get_template(list_name).render(
+            dict(context, results=results), request
+        )
+
+    return render
+
+
+def run(rows, description_size, repeat):
+    from django.contrib.auth.models import User
+    from django.core.cache import cache
+    from django.test import RequestFactory
+
+    from library.cache import filter_state
+    from library.facets import ITEM_FACETS, SPELL_FACETS, facet_counts, label_choices
+    from library.forms import (
+        ItemBulkForm,
+        ItemFilterForm,
+        ItemSortForm,
+        SpellBulkForm,
+        SpellFilterForm,
+        SpellSortForm,
+    )
+    from library.models import Item, Spell
+    from library.pagination import get_page
+    from library.views import ITEMS_PER_PAGE, SPELLS_PER_PAGE, filter_queryset
+
+    with test_database():
+        user = User.objects.create(username="benchmark")
+        lore = ("Ancient lore. " * (description_size // 14 + 1))[:description_size]
+
+        Item.objects.bulk_create(
+            Item(title=f"Item {i}", description=lore, value=i, author=user)
+            for i in range(rows)
+        )
+        Spell.objects.bulk_create(
+            Spell(title=f"Spell {i}", description=lore, author=user)
+            for i in range(rows)
+        )
+
+        request = RequestFactory().get("/")
+        request.user = user
+
+        lists = {
+            "item": (
+                Item,
+                ItemFilterForm,
+                ItemSortForm,
+                ItemBulkForm,
+                ITEM_FACETS,
+                ITEMS_PER_PAGE,
+            ),
+            "spell": (
+                Spell,
+                SpellFilterForm,
+                SpellSortForm,
+                SpellBulkForm,
+                SPELL_FACETS,
+                SPELLS_PER_PAGE,
+            ),
+        }
+
+        results = {"rows": rows, "description_size": description_size}
+        for name, (
+            model,
+            filter_form,
+            sort_form,
+            bulk_form,
+            facets,
+            per_page,
+        ) in lists.items():
+            queryset, filter_form, sorting_form = filter_queryset(
+                request, model, filter_form, sort_form
+            )
+            page_obj = get_page(request, model.list_queryset(queryset), per_page)
+            page_obj.object_list = list(page_obj.object_list)
+            counts = facet_counts(request, model, filter_form, facets)
+            label_choices(filter_form, counts)
+            context = {
+                "filter_form": filter_form,
+                "sorting_form": sorting_form,
+                "bulk_form": bulk_form(),
+                "filter_state": filter_state(request, counts),
+                "page_obj": page_obj,
+            }
+
+            def render(cached, fragments):
+                return page_renderer(
+                    engine(cached, fragments), request, TEMPLATES[name], context
+                )
+
+            uncached_loader = render(cached=False, fragments=False)
+            before = render(cached=True, fragments=False)
+            after = render(cached=True, fragments=True)
+
+            def cold():
+                cache.clear()
+                after()
+
+            cache.clear()
+            after()
+            result = {
+                "uncached_loader": summarize(measure(uncached_loader, repeat)),
+                "before": summarize(measure(before, repeat)),
+                "cold": summarize(measure(cold, repeat)),
+                "warm": summarize(measure(after, repeat)),
+            }
+            result["warm_speedup"] = round(
+                result["before"]["p50_ms"] / result["warm"]["p50_ms"], 2
+            )
+            results[name] = result
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200)
+    parser.add_argument("--description-size", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    setup_django()
+    emit(run(args.rows, args.description_size, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
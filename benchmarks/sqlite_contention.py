@@ -0,0 +1,161 @@
+"""
+Write contention of several worker processes on one SQLite database file,
+with default settings and with the production profile
+(DJANGO_SQLITE_PROFILE=production, see RPG_Tome/settings.py).
+
+    python -m benchmarks.sqlite_contention --processes 8 --seconds 10
+
+Every process acts as a worker with its own user and sends a mix of
+requests through Django's test client: creates items, edits them and reads
+them through the API. Reports requests per second, latency and requests
+that failed with "database is locked".
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks import emit, summarize
+
+PROFILES = ("default", "production")
+# Share of created, edited and read requests
+MIX = {"create": 3, "edit": 3, "read": 4}
+
+
+def setup(path, profile):
+    os.environ["DJANGO_SQLITE_PROFILE"] = profile
+
+    from benchmarks import setup_django
+
+    setup_django()
+
+    from django.conf import settings
+
+    # Before the first connection is opened
+    settings.DATABASES["default"]["NAME"] = path
+
+
+def prepare(path, profile, users):
+    setup(path, profile)
+
+    from django.core.management import call_command
+
+    from library.seed import seed
+
+    call_command("migrate", verbosity=0)
+    seed(users=users, items=100, spells=0)
+
+
+def worker(path, profile, index, start_at, seconds, results):
+    setup(path, profile)
+
+    import json
+
+    from django.contrib.auth.models import User
+    from django.db import OperationalError
+    from django.test import Client
+    from django.test.utils import setup_test_environment
+    from django.urls import reverse
+
+    from library.seed import SEED_USERNAME
+
+    # Lets test client's host in, without logging queries as DEBUG would
+    setup_test_environment(debug=False)
+    client = Client()
+    client.force_login(User.objects.get(username=SEED_USERNAME.format(index)))
+    list_url = reverse("library:api-item-list")
+    rng = random.Random(index)
+    created = []
+    timings = []
+    locked = failed = 0
+
+    def send(kind):
+        if kind == "create" or not created:
+            data = {"title": f"Item {len(created)}", "value": rng.randrange(1000)}
+            response = client.post(
+                list_url, json.dumps(data), content_type="application/json"
+            )
+            if response.status_code == 201:
+                created.append(json.loads(response.content)["id"])
+            return response
+        if kind == "edit":
+            url = reverse("library:api-item-detail", args=[rng.choice(created)])
+            data = {"value": rng.randrange(1000)}
+            return client.patch(url, json.dumps(data), content_type="application/json")
+        return client.get(list_url, {"limit": 20})
+
+    time.sleep(max(0, start_at - time.time()))
+    deadline = time.time() + seconds
+    while time.time() < deadline:
+        kind = rng.choices(list(MIX), list(MIX.values()))[0]
+        start = time.perf_counter()
+        try:
+            response = send(kind)
+        except OperationalError as error:
+            if "locked" not in str(error):
+                raise
+            locked += 1
+            continue
+        if response.status_code >= 400:
+            failed += 1
+            continue
+        timings.append((time.perf_counter() - start) * 1000)
+
+    results.put({"timings": timings, "locked": locked, "failed": failed})
+
+
+def run_profile(profile, processes, seconds):
+    context = multiprocessing.get_context("spawn")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = str(Path(directory) / "db.sqlite3")
+
+        setup_process = context.Process(target=prepare, args=(path, profile, processes))
+        setup_process.start()
+        setup_process.join()
+        if setup_process.exitcode:
+            raise RuntimeError("Preparing database failed")
+
+        results = context.Queue()
+        # Give every worker time to start before they all begin at once
+        start_at = time.time() + 3
+        workers = [
+            context.Process(
+                target=worker, args=(path, profile, i, start_at, seconds, results)
+            )
+            for i in range(processes)
+        ]
+        for process in workers:
+            process.start()
+        reports = [results.get() for _ in workers]
+        for process in workers:
+            process.join()
+
+    timings = [timing for report in reports for timing in report["timings"]]
+    return {
+        "requests": len(timings),
+        "requests_per_second": round(len(timings) / seconds, 1),
+        "locked": sum(report["locked"] for report in reports),
+        "failed": sum(report["failed"] for report in reports),
+        **summarize(timings),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--processes", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    results = {"processes": args.processes, "seconds": args.seconds}
+    for profile in PROFILES:
+        results[profile] = run_profile(profile, args.processes, args.seconds)
+    emit(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Benchmark suite of library views on seeded data (see library.seed).
+
+Covers item and spell lists with every combination of filters and sorting,
+detail views and create, update and delete. For every case it reports
+p50/p95/max latency, queries per request and peak memory of one request.
+
+    python -m benchmarks.suite --users 3 --items 5000 --spells 5000 --repeat 5
+
+List cache is cleared before every request unless --warm-cache is given,
+so by default lists are measured as rendered from the database.
+"""
+
+import argparse
+import itertools
+import time
+import tracemalloc
+
+from benchmarks import emit, setup_django, summarize, test_database
+
+ITEM_FILTERS = {
+    "title": "fire",
+    "min_value": 100,
+    "max_value": 5000,
+    "rarity": [3, 4],
+}
+SPELL_FILTERS = {
+    "title": "storm",
+    "school": [5],
+    "level": [1, 2, 3],
+}
+DIRECTIONS = ("asc", "desc")
+
+
+def list_cases(filters, sort_criteria):
+    """
+    Yields (name, GET parameters) for every subset of filters combined with
+    every sort criteria and direction.
+    """
+    names = list(filters)
+    for size in range(len(names) + 1):
+        for subset in itertools.combinations(names, size):
+            for (criteria, _), direction in itertools.product(
+                sort_criteria, DIRECTIONS
+            ):
+                params = {name: filters[name] for name in subset}
+                params.update(
+                    submit="", sort_criteria=criteria, sort_direction=direction
+                )
+                name = "+".join(subset) or "all"
+                yield f"{name}:{criteria}:{direction}", params
+
+
+class Runner:
+    def __init__(self, client, repeat, warm_cache):
+        from django.db import connection
+
+        self.client = client
+        self.repeat = repeat
+        self.warm_cache = warm_cache
+        self.connection = connection
+
+    def _request(self, method, url, data):
+        from django.core.cache import cache
+
+        if not self.warm_cache:
+            cache.clear()
+        response = getattr(self.client, method)(url, data)
+        if response.status_code >= 400:
+            raise RuntimeError(
+                f"{method.upper()} {url} returned {response.status_code}"
+            )
+        return response
+
+    def run(self, method, url, data=None, setup=None):
+        """
+        Measures request, setup is called before every request and may
+        return url to use instead, e.g. of a freshly created entry.
+        """
+        from django.test.utils import CaptureQueriesContext
+
+        timings = []
+        queries = []
+        for _ in range(self.repeat):
+            target = setup() if setup else url
+            with CaptureQueriesContext(self.connection) as context:
+                start = time.perf_counter()
+                self._request(method, target, data)
+                timings.append((time.perf_counter() - start) * 1000)
+            queries.append(len(context.captured_queries))
+
+        target = setup() if setup else url
+        tracemalloc.start()
+        self._request(method, target, data)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        return {
+            **summarize(timings),
+            "queries": max(queries),
+            "peak_memory_bytes": peak,
+        }
+
+
+def run(users, items, spells, repeat, warm_cache, seed_value):
+    from django.test import Client
+    from django.urls import reverse
+
+    from library.models import Item, Spell
+    from library.seed import seed
+
+    with test_database():
+        start = time.perf_counter()
+        authors = seed(users, items, spells, seed_value)
+        results = {
+            "users": users,
+            "items_per_user": items,
+            "spells_per_user": spells,
+            "repeat": repeat,
+            "warm_cache": warm_cache,
+            "seed_seconds": round(time.perf_counter() - start, 3),
+        }
+
+        user = authors[0]
+        client = Client()
+        client.force_login(user)
+        runner = Runner(client, repeat, warm_cache)
+
+        for key, model, filters, url_name in (
+            ("item_list", Item, ITEM_FILTERS, "library:item-list"),
+            ("spell_list", Spell, SPELL_FILTERS, "library:spell-list"),
+        ):
+            url = reverse(url_name)
+            results[key] = {
+                name: runner.run("get", url, params)
+                for name, params in list_cases(filters, model.SORT_CRITERIA)
+            }
+
+        item = Item.objects.filter(author=user).first()
+        spell = Spell.objects.filter(author=user).first()
+        item_form = {"title": "Bench", "description": "x", "value": 1, "rarity": 2}
+        spell_form = {"title": "Bench", "description": "x", "school": 1, "level": 2}
+
+        def new_item():
+            obj = Item.objects.create(title="Doomed", author=user)
+            return reverse("library:item-delete", args=[obj.pk])
+
+        def new_spell():
+            obj = Spell.objects.create(title="Doomed", author=user)
+            return reverse("library:spell-delete", args=[obj.pk])
+
+        results["views"] = {
+            "item_detail": runner.run(
+                "get", reverse("library:item-detail", args=[item.pk])
+            ),
+            "spell_detail": runner.run(
+                "get", reverse("library:spell-detail", args=[spell.pk])
+            ),
+            "item_create": runner.run(
+                "post", reverse("library:item-create"), item_form
+            ),
+            "spell_create": runner.run(
+                "post", reverse("library:spell-create"), spell_form
+            ),
+            "item_update": runner.run(
+                "post", reverse("library:item-update", args=[item.pk]), item_form
+            ),
+            "spell_update": runner.run(
+                "post", reverse("library:spell-update", args=[spell.pk]), spell_form
+            ),
+            "item_delete": runner.run("post", None, setup=new_item),
+            "spell_delete": runner.run("post", None, setup=new_spell),
+        }
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=3)
+    parser.add_argument("--items", type=int, default=2000, help="Per user")
+    parser.add_argument("--spells", type=int, default=2000, help="Per user")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--warm-cache", action="store_true")
+    args = parser.parse_args()
+
+    setup_django()
+    emit(
+        run(
+            args.users,
+            args.items,
+            args.spells,
+            args.repeat,
+            args.warm_cache,
+            args.seed,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Bytes on the wire of list pages and results fragments: as rendered, with
+minified HTML, and compressed with gzip and brotli (when installed), and
+time the compression layer adds per response.
+
+    python -m benchmarks.wire_bytes --rows 200
+"""
+
+import argparse
+
+from benchmarks import emit, measure, setup_django, summarize, test_database
+
+ROUTES = (
+    "library:item-list",
+    "library:item-results",
+    "library:spell-list",
+    "library:spell-results",
+)
+
+
+def run(rows, description_size, repeat):
+    from django.contrib.auth.models import User
+    from django.test import Client, override_settings
+    from django.urls import reverse
+
+    from library import compression
+    from library.models import Item, Spell
+
+    encodings = ["gzip"] + (["br"] if compression.brotli is not None else [])
+
+    with test_database():
+        user = User.objects.create(username="benchmark")
+        lore = ("Ancient lore. " * (description_size // 14 + 1))[:description_size]
+        Item.objects.bulk_create(
+            Item(title=f"Item {i}", description=lore, value=i, author=user)
+            for i in range(rows)
+        )
+        Spell.objects.bulk_create(
+            Spell(title=f"Spell {i}", description=lore, author=user)
+            for i in range(rows)
+        )
+        client = Client()
+        client.force_login(user)
+
+        results = {"rows": rows, "description_size": description_size}
+        for route in ROUTES:
+            url = reverse(route)
+            with override_settings(LIBRARY_COMPRESSION=False):
+                with override_settings(LIBRARY_MINIFY_HTML=False):
+                    plain = client.get(url).content
+                with override_settings(LIBRARY_MINIFY_HTML=True):
+                    minified = client.get(url).content
+
+            result = {"plain_bytes": len(plain), "minified_bytes": len(minified)}
+            for encoding in encodings:
+                for name, body in (("plain", plain), ("minified", minified)):
+                    size = len(compression.compress(body, encoding))
+                    result[f"{name}_{encoding}_bytes"] = size
+                result[f"{encoding}_ms"] = summarize(
+                    measure(lambda: compression.compress(plain, encoding), repeat)
+                )
+            result["minify_ms"] = summarize(
+                measure(lambda: compression.minify_html(plain.decode()), repeat)
+            )
+            best = min(value for key, value in result.items() if key.endswith("_bytes"))
+            result["reduction"] = round(1 - best / len(plain), 3)
+            results[route] = result
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200)
+    parser.add_argument("--description-size", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    setup_django()
+    emit(run(args.rows, args.description_size, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,137 @@
+import heapq
+import itertools
+from functools import cmp_to_key
+
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.core.exceptions import ValidationError
 
 from .models import Item, Spell
+from .sharding import each_shard, is_sharded
+
+
+def _ordering_fields(queryset):
+    ordering = queryset.query.order_by or queryset.model._meta.ordering
+    fields = []
+    for field in [*ordering, "-pk"]:
+        if isinstance(field, str):
+            fields.append((field.lstrip("-"), field.startswith("-")))
+        else:
+            # OrderBy of admin_order_field, or F
+            expression = getattr(field, "expression", field)
+            fields.append((expression.name, getattr(field, "descending", False)))
+    return fields
+
+
+def _value(obj, name):
+    for part in name.split("__"):
+        if obj is None:
+            return None
+        obj = getattr(obj, obj._meta.pk.attname if part == "pk" else part, None)
+    return obj
+
+
+def sort_key(queryset):
+    """
+    Key that sorts instances in the order of queryset, as the database did.
+    """
+    fields = _ordering_fields(queryset)
+
+    def compare(a, b):
+        for name, descending in fields:
+            x, y = _value(a, name), _value(b, name)
+            if x == y:
+                continue
+            # NULL comes first in ascending order, as in SQLite
+            result = -1 if x is None or (y is not None and x < y) else 1
+            return -result if descending else result
+        return 0
+
+    return cmp_to_key(compare)
+
+
+class ShardedResults:
+    """
+    Queryset of every shard, counted and sliced as one. A slice loads the
+    same number of rows from every shard and merges them.
+    """
+
+    ordered = True
+
+    def __init__(self, queryset):
+        self.querysets = list(each_shard(queryset))
+        self.key = sort_key(queryset)
+
+    def count(self):
+        return sum(queryset.count() for queryset in self.querysets)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index : index + 1][0]
+        start, stop = index.start or 0, index.stop
+        # First rows of the merged list are among the first rows of shards
+        parts = [
+            queryset[:stop] if stop is not None else queryset
+            for queryset in self.querysets
+        ]
+        return list(itertools.islice(heapq.merge(*parts, key=self.key), start, stop))
+
+    def __iter__(self):
+        return iter(self[:])
+
+
+class ShardedChangeList(ChangeList):
+    def get_results(self, request):
+        super().get_results(request)
+        if not is_sharded():
+            return
+        if self.full_result_count is not None:
+            self.full_result_count = ShardedResults(self.root_queryset).count()
+        if not isinstance(self.result_list, list):
+            # All results fit on one page
+            self.result_list = list(ShardedResults(self.queryset))
+
+
+class ShardedModelAdmin(admin.ModelAdmin):
+    """
+    Admin of entries spread over shards: lists query every shard and merge
+    the results, entries are looked up on the shard of their id. Actions on
+    selected entries are not available while sharded, they run on one
+    database.
+    """
+
+    def get_changelist(self, request, **kwargs):
+        return ShardedChangeList
+
+    def get_paginator(self, request, queryset, per_page, *args, **kwargs):
+        if is_sharded():
+            queryset = ShardedResults(queryset)
+        return super().get_paginator(request, queryset, per_page, *args, **kwargs)
+
+    def get_object(self, request, object_id, from_field=None):
+        if from_field is not None:
+            return super().get_object(request, object_id, from_field)
+        try:
+            pk = self.model._meta.pk.to_python(object_id)
+            return self.get_queryset(request).of_pk(pk).get(pk=pk)
+        except (self.model.DoesNotExist, ValidationError, ValueError):
+            return None
+
+    def get_readonly_fields(self, request, obj=None):
+        readonly_fields = super().get_readonly_fields(request, obj)
+        if obj is not None and is_sharded():
+            # Entry stays on the shard of its author
+            return (*readonly_fields, "author")
+        return readonly_fields
+
+    def get_actions(self, request):
+        if is_sharded():
+            return {}
+        return super().get_actions(request)
+
 
-admin.site.register(Item)
-admin.site.register(Spell)
+admin.site.register(Item, ShardedModelAdmin)
+admin.site.register(Spell, ShardedModelAdmin)
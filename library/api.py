@@ -0,0 +1,257 @@
+"""
+JSON API of items and spells, mirroring the HTML pages.
+
+    GET    /api/items/         list, same filters and sorting as item list
+    POST   /api/items/         create
+    GET    /api/items/<pk>/    detail
+    PUT    /api/items/<pk>/    replace
+    PATCH  /api/items/<pk>/    update given fields only
+    DELETE /api/items/<pk>/    delete
+    POST   /api/items/bulk/    bulk action, e.g. {"ids": [1, 2], "action": "delete"}
+
+and the same for spells. ``?fields=title,value`` limits both the response
+and the columns selected from database. Lists are paginated with cursors,
+``?cursor=`` takes ``next`` or ``previous`` of the previous response.
+
+Responses are serialized with orjson when it is installed.
+"""
+
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.forms.models import model_to_dict
+from django.http import HttpResponse
+from django.views import View
+
+from .bulk import run_action
+from .export import ITEM_EXPORT_FIELDS, SPELL_EXPORT_FIELDS
+from .forms import (
+    ItemBulkForm,
+    ItemFilterForm,
+    ItemsForm,
+    ItemSortForm,
+    SpellBulkForm,
+    SpellFilterForm,
+    SpellsForm,
+    SpellSortForm,
+)
+from .models import Item, Spell
+from .pagination import KeysetPaginator, split_ordering
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+API_PAGE_SIZE = 50
+API_MAX_PAGE_SIZE = 500
+
+
+def dumps(data):
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_UTC_Z)
+    return json.dumps(data, cls=DjangoJSONEncoder, separators=(",", ":")).encode()
+
+
+def json_response(data, status=200):
+    return HttpResponse(dumps(data), status=status, content_type="application/json")
+
+
+def error_response(status, message, errors=None):
+    data = {"error": message}
+    if errors is not None:
+        data["errors"] = errors
+    return json_response(data, status=status)
+
+
+class ApiError(Exception):
+    def __init__(self, status, message, errors=None):
+        super().__init__(message)
+        self.response = error_response(status, message, errors)
+
+
+class ApiView(View):
+    """
+    Base of API views, configured for one model like the HTML views.
+    """
+
+    model = None
+    form_class = None
+    fields = []
+
+    def dispatch(self, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return error_response(401, "Authentication required")
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except ApiError as error:
+            return error.response
+
+    def http_method_not_allowed(self, request, *args, **kwargs):
+        response = error_response(405, "Method not allowed")
+        response["Allow"] = ", ".join(self._allowed_methods())
+        return response
+
+    def requested_fields(self):
+        """
+        Fields listed in ?fields=, all by default. id is always included.
+        """
+        value = self.request.GET.get("fields")
+        if not value:
+            return list(self.fields)
+
+        fields = [name.strip() for name in value.split(",") if name.strip()]
+        unknown = [name for name in fields if name not in self.fields]
+        if unknown:
+            raise ApiError(400, f"Unknown fields: {', '.join(unknown)}")
+        return ["id"] + [name for name in fields if name != "id"]
+
+    def serialize(self, obj, fields):
+        return {name: getattr(obj, name) for name in fields}
+
+    def parse_body(self):
+        try:
+            data = json.loads(self.request.body)
+        except ValueError:
+            raise ApiError(400, "Body is not valid JSON")
+        if not isinstance(data, dict):
+            raise ApiError(400, "Body must be a JSON object")
+        return data
+
+    def save(self, data, instance=None, status=200):
+        form = self.form_class(data, instance=instance)
+        if not form.is_valid():
+            raise ApiError(400, f"{self.model.__name__} is not valid", form.errors)
+
+        obj = form.save(commit=False)
+        obj.author = self.request.user
+        obj.save()
+        return json_response(self.serialize(obj, self.fields), status=status)
+
+
+class ApiListView(ApiView):
+    filter_form_class = None
+    sort_form_class = None
+
+    def get_queryset(self):
+        # Filters apply as they are, invalid ones are reported, not ignored
+        filter_form = self.filter_form_class(self.request.GET)
+        sort_form = self.sort_form_class(self.request.GET)
+        errors = {}
+        for form in (filter_form, sort_form):
+            if not form.is_valid():
+                errors.update(form.errors)
+        if errors:
+            raise ApiError(400, "Invalid filter or sorting", errors)
+
+        queryset = self.model.get_queryset(self.request, filter_form.cleaned_data)
+        return self.model.sort_queryset(queryset, sort_form.cleaned_data)
+
+    def page_size(self):
+        try:
+            size = int(self.request.GET.get("limit", API_PAGE_SIZE))
+        except ValueError:
+            raise ApiError(400, "limit must be a number")
+        return max(1, min(size, API_MAX_PAGE_SIZE))
+
+    def get(self, request):
+        fields = self.requested_fields()
+        queryset = self.get_queryset()
+
+        # Columns of the ordering are needed for cursors
+        ordering = [name for name, _ in split_ordering(queryset.query.order_by)]
+        columns = {name for name in fields + ordering if name in self.fields}
+        queryset = queryset.only(*columns)
+
+        page = KeysetPaginator(queryset, self.page_size()).get_page(
+            request.GET.get("cursor")
+        )
+        return json_response(
+            {
+                "results": [self.serialize(obj, fields) for obj in page],
+                "next": page.next_cursor,
+                "previous": page.previous_cursor,
+            }
+        )
+
+    def post(self, request):
+        return self.save(self.parse_body(), status=201)
+
+
+class ApiDetailView(ApiView):
+    def get_object(self, fields):
+        # Other users' entries do not exist as far as API is concerned
+        queryset = self.model.objects.of_author(self.request.user)
+        try:
+            # Signals of save and delete need author
+            return queryset.only("author", *fields).get(pk=self.kwargs["pk"])
+        except self.model.DoesNotExist:
+            raise ApiError(404, f"{self.model.__name__} not found")
+
+    def get(self, request, pk):
+        fields = self.requested_fields()
+        return json_response(self.serialize(self.get_object(fields), fields))
+
+    def put(self, request, pk):
+        return self.save(self.parse_body(), self.get_object(self.fields))
+
+    def patch(self, request, pk):
+        instance = self.get_object(self.fields)
+        data = model_to_dict(instance, fields=self.form_class._meta.fields)
+        data.update(self.parse_body())
+        return self.save(data, instance)
+
+    def delete(self, request, pk):
+        # Fully loaded, so that delete signals need not load it again
+        self.get_object(self.fields).delete()
+        return HttpResponse(status=204)
+
+
+class ApiBulkView(ApiView):
+    bulk_form_class = None
+
+    def post(self, request):
+        form = self.bulk_form_class(self.parse_body())
+        if not form.is_valid():
+            raise ApiError(400, "Bulk action is not valid", form.errors)
+
+        count = run_action(self.model, request.user, form.cleaned_data)
+        return json_response({"action": form.cleaned_data["action"], "count": count})
+
+
+class ItemApiList(ApiListView):
+    model = Item
+    form_class = ItemsForm
+    filter_form_class = ItemFilterForm
+    sort_form_class = ItemSortForm
+    fields = ITEM_EXPORT_FIELDS
+
+
+class ItemApiDetail(ApiDetailView):
+    model = Item
+    form_class = ItemsForm
+    fields = ITEM_EXPORT_FIELDS
+
+
+class SpellApiList(ApiListView):
+    model = Spell
+    form_class = SpellsForm
+    filter_form_class = SpellFilterForm
+    sort_form_class = SpellSortForm
+    fields = SPELL_EXPORT_FIELDS
+
+
+class SpellApiDetail(ApiDetailView):
+    model = Spell
+    form_class = SpellsForm
+    fields = SPELL_EXPORT_FIELDS
+
+
+class ItemApiBulk(ApiBulkView):
+    model = Item
+    bulk_form_class = ItemBulkForm
+
+
+class SpellApiBulk(ApiBulkView):
+    model = Spell
+    bulk_form_class = SpellBulkForm
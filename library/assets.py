@@ -0,0 +1,280 @@
+"""
+Static assets served by the application itself, so pages work without
+internet access, e.g. on a LAN.
+
+Bootstrap, Font Awesome, jQuery and Popper are vendored into
+static/library/vendor by `python manage.py vendor_assets`, which downloads
+the versions base.html used to load from CDNs and checks them against
+their integrity hashes.
+
+With DJANGO_STATIC_PROFILE=production, collectstatic runs through
+CompressedManifestStaticFilesStorage: it joins the vendored styles and
+background.css into library/bundle.css and the scripts into
+library/bundle.js, minifies the styles, adds content hash to every file
+name and writes gzip (and brotli, when installed) compressed copies next
+to the files. serve() sends them, compressed as the client accepts, and
+lets clients keep files with hashed names forever.
+"""
+
+import base64
+import gzip
+import hashlib
+import mimetypes
+import posixpath
+import re
+from collections import namedtuple
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import (
+    ManifestStaticFilesStorage,
+    staticfiles_storage,
+)
+from django.core.exceptions import ImproperlyConfigured, SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.functional import cached_property
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Vendored file, relative to static/library, its source and Subresource
+# Integrity hash, where the CDN publishes one
+Asset = namedtuple("Asset", ["path", "url", "integrity"])
+
+FONT_AWESOME = "https://cdnjs.cloudflare.com/ajax/libs/font-awesome/5.15.3"
+
+VENDOR = [
+    Asset(
+        "vendor/bootstrap/bootstrap.min.css",
+        "https://cdn.jsdelivr.net/npm/bootstrap@4.3.1/dist/css/bootstrap.min.css",
+        "sha384-ggOyR0iXCbMQv3Xipma34MD+dH/1fQ784/j6cY/iJTQUOhcWr7x9JvoRxT2MZw1T",
+    ),
+    Asset(
+        "vendor/fontawesome/css/all.min.css",
+        f"{FONT_AWESOME}/css/all.min.css",
+        None,
+    ),
+    *(
+        Asset(
+            f"vendor/fontawesome/webfonts/{font}.{extension}",
+            f"{FONT_AWESOME}/webfonts/{font}.{extension}",
+            None,
+        )
+        for font in ("fa-brands-400", "fa-regular-400", "fa-solid-900")
+        for extension in ("eot", "svg", "ttf", "woff", "woff2")
+    ),
+    Asset(
+        "vendor/jquery/jquery.slim.min.js",
+        "https://code.jquery.com/jquery-3.3.1.slim.min.js",
+        "sha384-q8i/X+965DzO0rT7abK41JStQIAqVgRVzpbzo5smXKp4YfRvH+8abtTE1Pi6jizo",
+    ),
+    Asset(
+        "vendor/popper/popper.min.js",
+        "https://cdn.jsdelivr.net/npm/popper.js@1.14.7/dist/umd/popper.min.js",
+        "sha384-UO2eT0CpHqdSJQ6hJty5KVphtPhzWj9WO1clHTMGa3JDZwrnQq4sF86dIHNDz0W1",
+    ),
+    Asset(
+        "vendor/bootstrap/bootstrap.min.js",
+        "https://cdn.jsdelivr.net/npm/bootstrap@4.3.1/dist/js/bootstrap.min.js",
+        "sha384-JjSmVgyd0p3pXB1rRibZUAYoIIy6OrQ6VrjIEaFf/nJGzIxFDsf4x0xIM+B07jRM",
+    ),
+]
+
+# Bundle and its parts in order, all relative to static folder
+BUNDLES = {
+    "library/bundle.css": [
+        "library/vendor/bootstrap/bootstrap.min.css",
+        "library/vendor/fontawesome/css/all.min.css",
+        "library/background.css",
+    ],
+    "library/bundle.js": [
+        "library/vendor/jquery/jquery.slim.min.js",
+        "library/vendor/popper/popper.min.js",
+        "library/vendor/bootstrap/bootstrap.min.js",
+    ],
+}
+
+# Compressed copies are written for these, when they get smaller enough
+COMPRESSED_EXTENSIONS = {".css", ".js", ".svg", ".eot", ".ttf", ".json", ".txt"}
+MIN_COMPRESSED_SIZE = 256
+MIN_SAVING = 0.05
+
+# Files with hashed names never change
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+SOURCE_MAP = re.compile(
+    r"^\s*(/\*# sourceMappingURL=.*?\*/|//# sourceMappingURL=.*)$", re.M
+)
+CSS_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+CSS_URL = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+
+
+def check_integrity(data, integrity):
+    """
+    Raises ValueError unless data matches Subresource Integrity hash.
+    """
+    algorithm, expected = integrity.split("-", 1)
+    digest = base64.b64encode(hashlib.new(algorithm, data).digest()).decode()
+    if digest != expected:
+        raise ValueError(f"Expected {integrity}, got {algorithm}-{digest}")
+
+
+def strip_source_maps(text):
+    # Maps are not vendored, manifest storage fails on missing references
+    return SOURCE_MAP.sub("", text)
+
+
+def minify_css(text):
+    """
+    Drops comments, and whitespace around braces, semicolons and commas.
+    """
+    text = CSS_COMMENT.sub("", text)
+    text = re.sub(r"\s+", " ", text)
+    text = re.sub(r"\s*([{};,])\s*", r"\1", text)
+    return text.replace(";}", "}").strip()
+
+
+def rebase_urls(text, source, target):
+    """
+    Rewrites relative url() of CSS in file source to work from file target.
+    """
+
+    def rebase(match):
+        quote, url = match.groups()
+        if url.startswith(("data:", "#", "/")) or "://" in url:
+            return match.group(0)
+        path = posixpath.normpath(posixpath.join(posixpath.dirname(source), url))
+        rebased = posixpath.relpath(path, posixpath.dirname(target))
+        return f"url({quote}{rebased}{quote})"
+
+    return CSS_URL.sub(rebase, text)
+
+
+def bundle(name, parts, read):
+    """
+    Returns content of bundle name, read(path) returns text of its parts.
+    """
+    texts = []
+    for part in parts:
+        text = strip_source_maps(read(part))
+        if name.endswith(".css"):
+            texts.append(minify_css(rebase_urls(text, part, name)))
+        else:
+            # Parts may end without semicolon
+            texts.append(text.rstrip() + "\n;")
+    return "\n".join(texts)
+
+
+def compressed_copies(content):
+    """
+    Yields (suffix, compressed content) that are worth keeping.
+    """
+    if len(content) < MIN_COMPRESSED_SIZE:
+        return
+    limit = len(content) * (1 - MIN_SAVING)
+    # mtime=0 keeps the output the same for the same file
+    gzipped = gzip.compress(content, compresslevel=9, mtime=0)
+    if len(gzipped) < limit:
+        yield ".gz", gzipped
+    if brotli is not None:
+        compressed = brotli.compress(content)
+        if len(compressed) < limit:
+            yield ".br", compressed
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Manifest storage that also builds BUNDLES and compresses hashed files.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            self.build_bundles(paths)
+
+        yield from super().post_process(paths, dry_run, **options)
+
+        if dry_run:
+            return
+        self.__dict__.pop("hashed_names", None)
+        for name in sorted(set(self.hashed_files.values())):
+            if Path(name).suffix not in COMPRESSED_EXTENSIONS:
+                continue
+            with self.open(name) as file:
+                content = file.read()
+            for suffix, compressed in compressed_copies(content):
+                if self.exists(name + suffix):
+                    self.delete(name + suffix)
+                self._save(name + suffix, ContentFile(compressed))
+                yield name, name + suffix, True
+
+    def build_bundles(self, paths):
+        def read(path):
+            if path not in paths:
+                raise ImproperlyConfigured(
+                    f"{path} is missing, run `python manage.py vendor_assets`"
+                )
+            storage, source = paths[path]
+            with storage.open(source) as file:
+                return file.read().decode()
+
+        for name, parts in BUNDLES.items():
+            content = bundle(name, parts, read)
+            if self.exists(name):
+                self.delete(name)
+            self._save(name, ContentFile(content.encode()))
+            # Hashed like collected files
+            paths[name] = (self, name)
+
+    @cached_property
+    def hashed_names(self):
+        return frozenset(self.hashed_files.values())
+
+
+def serve(request, path):
+    """
+    Serves file collected in STATIC_ROOT, compressed copy when the client
+    accepts it. Files with hashed names are cached by clients for a year,
+    the rest is revalidated.
+    """
+    try:
+        fullpath = Path(safe_join(settings.STATIC_ROOT, path))
+    except SuspiciousFileOperation:
+        raise Http404("Not found")
+    if not fullpath.is_file():
+        raise Http404("Not found")
+
+    stat = fullpath.stat()
+    immutable = path in getattr(staticfiles_storage, "hashed_names", ())
+    if not immutable and not was_modified_since(
+        request.headers.get("If-Modified-Since"), stat.st_mtime
+    ):
+        return HttpResponseNotModified()
+
+    content_type = mimetypes.guess_type(fullpath.name)[0] or "application/octet-stream"
+    accepted = request.headers.get("Accept-Encoding", "")
+    served, encoding = fullpath, None
+    for candidate, suffix in (("br", ".br"), ("gzip", ".gz")):
+        compressed = fullpath.with_name(fullpath.name + suffix)
+        if candidate in accepted and compressed.is_file():
+            served, encoding = compressed, candidate
+            break
+
+    response = FileResponse(served.open("rb"), content_type=content_type)
+    if encoding is not None:
+        response.headers["Content-Encoding"] = encoding
+    patch_vary_headers(response, ["Accept-Encoding"])
+    response.headers["Last-Modified"] = http_date(stat.st_mtime)
+    if immutable:
+        patch_cache_control(
+            response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True
+        )
+    else:
+        patch_cache_control(response, public=True, no_cache=True)
+    return response
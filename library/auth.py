@@ -0,0 +1,124 @@
+"""
+Authentication helpers of async views, and users kept in the cache.
+
+AuthenticationMiddleware sets request.user to a lazy object that loads the
+user with sync queries on first use, which async code must not run. Async
+views load it once in a thread first, after that it is a plain attribute.
+The shard of the user is looked up there too (see library.sharding).
+
+With settings.LIBRARY_AUTH_CACHE, CachedAuthenticationMiddleware takes the
+user from the cache instead of querying auth_user on every request. The
+key holds the session's auth hash, which changes with the password, so a
+cached user is only ever returned to sessions Django itself accepted for
+it. Every save or deletion of the user bumps its version (see
+library.signals), which drops all its entries: changed passwords still log
+out other sessions and changed permissions apply at once, in every process
+that shares the cache. Processes with a cache of their own, like the
+default local memory one, keep their copies, as they keep updates that
+skip signals, e.g. QuerySet.update(), for up to LIBRARY_AUTH_CACHE_TIMEOUT.
+That's why it's off unless turned on.
+"""
+
+import functools
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import get_user_model
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.auth.views import redirect_to_login
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject
+
+from . import sharding
+
+USER_KEY = "library:user:{user_id}:{version}:{session_hash}"
+USER_VERSION_KEY = "library:user-version:{user_id}"
+
+
+def _load_user(request):
+    # Any attribute evaluates the lazy object, later uses get the same user.
+    # Querysets of the user's entries must not look up the shard either.
+    sharding.resolve_shard(request.user)
+    return request.user
+
+
+async def aget_user(request):
+    return await sync_to_async(_load_user)(request)
+
+
+def alogin_required(view):
+    """
+    login_required for async function views.
+    """
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await aget_user(request)
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await view(request, *args, **kwargs)
+
+    return wrapper
+
+
+def user_version(user_id):
+    key = USER_VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        # Random enough to not repeat a version dropped from the cache
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_user_version(user_id):
+    cache.set(USER_VERSION_KEY.format(user_id=user_id), time.time_ns(), None)
+
+
+def cached_user(request):
+    """
+    auth.get_user() that keeps the user in the cache.
+    """
+    session = request.session
+    if auth.SESSION_KEY not in session:
+        return AnonymousUser()
+    user_id = get_user_model()._meta.pk.to_python(session[auth.SESSION_KEY])
+    session_hash = session.get(auth.HASH_SESSION_KEY)
+    backend = session.get(auth.BACKEND_SESSION_KEY)
+    if (
+        not settings.LIBRARY_AUTH_CACHE
+        or not session_hash
+        or backend not in settings.AUTHENTICATION_BACKENDS
+    ):
+        return auth.get_user(request)
+
+    key = USER_KEY.format(
+        user_id=user_id, version=user_version(user_id), session_hash=session_hash
+    )
+    user = cache.get(key)
+    if user is None:
+        user = auth.get_user(request)
+        # Anonymous after a failed check, the next request checks again
+        if user.is_authenticated:
+            cache.set(key, user, settings.LIBRARY_AUTH_CACHE_TIMEOUT)
+    return user
+
+
+def get_user(request):
+    if not hasattr(request, "_cached_user"):
+        request._cached_user = cached_user(request)
+    return request._cached_user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """
+    AuthenticationMiddleware that loads users through cached_user().
+    """
+
+    def process_request(self, request):
+        # Checks that sessions are installed
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_user(request))
@@ -0,0 +1,65 @@
+"""
+Bulk actions on entries selected in a list, used by list pages and API.
+
+Every action runs as a single UPDATE or DELETE limited to the user's own
+entries. Caches and stats are updated once for the whole batch, since set
+based queries send no signals.
+"""
+
+from django.db import transaction
+from django.db.models import F, IntegerField
+from django.db.models.functions import Cast, Round
+from django.utils import timezone
+
+from . import sharding, stats
+from .cache import bump_generation
+
+DELETE = "delete"
+SET_RARITY = "set_rarity"
+ADJUST_VALUE = "adjust_value"
+SET_SCHOOL = "set_school"
+SET_LEVEL = "set_level"
+
+
+def _changes(action, data):
+    """
+    Returns fields to update for action with form's cleaned data.
+    """
+    if action == SET_RARITY:
+        return {"rarity": data["rarity"]}
+    if action == SET_SCHOOL:
+        return {"school": data["school"]}
+    if action == SET_LEVEL:
+        return {"level": data["level"]}
+    if action == ADJUST_VALUE:
+        factor = (100 + data["percent"]) / 100
+        return {"value": Cast(Round(F("value") * factor), IntegerField())}
+    raise ValueError(f"Unknown bulk action {action}")
+
+
+def run_action(model, user, data):
+    """
+    Applies cleaned data of ItemBulkForm or SpellBulkForm to user's entries
+    with given ids. Returns number of affected entries.
+    """
+    action = data["action"]
+    selected = model.objects.of_author(user).filter(pk__in=data["ids"])
+
+    with transaction.atomic(using=sharding.shard_for(user.pk)):
+        before = stats.groups_of(selected)
+
+        if action == DELETE:
+            # Plain DELETE, QuerySet.delete() would load every entry to send
+            # signals. Search index is cleaned by database trigger.
+            count = selected._raw_delete(selected.db)
+            after = {}
+        else:
+            changes = _changes(action, data)
+            count = selected.update(last_modified=timezone.now(), **changes)
+            after = stats.groups_of(selected)
+
+        stats.record_change(before, after)
+
+    if count:
+        bump_generation(user.pk)
+    return count
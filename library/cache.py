@@ -0,0 +1,158 @@
+"""
+Cache of rendered list results, separate for every user.
+
+Every user has a generation number that is part of all their cache keys.
+Any change to user's items or spells bumps the generation (see
+library.signals), so old pages are never read again and simply expire.
+Generation is time of the last change in nanoseconds, so it also serves as
+Last-Modified of user's lists.
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+GENERATION_KEY = "library:generation:{user_id}"
+PAGE_KEY = "library:list:{user_id}:{generation}:{namespace}:{params}"
+FACETS_KEY = "library:facets:{user_id}:{generation}:{namespace}:{params}"
+HITS_KEY = "library:list-cache:hits"
+MISSES_KEY = "library:list-cache:misses"
+
+
+def _new_generation():
+    # Unique even when generation key got evicted and is created again
+    return time.time_ns()
+
+
+def get_generation(user_id):
+    key = GENERATION_KEY.format(user_id=user_id)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, _new_generation(), timeout=None)
+        generation = cache.get(key)
+    return generation
+
+
+def bump_generation(user_id):
+    """
+    Invalidates all cached pages of the user.
+    """
+    key = GENERATION_KEY.format(user_id=user_id)
+    # Never go back, even if clocks of worker processes differ
+    generation = max(_new_generation(), cache.get(key, 0) + 1)
+    cache.set(key, generation, timeout=None)
+
+
+def last_modified(user_id):
+    # Seconds since epoch when any of user's entries changed
+    return get_generation(user_id) // 10**9
+
+
+def normalized_params(request):
+    # Order of parameters and of checkbox values does not change the page
+    params = sorted((key, sorted(values)) for key, values in request.GET.lists())
+    return hashlib.sha256(repr(params).encode()).hexdigest()[:32]
+
+
+def filter_state(request, counts):
+    """
+    Identifies the filter panel of a list page: parameters fill in its
+    fields and facet counts its labels.
+    """
+    counts = sorted(
+        (field, sorted(field_counts.items(), key=repr))
+        for field, field_counts in counts.items()
+    )
+    digest = hashlib.sha256(repr(counts).encode()).hexdigest()[:32]
+    return f"{normalized_params(request)}:{digest}"
+
+
+def page_key(request, namespace, key=PAGE_KEY):
+    user_id = request.user.pk
+    return key.format(
+        user_id=user_id,
+        generation=get_generation(user_id),
+        namespace=namespace,
+        params=normalized_params(request),
+    )
+
+
+def _count(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+
+def _get(key, counted=False):
+    value = cache.get(key)
+    if counted:
+        _count(MISSES_KEY if value is None else HITS_KEY)
+    return value
+
+
+def _set(key, value):
+    cache.set(key, value, timeout=settings.LIBRARY_LIST_CACHE_TIMEOUT)
+
+
+def cached_page(request, namespace, render):
+    """
+    Returns (html, hit). render is called only on cache miss and must return
+    html of the page.
+    """
+    key = page_key(request, namespace)
+    html = _get(key, counted=True)
+    if html is not None:
+        return html, True
+
+    html = render()
+    _set(key, html)
+    return html, False
+
+
+def cached_facets(request, namespace, compute):
+    """
+    Returns facet counts for the request, compute is called only on cache
+    miss and must return them.
+    """
+    key = page_key(request, namespace, FACETS_KEY)
+    counts = _get(key)
+    if counts is None:
+        counts = compute()
+        _set(key, counts)
+    return counts
+
+
+# Async variants take coroutine functions. Cache itself is called directly,
+# async methods of Django's cache backends only run the same calls in a
+# thread, which costs more than local memory or file cache lookups do.
+
+
+async def acached_page(request, namespace, render):
+    key = page_key(request, namespace)
+    html = _get(key, counted=True)
+    if html is not None:
+        return html, True
+
+    html = await render()
+    _set(key, html)
+    return html, False
+
+
+async def acached_facets(request, namespace, compute):
+    key = page_key(request, namespace, FACETS_KEY)
+    counts = _get(key)
+    if counts is None:
+        counts = await compute()
+        _set(key, counts)
+    return counts
+
+
+def stats():
+    return {
+        "hits": cache.get(HITS_KEY, 0),
+        "misses": cache.get(MISSES_KEY, 0),
+    }
@@ -0,0 +1,215 @@
+"""
+Compression of responses, with brotli or gzip as the client accepts, and
+optional minification of HTML before it.
+
+Only text types in settings.LIBRARY_COMPRESSION_TYPES are compressed, and
+only bodies of at least LIBRARY_COMPRESSION_MIN_SIZE bytes, below that
+headers of compressed response outweigh the saving. Streaming responses
+(exports) are compressed chunk by chunk and every chunk is flushed, so
+they keep streaming. Brotli needs `pip install brotli`, without it gzip is
+used.
+
+As in Django's GZipMiddleware, gzip header gets random length padding, so
+length of compressed pages does not reveal secrets in them (BREACH).
+"""
+
+import gzip
+import io
+import re
+import secrets
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Brotli quality 5 compresses better than gzip at similar speed, higher
+# ones pay off only for files compressed once (see library.assets)
+BROTLI_QUALITY = 5
+GZIP_LEVEL = 6
+MAX_PADDING = 100
+
+QUALITY = re.compile(r"^q=([0-9.]+)$")
+
+# Blocks whose whitespace matters, kept as they are by minify_html()
+KEPT_BLOCK = re.compile(
+    r"(<(pre|textarea|script|style)\b.*?</\2\s*>)", re.IGNORECASE | re.DOTALL
+)
+EMPTY_BLOCK = re.compile(r"(<[^>]*>)\s*(</\w+\s*>)")
+# Conditional comments of old Internet Explorer stay
+HTML_COMMENT = re.compile(r"<!--(?!\[if).*?-->", re.DOTALL)
+WHITESPACE = re.compile(r"\s+")
+
+
+def accepted_encodings(header):
+    """
+    Returns {encoding: quality} of Accept-Encoding header.
+    """
+    encodings = {}
+    for entry in header.split(","):
+        name, *params = [part.strip() for part in entry.split(";")]
+        if not name:
+            continue
+        quality = 1.0
+        for param in params:
+            match = QUALITY.match(param)
+            if match:
+                try:
+                    quality = float(match.group(1))
+                except ValueError:
+                    quality = 0.0
+        encodings[name.lower()] = quality
+    return encodings
+
+
+def choose_encoding(header):
+    """
+    Returns "br", "gzip" or None for the client's Accept-Encoding.
+    """
+    encodings = accepted_encodings(header)
+    default = encodings.get("*", 0.0)
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best = max(candidates, key=lambda name: encodings.get(name, default))
+    return best if encodings.get(best, default) > 0 else None
+
+
+def _gzip_file(buffer):
+    # Random file name in gzip header pads the length, see module docs
+    padding = secrets.token_hex(secrets.randbelow(MAX_PADDING) // 2 + 1)
+    return gzip.GzipFile(
+        filename=padding,
+        mode="wb",
+        compresslevel=GZIP_LEVEL,
+        fileobj=buffer,
+        mtime=0,
+    )
+
+
+def compress(content, encoding):
+    if encoding == "br":
+        return brotli.compress(content, quality=BROTLI_QUALITY)
+    buffer = io.BytesIO()
+    with _gzip_file(buffer) as file:
+        file.write(content)
+    return buffer.getvalue()
+
+
+def _take(buffer):
+    data = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return data
+
+
+def compress_stream(chunks, encoding):
+    """
+    Yields compressed chunks, each flushed so that the client gets it.
+    """
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+        return
+
+    buffer = io.BytesIO()
+    with _gzip_file(buffer) as file:
+        for chunk in chunks:
+            file.write(chunk)
+            file.flush(zlib.Z_SYNC_FLUSH)
+            data = _take(buffer)
+            if data:
+                yield data
+    yield _take(buffer)
+
+
+def minify_html(html):
+    """
+    Collapses whitespace of HTML to single spaces and drops comments, except
+    in <pre>, <textarea>, <script> and <style>.
+    """
+    parts = KEPT_BLOCK.split(html)
+    minified = []
+    # split() returns text, kept block, its tag name, text, ...
+    for i in range(0, len(parts), 3):
+        text = HTML_COMMENT.sub("", parts[i])
+        minified.append(WHITESPACE.sub(" ", text))
+        if i + 1 < len(parts):
+            block = parts[i + 1]
+            empty = EMPTY_BLOCK.fullmatch(block)
+            if empty:
+                # E.g. <script src="..."></script>
+                block = empty.group(1) + empty.group(2)
+            minified.append(block)
+    return "".join(minified).strip()
+
+
+def _content_type(response):
+    return response.get("Content-Type", "").split(";")[0].strip().lower()
+
+
+def minify_response(response):
+    if (
+        not settings.LIBRARY_MINIFY_HTML
+        or response.streaming
+        or response.has_header("Content-Encoding")
+        or _content_type(response) != "text/html"
+    ):
+        return response
+    charset = response.charset
+    response.content = minify_html(response.content.decode(charset)).encode(charset)
+    if response.has_header("Content-Length"):
+        response.headers["Content-Length"] = str(len(response.content))
+    return response
+
+
+def compress_response(request, response):
+    """
+    Compresses response in place when the client and the response allow it.
+    """
+    if not settings.LIBRARY_COMPRESSION:
+        return response
+    if _content_type(response) not in settings.LIBRARY_COMPRESSION_TYPES:
+        return response
+    # Vary even when this response stays as it is, others may not
+    patch_vary_headers(response, ["Accept-Encoding"])
+    if response.has_header("Content-Encoding"):
+        return response
+    if "no-transform" in response.get("Cache-Control", ""):
+        return response
+
+    if response.streaming:
+        length = response.get("Content-Length")
+    else:
+        length = len(response.content)
+    if length is not None and int(length) < settings.LIBRARY_COMPRESSION_MIN_SIZE:
+        return response
+
+    encoding = choose_encoding(request.headers.get("Accept-Encoding", ""))
+    if encoding is None:
+        return response
+
+    if response.streaming:
+        response.streaming_content = compress_stream(
+            response.streaming_content, encoding
+        )
+        del response["Content-Length"]
+    else:
+        compressed = compress(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response.headers["Content-Length"] = str(len(compressed))
+
+    # Compressed body is not byte for byte the one the ETag was made for
+    etag = response.get("ETag")
+    if etag and etag.startswith('"'):
+        response.headers["ETag"] = "W/" + etag
+    response.headers["Content-Encoding"] = encoding
+    return response
@@ -0,0 +1,89 @@
+"""
+Streaming export of user's items and spells as CSV or JSON Lines.
+
+Rows are read from the database in chunks and written out one by one, so
+memory used does not depend on the size of the library.
+"""
+
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+# Rows fetched from database at once
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "jsonl": "application/jsonl",
+}
+
+ITEM_EXPORT_FIELDS = [
+    "id",
+    "title",
+    "description",
+    "value",
+    "rarity",
+    "date_created",
+    "last_modified",
+]
+SPELL_EXPORT_FIELDS = [
+    "id",
+    "title",
+    "description",
+    "school",
+    "level",
+    "date_created",
+    "last_modified",
+]
+
+
+class Echo:
+    """
+    File-like object that returns what is written to it instead of storing
+    it, so csv.writer can produce one line at a time.
+    """
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(fields, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def jsonl_lines(fields, rows):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(dict(zip(fields, row))) + "\n"
+
+
+def export_rows(queryset, fields):
+    # values_list skips creating model instances for every row
+    return queryset.values_list(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def export_response(queryset, fields, export_format, filename):
+    """
+    Returns StreamingHttpResponse with queryset in given format, "csv" is
+    used when format is unknown.
+    """
+    if export_format not in EXPORT_FORMATS:
+        export_format = "csv"
+
+    rows = export_rows(queryset, fields)
+    if export_format == "jsonl":
+        lines = jsonl_lines(fields, rows)
+    else:
+        lines = csv_lines(fields, rows)
+
+    response = StreamingHttpResponse(
+        lines, content_type=EXPORT_FORMATS[export_format] + "; charset=utf-8"
+    )
+    response[
+        "Content-Disposition"
+    ] = f'attachment; filename="{filename}.{export_format}"'
+    return response
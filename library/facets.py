@@ -0,0 +1,65 @@
+"""
+Counts of entries for every choice of filter checkboxes, e.g. "Rare (132)".
+
+Count of a facet reflects all other active filters, but not the facet's own
+filter, so it tells how many entries the list would show after ticking the
+choice. Every facet is counted with one GROUP BY query.
+"""
+
+from django.db.models import Count
+
+ITEM_FACETS = ("rarity",)
+SPELL_FACETS = ("school", "level")
+
+
+def count_by(queryset, field):
+    """
+    Returns {value of field: number of entries}.
+    """
+    rows = queryset.order_by().values_list(field).annotate(count=Count("pk"))
+    return dict(rows)
+
+
+async def acount_by(queryset, field):
+    rows = queryset.order_by().values_list(field).annotate(count=Count("pk"))
+    return {value: count async for value, count in rows}
+
+
+def facet_querysets(request, model, filter_form, facets):
+    """
+    Yields (field, queryset) of entries to count for every facet.
+    """
+    data = None
+    if filter_form.is_bound and filter_form.is_valid():
+        data = filter_form.cleaned_data
+
+    for field in facets:
+        # Same filters as the list, except the facet itself
+        facet_data = dict(data, **{field: []}) if data else None
+        yield field, model.get_queryset(request, facet_data)
+
+
+def facet_counts(request, model, filter_form, facets):
+    return {
+        field: count_by(queryset, field)
+        for field, queryset in facet_querysets(request, model, filter_form, facets)
+    }
+
+
+async def afacet_counts(request, model, filter_form, facets):
+    return {
+        field: await acount_by(queryset, field)
+        for field, queryset in facet_querysets(request, model, filter_form, facets)
+    }
+
+
+def label_choices(filter_form, counts):
+    """
+    Adds counts to labels of filter_form's choices.
+    """
+    for field, field_counts in counts.items():
+        form_field = filter_form.fields[field]
+        form_field.choices = [
+            (value, f"{label} ({field_counts.get(value, 0)})")
+            for value, label in form_field.choices
+        ]
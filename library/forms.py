@@ -2,6 +2,7 @@ from django import forms
 from django.core.validators import MinValueValidator
 from django.forms import ModelForm
 
+from library import bulk
 from library.models import Item, Spell
 
 
@@ -45,7 +46,10 @@ class ItemsForm(ModelForm):
 class ItemFilterForm(forms.Form):
     title = forms.CharField(
         widget=forms.TextInput(
-            attrs={"placeholder": "Enter title here", "class": "form-control"},
+            attrs={
+                "placeholder": "Search title or description",
+                "class": "form-control",
+            },
         ),
         required=False,
         initial="",
@@ -151,7 +155,10 @@ class SpellsForm(ModelForm):
 class SpellFilterForm(forms.Form):
     title = forms.CharField(
         widget=forms.TextInput(
-            attrs={"placeholder": "Enter title here", "class": "form-control"}
+            attrs={
+                "placeholder": "Search title or description",
+                "class": "form-control",
+            }
         ),
         required=False,
     )
@@ -199,3 +206,110 @@ class SpellSortForm(forms.Form):
             if data == direction[0]:
                 return data
         return "desc"
+
+
+class ImportForm(forms.Form):
+    file = forms.FileField(
+        widget=forms.ClearableFileInput(attrs={"accept": ".csv,.jsonl,.ndjson"}),
+        help_text="CSV with header row or JSON Lines, one entry per line",
+    )
+
+
+class MultipleIdField(forms.Field):
+    """
+    List of ids, e.g. of checkboxes ticked in a list.
+    """
+
+    widget = forms.MultipleHiddenInput
+    default_error_messages = {
+        "invalid": "Enter a list of ids.",
+    }
+
+    def to_python(self, value):
+        if not value:
+            return []
+        if not isinstance(value, (list, tuple)):
+            raise forms.ValidationError(self.error_messages["invalid"], "invalid")
+        try:
+            return [int(id) for id in value]
+        except (TypeError, ValueError):
+            raise forms.ValidationError(self.error_messages["invalid"], "invalid")
+
+
+class BulkForm(forms.Form):
+    # Field that action needs, if any
+    ACTION_FIELDS = {}
+
+    ids = MultipleIdField()
+
+    def clean(self):
+        cleaned_data = super().clean()
+        field = self.ACTION_FIELDS.get(cleaned_data.get("action"))
+        if field and cleaned_data.get(field) is None:
+            self.add_error(field, "This field is required for selected action.")
+        return cleaned_data
+
+
+class ItemBulkForm(BulkForm):
+    ACTIONS = (
+        (bulk.DELETE, "Delete"),
+        (bulk.SET_RARITY, "Set rarity"),
+        (bulk.ADJUST_VALUE, "Adjust value by %"),
+    )
+    ACTION_FIELDS = {
+        bulk.SET_RARITY: "rarity",
+        bulk.ADJUST_VALUE: "percent",
+    }
+
+    action = forms.ChoiceField(
+        choices=ACTIONS, widget=forms.Select(attrs={"class": "form-control mr-2"})
+    )
+
+    rarity = forms.TypedChoiceField(
+        choices=(("", "Rarity"),) + Item.RARITIES,
+        coerce=int,
+        empty_value=None,
+        required=False,
+        widget=forms.Select(attrs={"class": "form-control mr-2"}),
+    )
+
+    percent = forms.IntegerField(
+        min_value=-100,
+        max_value=1000,
+        required=False,
+        widget=forms.NumberInput(
+            attrs={"placeholder": "Percent", "class": "form-control mr-2"}
+        ),
+    )
+
+
+class SpellBulkForm(BulkForm):
+    ACTIONS = (
+        (bulk.DELETE, "Delete"),
+        (bulk.SET_SCHOOL, "Set school"),
+        (bulk.SET_LEVEL, "Set level"),
+    )
+    ACTION_FIELDS = {
+        bulk.SET_SCHOOL: "school",
+        bulk.SET_LEVEL: "level",
+    }
+
+    action = forms.ChoiceField(
+        choices=ACTIONS, widget=forms.Select(attrs={"class": "form-control mr-2"})
+    )
+
+    school = forms.TypedChoiceField(
+        choices=(("", "School"),) + Spell.SCHOOLS_OF_MAGIC,
+        coerce=int,
+        empty_value=None,
+        required=False,
+        widget=forms.Select(attrs={"class": "form-control mr-2"}),
+    )
+
+    level = forms.TypedChoiceField(
+        choices=(("", "Level"),) + Spell.SPELL_LEVELS,
+        coerce=int,
+        empty_value=None,
+        required=False,
+        widget=forms.Select(attrs={"class": "form-control mr-2"}),
+    )
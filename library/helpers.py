@@ -14,13 +14,15 @@ def get_sort_parameters(request, get_criteria, l):
     return parameters
 
 
-# Avoids ?page duplication in URL
+# Avoids ?page (or ?cursor) duplication in URL
 def url_strip_page_number(request):
     request = request.GET.copy()
     request.pop("page", None)
+    request.pop("cursor", None)
 
     return request.urlencode()
 
 
-def path_without_page(request):
-    return f"{request.path}?{url_strip_page_number(request)}"
+def path_without_page(request, path=None):
+    # path replaces path of the request, e.g. for fragments of another page
+    return f"{path or request.path}?{url_strip_page_number(request)}"
@@ -0,0 +1,286 @@
+"""
+Bulk import of items and spells from CSV or JSON Lines.
+
+Input is read row by row, so files of any size can be imported. Rows are
+validated in batches, column by column, by the same rules as ItemsForm and
+SpellsForm, and valid rows of a batch are inserted with bulk_create() in
+their own transaction. Rows that fail validation are reported with their
+line number.
+"""
+
+import csv
+import io
+import json
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import stats
+from .cache import bump_generation
+from .forms import ItemsForm, SpellsForm
+from .models import Item, Spell
+from .sharding import shard_for
+
+IMPORT_BATCH_SIZE = 2000
+IMPORT_FORMATS = ("csv", "jsonl")
+
+
+@dataclass
+class RowError:
+    line: int
+    errors: dict
+
+    def as_dict(self):
+        return {"line": self.line, "errors": self.errors}
+
+
+@dataclass
+class ImportResult:
+    rows: int = 0
+    created: int = 0
+    errors: list = field(default_factory=list)
+
+
+INTEGER = re.compile(r"-?[0-9]+")
+
+
+def _converter(form_field, model_field):
+    """
+    Returns function that converts and checks plain values of the field,
+    e.g. digits of an integer, quickly. It raises ValueError for anything
+    else, which is then cleaned by the form and model field themselves.
+    """
+    # Form and model field often share some, e.g. MaxLengthValidator
+    validators = []
+    for validator in [*getattr(form_field, "validators", []), *model_field.validators]:
+        if validator not in validators:
+            validators.append(validator)
+    choices = None
+    if model_field.choices:
+        choices = {key for key, _ in model_field.flatchoices}
+
+    def check(value):
+        if choices is not None and value not in choices:
+            raise ValueError(value)
+        for validator in validators:
+            validator(value)
+        return value
+
+    if isinstance(model_field, models.IntegerField):
+
+        def convert(value):
+            if isinstance(value, str) and INTEGER.fullmatch(value):
+                return check(int(value))
+            # Booleans are ints too, the fields decide about them
+            if isinstance(value, int) and not isinstance(value, bool):
+                return check(value)
+            raise ValueError(value)
+
+    elif isinstance(model_field, models.DateTimeField):
+
+        def convert(value):
+            if isinstance(value, str):
+                parsed = parse_datetime(value)
+                if parsed is not None:
+                    return check(parsed)
+            raise ValueError(value)
+
+    elif isinstance(model_field, (models.CharField, models.TextField)):
+
+        def convert(value):
+            if isinstance(value, str):
+                return check(value)
+            raise ValueError(value)
+
+    else:
+
+        def convert(value):
+            raise ValueError(value)
+
+    return convert
+
+
+class RowValidator:
+    """
+    Validates and converts rows of input using form fields of form_class
+    and underlying model fields, same as form.is_valid() would. Optional
+    fields left empty get model default.
+    """
+
+    def __init__(self, form_class, extra_fields=()):
+        model = form_class._meta.model
+        form_fields = form_class.base_fields
+
+        self.fields = []
+        for name in list(form_class._meta.fields) + list(extra_fields):
+            form_field = form_fields.get(name)
+            model_field = model._meta.get_field(name)
+            self.fields.append(
+                (name, form_field, model_field, _converter(form_field, model_field))
+            )
+
+    def clean(self, row):
+        """
+        Returns (data, errors), errors is empty dict when row is valid.
+        """
+        return self.clean_rows([row])[0]
+
+    def clean_rows(self, rows):
+        """
+        Returns [(data, errors)] of rows, validated column by column. Every
+        distinct value of a column is converted once.
+        """
+        results = [({}, {}) for _ in rows]
+
+        for name, form_field, model_field, convert in self.fields:
+            required = form_field is not None and form_field.required
+            # Once per batch, rows without date_created share the same one
+            default = model_field.get_default()
+            converted = {}
+            for row, (data, errors) in zip(rows, results):
+                value = row.get(name)
+                if isinstance(value, str):
+                    value = value.strip()
+
+                if value is None or value == "":
+                    if required:
+                        errors[name] = ["This field is required."]
+                    else:
+                        data[name] = default
+                    continue
+
+                # Booleans would match equal numbers
+                known = isinstance(value, (str, int)) and not isinstance(value, bool)
+                if known and value in converted:
+                    data[name] = converted[value]
+                    continue
+
+                raw = value
+                try:
+                    value = convert(value)
+                except (ValueError, ValidationError):
+                    # Unusual or invalid, the fields tell which
+                    try:
+                        if form_field is not None:
+                            value = form_field.clean(value)
+                        value = model_field.clean(value, None)
+                    except ValidationError as error:
+                        errors[name] = error.messages
+                        continue
+
+                if isinstance(value, datetime) and timezone.is_naive(value):
+                    value = timezone.make_aware(value)
+                if known:
+                    converted[raw] = value
+                data[name] = value
+
+        return results
+
+
+ITEM_VALIDATOR = RowValidator(ItemsForm, extra_fields=["date_created"])
+SPELL_VALIDATOR = RowValidator(SpellsForm, extra_fields=["date_created"])
+
+VALIDATORS = {
+    Item: ITEM_VALIDATOR,
+    Spell: SPELL_VALIDATOR,
+}
+
+
+def read_rows(file, import_format):
+    """
+    Yields (line number, row dict) from binary file.
+    """
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+
+    if import_format == "jsonl":
+        for line_number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            if not isinstance(row, dict):
+                yield line_number, None
+                continue
+            yield line_number, row
+    else:
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, row
+
+
+def guess_format(filename):
+    if filename and filename.lower().endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    return "csv"
+
+
+def _insert(model, rows, author, result, batch_size):
+    """
+    Inserts validated rows, dicts of field values, of author and records
+    them in stats.
+    """
+    shard = shard_for(author.pk)
+    # Setting author_id skips the related object descriptor, costly per row
+    objects = [model(author_id=author.pk, **data) for data in rows]
+    with transaction.atomic(using=shard):
+        model.objects.using(shard).bulk_create(objects, batch_size=batch_size)
+        deltas = stats.new_deltas()
+        stats.add_rows(deltas, model, rows)
+        stats.apply(author.pk, deltas)
+    result.created += len(objects)
+
+
+def _import_batch(model, validator, batch, author, result, batch_size):
+    # Batch of (line number, row dict or None when it's not valid at all)
+    valid = []
+    cleaned = iter(validator.clean_rows([row for _, row in batch if row is not None]))
+    for line, row in batch:
+        if row is None:
+            result.errors.append(RowError(line, {"__all__": ["Row is not valid."]}))
+            continue
+        data, errors = next(cleaned)
+        if errors:
+            result.errors.append(RowError(line, errors))
+        else:
+            valid.append(data)
+    if valid:
+        _insert(model, valid, author, result, batch_size)
+
+
+def import_rows(model, rows, author, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Validates and inserts rows, an iterable of (line number, row dict), for
+    author. Returns ImportResult with count of created entries and errors.
+    """
+    validator = VALIDATORS[model]
+    result = ImportResult()
+    batch = []
+
+    for line, row in rows:
+        result.rows += 1
+        batch.append((line, row))
+        if len(batch) >= batch_size:
+            _import_batch(model, validator, batch, author, result, batch_size)
+            batch = []
+
+    if batch:
+        _import_batch(model, validator, batch, author, result, batch_size)
+
+    # Inserts send no signals, invalidate cached lists once
+    if result.created:
+        bump_generation(author.pk)
+
+    return result
+
+
+def import_file(model, file, import_format, author, batch_size=IMPORT_BATCH_SIZE):
+    if import_format not in IMPORT_FORMATS:
+        import_format = "csv"
+    return import_rows(model, read_rows(file, import_format), author, batch_size)
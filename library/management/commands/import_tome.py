@@ -0,0 +1,70 @@
+import json
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from library.importer import (
+    IMPORT_BATCH_SIZE,
+    IMPORT_FORMATS,
+    guess_format,
+    import_file,
+)
+from library.models import Item, Spell
+
+MODELS = {
+    "items": Item,
+    "spells": Spell,
+}
+
+
+class Command(BaseCommand):
+    help = "Imports items or spells for a user from CSV or JSON Lines file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import")
+        parser.add_argument("--user", required=True, help="Username of the author")
+        parser.add_argument("--model", choices=MODELS, default="items")
+        parser.add_argument(
+            "--format",
+            choices=IMPORT_FORMATS,
+            help="Input format, guessed from file extension by default",
+        )
+        parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument(
+            "--report", help="Write rows that failed validation to this file"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            author = User.objects.get(username=options["user"])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['user']} does not exist")
+
+        if options["batch_size"] < 1:
+            raise CommandError("Batch size must be positive")
+
+        import_format = options["format"] or guess_format(options["path"])
+
+        try:
+            with open(options["path"], "rb") as file:
+                result = import_file(
+                    MODELS[options["model"]],
+                    file,
+                    import_format,
+                    author,
+                    options["batch_size"],
+                )
+        except OSError as error:
+            raise CommandError(error)
+
+        if options["report"]:
+            with open(options["report"], "w") as report:
+                for error in result.errors:
+                    report.write(json.dumps(error.as_dict()) + "\n")
+
+        self.stdout.write(
+            f"Imported {result.created} of {result.rows} {options['model']}, "
+            f"{len(result.errors)} rows with errors"
+        )
+        for error in result.errors[:10]:
+            self.stderr.write(f"Line {error.line}: {json.dumps(error.errors)}")
@@ -0,0 +1,70 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from library.sharding import (
+    balance_plan,
+    entry_counts,
+    is_sharded,
+    move_author,
+    shard_for,
+    shards,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves items, spells and stats of users between shards, either given "
+        "users to one shard or whoever evens out the shards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            action="append",
+            dest="users",
+            help="Username to move, can be repeated. Requires --to.",
+        )
+        parser.add_argument("--to", dest="shard", help="Alias of the target shard")
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only print the moves",
+        )
+
+    def handle(self, *args, **options):
+        if not is_sharded():
+            raise CommandError("No shards configured, see DJANGO_DB_SHARDS")
+
+        if options["users"]:
+            if options["shard"] not in shards():
+                raise CommandError(f"--to has to be one of {', '.join(shards())}")
+            users = User.objects.filter(username__in=options["users"])
+            if len(users) != len(set(options["users"])):
+                raise CommandError("Some of the users do not exist")
+            moves = [
+                (user.pk, shard_for(user.pk), options["shard"])
+                for user in users
+                if shard_for(user.pk) != options["shard"]
+            ]
+        elif options["shard"]:
+            raise CommandError("--to requires --user")
+        else:
+            moves = balance_plan(entry_counts())
+
+        usernames = dict(
+            User.objects.filter(pk__in=[move[0] for move in moves]).values_list(
+                "pk", "username"
+            )
+        )
+        for author_id, source, target in moves:
+            name = usernames.get(author_id, author_id)
+            if options["dry_run"]:
+                self.stdout.write(f"Would move {name} from {source} to {target}")
+                continue
+            moved = move_author(author_id, target)
+            self.stdout.write(
+                f"Moved {moved} entries of {name} from {source} to {target}"
+            )
+
+        if not moves:
+            self.stdout.write("Nothing to move")
@@ -0,0 +1,32 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from library.stats import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes materialized library statistics from items and spells and "
+        "fixes groups that drifted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            action="append",
+            dest="users",
+            help="Username to rebuild, can be repeated. All users by default.",
+        )
+
+    def handle(self, *args, **options):
+        author_ids = None
+        if options["users"]:
+            users = User.objects.filter(username__in=options["users"])
+            author_ids = list(users.values_list("pk", flat=True))
+            if len(author_ids) != len(set(options["users"])):
+                raise CommandError("Some of the users do not exist")
+
+        drift = rebuild(author_ids)
+
+        scope = f"{len(author_ids)} users" if author_ids is not None else "all users"
+        self.stdout.write(f"Rebuilt stats of {scope}, {drift} groups had drifted")
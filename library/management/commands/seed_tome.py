@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from library.seed import SEED_BATCH_SIZE, SEED_PASSWORD, seed
+
+
+class Command(BaseCommand):
+    help = "Generates users with synthetic items and spells."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10)
+        parser.add_argument("--items", type=int, default=1000, help="Per user")
+        parser.add_argument("--spells", type=int, default=1000, help="Per user")
+        parser.add_argument(
+            "--seed", type=int, default=0, help="Same seed generates same data"
+        )
+        parser.add_argument("--batch-size", type=int, default=SEED_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        for name in ("users", "items", "spells"):
+            if options[name] < 0:
+                raise CommandError(f"Number of {name} must not be negative")
+        if options["batch_size"] < 1:
+            raise CommandError("Batch size must be positive")
+
+        users = seed(
+            options["users"],
+            options["items"],
+            options["spells"],
+            options["seed"],
+            options["batch_size"],
+        )
+
+        self.stdout.write(
+            f"Created {options['items']} items and {options['spells']} spells "
+            f"for each of {len(users)} users, password is {SEED_PASSWORD!r}"
+        )
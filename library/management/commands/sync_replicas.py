@@ -0,0 +1,33 @@
+import sqlite3
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from library.routers import PRIMARY, replicas
+
+
+class Command(BaseCommand):
+    help = (
+        "Copies primary SQLite database over read replicas. Stands in for "
+        "replication when trying replicas locally with SQLite files."
+    )
+
+    def handle(self, *args, **options):
+        if not replicas():
+            raise CommandError("No replicas configured, see DJANGO_DB_REPLICAS")
+
+        primary = connections[PRIMARY]
+        if primary.vendor != "sqlite":
+            raise CommandError("Only SQLite databases can be copied")
+        primary.ensure_connection()
+
+        for alias in replicas():
+            # Connection of this process would not see the new file
+            connections[alias].close()
+            target = sqlite3.connect(connections[alias].settings_dict["NAME"])
+            try:
+                # Consistent copy even while the primary is being written to
+                primary.connection.backup(target)
+            finally:
+                target.close()
+            self.stdout.write(f"Copied primary database to {alias}")
@@ -0,0 +1,46 @@
+from pathlib import Path
+from urllib.request import urlopen
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from library.assets import VENDOR, check_integrity, strip_source_maps
+
+
+class Command(BaseCommand):
+    help = (
+        "Downloads Bootstrap, Font Awesome, jQuery and Popper into "
+        "library/static/library/vendor, so pages need no CDN. Commit the "
+        "files, collectstatic bundles them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Download files that are already vendored again",
+        )
+
+    def handle(self, *args, **options):
+        folder = Path(apps.get_app_config("library").path) / "static" / "library"
+
+        for asset in VENDOR:
+            path = folder / asset.path
+            if path.exists() and not options["force"]:
+                continue
+            try:
+                with urlopen(asset.url, timeout=30) as response:
+                    data = response.read()
+            except OSError as error:
+                raise CommandError(f"Downloading {asset.url} failed: {error}")
+            if asset.integrity:
+                try:
+                    check_integrity(data, asset.integrity)
+                except ValueError as error:
+                    raise CommandError(f"{asset.url} does not match: {error}")
+            if path.suffix in (".css", ".js"):
+                data = strip_source_maps(data.decode()).encode()
+
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(data)
+            self.stdout.write(f"Vendored {asset.path}")
@@ -0,0 +1,66 @@
+from asyncio import iscoroutinefunction
+
+from asgiref.sync import sync_to_async
+from django.utils.decorators import sync_and_async_middleware
+
+from . import routers
+from .compression import compress_response, minify_response
+
+
+def _should_pin(request):
+    # Loads the user, async views get it already loaded
+    user = request.user
+    return user.is_authenticated and routers.recently_changed(user.pk)
+
+
+@sync_and_async_middleware
+def replica_pin_middleware(get_response):
+    """
+    Pins reads of the request to primary database when the user changed
+    any of their entries recently, see library.routers.
+    """
+    if iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            if not routers.replicas():
+                return await get_response(request)
+
+            token = routers.pin_to_primary(await sync_to_async(_should_pin)(request))
+            try:
+                return await get_response(request)
+            finally:
+                routers.unpin(token)
+
+    else:
+
+        def middleware(request):
+            if not routers.replicas():
+                return get_response(request)
+
+            token = routers.pin_to_primary(_should_pin(request))
+            try:
+                return get_response(request)
+            finally:
+                routers.unpin(token)
+
+    return middleware
+
+
+@sync_and_async_middleware
+def compression_middleware(get_response):
+    """
+    Minifies HTML and compresses responses, see library.compression.
+    """
+    if iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            response = await get_response(request)
+            return compress_response(request, minify_response(response))
+
+    else:
+
+        def middleware(request):
+            response = get_response(request)
+            return compress_response(request, minify_response(response))
+
+    return middleware
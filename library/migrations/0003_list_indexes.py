@@ -0,0 +1,81 @@
+# Generated by Django 4.1.5 on 2026-10-18 07:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("library", "0002_alter_spell_school"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="item",
+            name="author",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="spell",
+            name="author",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="item",
+            index=models.Index(
+                fields=["author", "date_created"], name="item_author_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="item",
+            index=models.Index(
+                fields=["author", "title"], name="item_author_title_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="item",
+            index=models.Index(
+                fields=["author", "rarity"], name="item_author_rarity_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="item",
+            index=models.Index(
+                fields=["author", "value"], name="item_author_value_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="spell",
+            index=models.Index(
+                fields=["author", "date_created"], name="spell_author_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="spell",
+            index=models.Index(
+                fields=["author", "title"], name="spell_author_title_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="spell",
+            index=models.Index(
+                fields=["author", "school"], name="spell_author_school_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="spell",
+            index=models.Index(
+                fields=["author", "level"], name="spell_author_level_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,120 @@
+# Generated by Django 4.1.5 on 2026-10-18 07:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+import library.search
+
+# One statement each, executescript() would commit in the middle of the
+# migration's transaction
+FTS_SQL = [
+    """
+    CREATE VIRTUAL TABLE {table}_fts USING fts5(
+        title, description, content='{table}', content_rowid='id'
+    )
+    """,
+    "INSERT INTO {table}_fts({table}_fts) VALUES ('rebuild')",
+    """
+    CREATE TRIGGER {table}_fts_insert AFTER INSERT ON {table} BEGIN
+        INSERT INTO {table}_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER {table}_fts_delete AFTER DELETE ON {table} BEGIN
+        INSERT INTO {table}_fts({table}_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER {table}_fts_update AFTER UPDATE OF title, description
+    ON {table} BEGIN
+        INSERT INTO {table}_fts({table}_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO {table}_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+]
+
+DROP_FTS_SQL = [
+    "DROP TRIGGER IF EXISTS {table}_fts_insert",
+    "DROP TRIGGER IF EXISTS {table}_fts_delete",
+    "DROP TRIGGER IF EXISTS {table}_fts_update",
+    "DROP TABLE IF EXISTS {table}_fts",
+]
+
+TABLES = ["library_item", "library_spell"]
+
+
+def run_sql(statements):
+    # FTS5 exists only in SQLite, other databases use icontains fallback
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != "sqlite":
+            return
+        with schema_editor.connection.cursor() as cursor:
+            for table in TABLES:
+                for statement in statements:
+                    cursor.execute(statement.format(table=table))
+
+    return run
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("library", "0003_list_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(run_sql(FTS_SQL), run_sql(DROP_FTS_SQL)),
+        migrations.CreateModel(
+            name="ItemSearchIndex",
+            fields=[
+                (
+                    "item",
+                    models.OneToOneField(
+                        db_column="rowid",
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        primary_key=True,
+                        related_name="search_index",
+                        serialize=False,
+                        to="library.item",
+                    ),
+                ),
+                ("match", library.search.SearchField(db_column="library_item_fts")),
+                ("title", models.TextField()),
+                ("description", models.TextField(null=True)),
+                ("rank", models.FloatField()),
+            ],
+            options={
+                "db_table": "library_item_fts",
+                "managed": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="SpellSearchIndex",
+            fields=[
+                (
+                    "spell",
+                    models.OneToOneField(
+                        db_column="rowid",
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        primary_key=True,
+                        related_name="search_index",
+                        serialize=False,
+                        to="library.spell",
+                    ),
+                ),
+                ("match", library.search.SearchField(db_column="library_spell_fts")),
+                ("title", models.TextField()),
+                ("description", models.TextField()),
+                ("rank", models.FloatField()),
+            ],
+            options={
+                "db_table": "library_spell_fts",
+                "managed": False,
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.1.5 on 2026-10-18 07:34
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("library", "0004_search_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LibraryStat",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("item_rarity", "Items by rarity"),
+                            ("item_month", "Items by month created"),
+                            ("spell_school", "Spells by school"),
+                            ("spell_level", "Spells by level"),
+                            ("spell_month", "Spells by month created"),
+                        ],
+                        max_length=16,
+                    ),
+                ),
+                ("key", models.IntegerField()),
+                ("count", models.IntegerField(default=0)),
+                ("value", models.BigIntegerField(default=0)),
+                (
+                    "author",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="library_stats",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="librarystat",
+            constraint=models.UniqueConstraint(
+                fields=("author", "kind", "key"), name="library_stat_unique"
+            ),
+        ),
+    ]
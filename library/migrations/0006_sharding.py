@@ -0,0 +1,83 @@
+# Generated by Django 4.1.5 on 2026-10-18 08:02
+
+import importlib
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+from library.sharding import reserve_id_range
+
+search_index = importlib.import_module("library.migrations.0004_search_index")
+
+
+def recreate_search_index(apps, schema_editor):
+    # Altered tables were copied, and their search triggers dropped with the
+    # old ones
+    search_index.run_sql(search_index.DROP_FTS_SQL)(apps, schema_editor)
+    search_index.run_sql(search_index.FTS_SQL)(apps, schema_editor)
+
+
+def reserve_id_ranges(apps, schema_editor):
+    reserve_id_range(schema_editor.connection, search_index.TABLES)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("library", "0005_library_stats"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ShardAssignment",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("shard", models.CharField(max_length=32)),
+            ],
+        ),
+        # Reversed after the fields below, whose tables are copied again
+        migrations.RunPython(migrations.RunPython.noop, recreate_search_index),
+        migrations.AlterField(
+            model_name="item",
+            name="author",
+            field=models.ForeignKey(
+                db_constraint=False,
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="librarystat",
+            name="author",
+            field=models.ForeignKey(
+                db_constraint=False,
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="library_stats",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="spell",
+            name="author",
+            field=models.ForeignKey(
+                db_constraint=False,
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.RunPython(recreate_search_index, migrations.RunPython.noop),
+        migrations.RunPython(reserve_id_ranges, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.1.5 on 2026-10-18 09:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+import library.models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("library", "0006_sharding"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="item",
+            name="author",
+            field=models.ForeignKey(
+                db_constraint=False,
+                db_index=False,
+                on_delete=library.models.cascade_from_author,
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="spell",
+            name="author",
+            field=models.ForeignKey(
+                db_constraint=False,
+                db_index=False,
+                on_delete=library.models.cascade_from_author,
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.1.5 on 2026-10-18 09:58
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("library", "0007_cascade_from_author"),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name="itemsearchindex",
+            old_name="match",
+            new_name="document",
+        ),
+        migrations.RenameField(
+            model_name="spellsearchindex",
+            old_name="match",
+            new_name="document",
+        ),
+    ]
@@ -1,14 +1,105 @@
+from collections import defaultdict
+
 from django.contrib.auth.models import User
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models.functions import Concat, Length, Substr
+from django.db.models.lookups import GreaterThan, LessThanOrEqual
 from django.urls import reverse
 from django.utils import timezone
 
+from . import sharding
+from .search import SearchField, search
+
 ITEM_DEFAULT_SORTING = "-date_created"
 SORT_DIRECTION_DICT = {"asc": "", "desc": "-"}
+# Number of description characters shown in lists
+DESCRIPTION_PREVIEW_LENGTH = 200
+
+
+class Likely(models.Func):
+    """
+    Tells SQLite query planner that wrapped condition is true for almost every
+    row, so it won't prefer range index over index that matches ORDER BY.
+    On other databases condition is used as is.
+    """
+
+    function = "likely"
+    output_field = models.BooleanField()
+
+    def as_sql(self, compiler, connection, **extra_context):
+        return compiler.compile(self.get_source_expressions()[0])
 
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, **extra_context)
 
-class Item(models.Model):
+
+def cascade_from_author(collector, field, sub_objs, using):
+    """
+    CASCADE that also marks entries deleted together with their author.
+    Their stats go with the author instead of being updated by every entry
+    (see library.stats), and the mark lives only as long as the deletion.
+    """
+    models.CASCADE(collector, field, sub_objs, using)
+    for obj in sub_objs:
+        obj._deleted_with_author = True
+
+
+class LoadedValuesMixin:
+    """
+    Remembers values of fields as they were loaded from database, so that
+    statistics can tell what changed on save without querying again.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+
+class AuthorQuerySet(models.QuerySet):
+    """
+    Entries live on the shard of their author, see library.sharding.
+    """
+
+    def of_author(self, author):
+        author_id = getattr(author, "pk", author)
+        # Resolved already for users of async views
+        shard = getattr(author, "library_shard", None) or sharding.shard_for(author_id)
+        return sharding.using_shard(self, shard).filter(author_id=author_id)
+
+    def of_pk(self, pk):
+        return sharding.using_shard(self, sharding.shard_for_pk(pk))
+
+    # Unless given a database, these save to the shard of the author, not
+    # to the database of the queryset
+
+    def create(self, **kwargs):
+        if self._db is not None or not sharding.is_sharded():
+            return super().create(**kwargs)
+        obj = self.model(**kwargs)
+        obj.save(force_insert=True)
+        return obj
+
+    def bulk_create(self, objs, *args, **kwargs):
+        if self._db is not None or not sharding.is_sharded():
+            return super().bulk_create(objs, *args, **kwargs)
+        objs = list(objs)
+        by_shard = defaultdict(list)
+        for obj in objs:
+            by_shard[sharding.shard_for(obj.author_id)].append(obj)
+        for shard, shard_objs in by_shard.items():
+            self.using(shard).bulk_create(shard_objs, *args, **kwargs)
+        return objs
+
+
+def created_until_now():
+    # Entries dated in future are hidden, that is rarely the case
+    return Likely(LessThanOrEqual(models.F("date_created"), timezone.now()))
+
+
+class Item(LoadedValuesMixin, models.Model):
     """
     By using integers to define choices, it's possible to enforce
     the set of allowed values in the database, and prevent invalid data
@@ -36,6 +127,7 @@ class Item(models.Model):
         ("title", "Title"),
         ("rarity", "Rarity"),
         ("value", "Value"),
+        ("relevance", "Relevance"),
     )
 
     SORT_DIRECTION = (
@@ -54,7 +146,25 @@ class Item(models.Model):
     )
     date_created = models.DateTimeField(default=timezone.now)
     last_modified = models.DateTimeField(auto_now=True)
-    author = models.ForeignKey(User, on_delete=models.CASCADE)
+    # Covered by composite indexes below, which all start with author
+    # No foreign key constraint, author's shard has no users table
+    author = models.ForeignKey(
+        User, on_delete=cascade_from_author, db_index=False, db_constraint=False
+    )
+
+    objects = AuthorQuerySet.as_manager()
+
+    class Meta:
+        # Lists are always filtered by author and ordered by one of
+        # SORT_CRITERIA, id tiebreaker is implicitly part of every index
+        indexes = [
+            models.Index(
+                fields=["author", "date_created"], name="item_author_created_idx"
+            ),
+            models.Index(fields=["author", "title"], name="item_author_title_idx"),
+            models.Index(fields=["author", "rarity"], name="item_author_rarity_idx"),
+            models.Index(fields=["author", "value"], name="item_author_value_idx"),
+        ]
 
     def __str__(self):
         return self.title
@@ -63,16 +173,10 @@ class Item(models.Model):
         return reverse("library:item-detail", args=[self.id])
 
     def get_queryset(request, data=None):
-        # By default user will get only his items
-        filters = {
-            "date_created__lte": timezone.now(),
-            "author": request.user,
-        }
+        filters = {}
 
         if data:
             # Also filter by these if present in form
-            if data["title"]:
-                filters.update({"title__icontains": data["title"]})
             if data["min_value"]:
                 filters.update({"value__gte": data["min_value"]})
             if data["max_value"]:
@@ -80,24 +184,52 @@ class Item(models.Model):
             if data["rarity"]:
                 filters.update({"rarity__in": data["rarity"]})
 
-        # Filter items based on GET criteria
-        items = Item.objects.filter(**filters)
+        # User will get only his items, filtered based on GET criteria
+        items = Item.objects.of_author(request.user).filter(
+            created_until_now(), **filters
+        )
+
+        # Full-text search in title and description
+        if data and data["title"]:
+            items = search(items, data["title"])
 
         return items
 
     # Sort queryset based on given parameters
     def sort_queryset(q, data=None):
-        if data:
+        # Relevance is known only when searching
+        if data and (
+            data["sort_criteria"] != "relevance" or "relevance" in q.query.annotations
+        ):
             sort_direction = SORT_DIRECTION_DICT[data["sort_direction"]]
             sort_criteria = data["sort_criteria"]
 
             order = sort_direction + sort_criteria
-            return q.order_by(order)
-
-        return q.order_by(ITEM_DEFAULT_SORTING)
-
-
-class Spell(models.Model):
+            # id breaks ties so every row has a stable position
+            return q.order_by(order, sort_direction + "id")
+
+        return q.order_by(ITEM_DEFAULT_SORTING, "-id")
+
+    # Load only what item_list.html renders, description is cut in database
+    def list_queryset(q):
+        return q.only(
+            "title", "rarity", "value", "date_created", "last_modified"
+        ).annotate(
+            description_preview=models.Case(
+                models.When(
+                    GreaterThan(Length("description"), DESCRIPTION_PREVIEW_LENGTH),
+                    then=Concat(
+                        Substr("description", 1, DESCRIPTION_PREVIEW_LENGTH),
+                        models.Value("…"),
+                    ),
+                ),
+                default="description",
+                output_field=models.TextField(),
+            )
+        )
+
+
+class Spell(LoadedValuesMixin, models.Model):
     UNKNOWN = 0
     ABJURATION = 1
     CONJURATION = 2
@@ -138,6 +270,7 @@ class Spell(models.Model):
         ("title", "Title"),
         ("school", "School"),
         ("level", "Level"),
+        ("relevance", "Relevance"),
     )
 
     SORT_DIRECTION = (
@@ -159,7 +292,23 @@ class Spell(models.Model):
     )
     date_created = models.DateTimeField(default=timezone.now)
     last_modified = models.DateTimeField(auto_now=True)
-    author = models.ForeignKey(User, on_delete=models.CASCADE)
+    # Covered by composite indexes below, which all start with author
+    # No foreign key constraint, author's shard has no users table
+    author = models.ForeignKey(
+        User, on_delete=cascade_from_author, db_index=False, db_constraint=False
+    )
+
+    objects = AuthorQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["author", "date_created"], name="spell_author_created_idx"
+            ),
+            models.Index(fields=["author", "title"], name="spell_author_title_idx"),
+            models.Index(fields=["author", "school"], name="spell_author_school_idx"),
+            models.Index(fields=["author", "level"], name="spell_author_level_idx"),
+        ]
 
     def __str__(self):
         return self.title
@@ -168,32 +317,150 @@ class Spell(models.Model):
         return reverse("library:spell-detail", args=[self.id])
 
     def get_queryset(request, data=None):
-        filters = {
-            "date_created__lte": timezone.now(),
-            "author": request.user,
-        }
+        filters = {}
 
         if data:
             # Also filter by these if present in form
-            if data["title"]:
-                filters.update({"title__icontains": data["title"]})
             if data["school"]:
                 filters.update({"school__in": data["school"]})
             if data["level"]:
                 filters.update({"level__in": data["level"]})
 
         # Filter spells based on data
-        spells = Spell.objects.filter(**filters)
+        spells = Spell.objects.of_author(request.user).filter(
+            created_until_now(), **filters
+        )
+
+        # Full-text search in title and description
+        if data and data["title"]:
+            spells = search(spells, data["title"])
 
         return spells
 
     # Sort queryset based on given parameters
     def sort_queryset(q, data=None):
-        if data:
+        # Relevance is known only when searching
+        if data and (
+            data["sort_criteria"] != "relevance" or "relevance" in q.query.annotations
+        ):
             sort_direction = SORT_DIRECTION_DICT[data["sort_direction"]]
             sort_criteria = data["sort_criteria"]
 
             order = sort_direction + sort_criteria
-            return q.order_by(order)
+            # id breaks ties so every row has a stable position
+            return q.order_by(order, sort_direction + "id")
 
-        return q.order_by(ITEM_DEFAULT_SORTING)
+        return q.order_by(ITEM_DEFAULT_SORTING, "-id")
+
+    # Load only what spell_list.html renders
+    def list_queryset(q):
+        return q.only("title", "school", "level", "date_created", "last_modified")
+
+
+class LibraryStat(models.Model):
+    """
+    Materialized statistics of user's library, one row per counted group,
+    e.g. items of one rarity or spells created in one month. Kept up to
+    date by library.stats, so stats page never aggregates Item or Spell.
+    """
+
+    ITEM_RARITY = "item_rarity"
+    ITEM_MONTH = "item_month"
+    SPELL_SCHOOL = "spell_school"
+    SPELL_LEVEL = "spell_level"
+    SPELL_MONTH = "spell_month"
+
+    KINDS = (
+        (ITEM_RARITY, "Items by rarity"),
+        (ITEM_MONTH, "Items by month created"),
+        (SPELL_SCHOOL, "Spells by school"),
+        (SPELL_LEVEL, "Spells by level"),
+        (SPELL_MONTH, "Spells by month created"),
+    )
+
+    # Covered by the unique constraint below, which starts with author
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="library_stats",
+        db_index=False,
+        db_constraint=False,
+    )
+    kind = models.CharField(max_length=16, choices=KINDS)
+    # Rarity, school, level or month as year * 100 + month
+    key = models.IntegerField()
+    count = models.IntegerField(default=0)
+    # Total value of items in the group
+    value = models.BigIntegerField(default=0)
+
+    objects = AuthorQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["author", "kind", "key"], name="library_stat_unique"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.author_id} {self.kind} {self.key}: {self.count}"
+
+
+class ShardAssignment(models.Model):
+    """
+    Shard with items, spells and stats of the user, see library.sharding.
+    Stored on the primary database only.
+    """
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True)
+    shard = models.CharField(max_length=32)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.shard}"
+
+
+class ItemSearchIndex(models.Model):
+    """
+    FTS5 table mirroring Item title and description, maintained by database
+    triggers. Used through Item.search_index, see library.search.
+    """
+
+    item = models.OneToOneField(
+        Item,
+        primary_key=True,
+        db_column="rowid",
+        db_constraint=False,
+        on_delete=models.DO_NOTHING,
+        related_name="search_index",
+    )
+    document = SearchField(db_column="library_item_fts")
+    title = models.TextField()
+    description = models.TextField(null=True)
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = "library_item_fts"
+
+
+class SpellSearchIndex(models.Model):
+    """
+    FTS5 table mirroring Spell title and description.
+    """
+
+    spell = models.OneToOneField(
+        Spell,
+        primary_key=True,
+        db_column="rowid",
+        db_constraint=False,
+        on_delete=models.DO_NOTHING,
+        related_name="search_index",
+    )
+    document = SearchField(db_column="library_spell_fts")
+    title = models.TextField()
+    description = models.TextField()
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = "library_spell_fts"
@@ -0,0 +1,266 @@
+"""
+Keyset (seek) pagination for library list views.
+
+Instead of ``OFFSET`` and ``COUNT(*)`` the next page is found by seeking past
+the last row of the current one, using the queryset's ordering as the key.
+Querysets passed here must be ordered by ``sort_queryset``, which always ends
+the ordering with ``id`` so every row has a unique position.
+"""
+
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import FieldDoesNotExist
+from django.core.paginator import Paginator
+from django.db.models import Q
+
+from .timing import phase
+
+CURSOR_SALT = "library.pagination.cursor"
+
+
+def encode_cursor(ordering, values, backwards=False):
+    return signing.dumps(
+        {"o": list(ordering), "v": values, "b": backwards},
+        salt=CURSOR_SALT,
+        compress=True,
+    )
+
+
+def decode_cursor(cursor, ordering):
+    """
+    Returns (values, backwards) or None when cursor is missing, tampered
+    with or was created for a different ordering.
+    """
+    if not cursor:
+        return None
+
+    try:
+        data = signing.loads(cursor, salt=CURSOR_SALT)
+    except signing.BadSignature:
+        return None
+
+    if data.get("o") != list(ordering) or len(data.get("v", ())) != len(ordering):
+        return None
+
+    return data["v"], bool(data.get("b"))
+
+
+def split_ordering(ordering):
+    # "-value" -> ("value", True)
+    return [(o.lstrip("-"), o.startswith("-")) for o in ordering]
+
+
+def _model_field(model, name):
+    # None for annotations such as search relevance
+    try:
+        return model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+
+
+def _field_after(model, name, value, descending):
+    """
+    Q matching rows placed strictly after value in given direction. NULL is
+    treated as the lowest value, same as SQLite does when ordering.
+    """
+    field = _model_field(model, name)
+    nullable = field is not None and field.null
+
+    if value is None:
+        if descending:
+            return None
+        return Q(**{f"{name}__isnull": False})
+
+    if descending:
+        q = Q(**{f"{name}__lt": value})
+        if nullable:
+            q |= Q(**{f"{name}__isnull": True})
+        return q
+
+    return Q(**{f"{name}__gt": value})
+
+
+def _field_equal(name, value):
+    if value is None:
+        return Q(**{f"{name}__isnull": True})
+    return Q(**{name: value})
+
+
+def seek_filter(model, fields, values):
+    """
+    Builds lexicographic "row comes after values" condition, e.g. for
+    ordering (value, id): value > v OR (value = v AND id > i).
+    """
+    condition = Q()
+    equal = Q()
+    matched = False
+
+    for (name, descending), value in zip(fields, values):
+        after = _field_after(model, name, value, descending)
+        if after is not None:
+            if matched:
+                condition |= equal & after
+            else:
+                condition = equal & after
+                matched = True
+        equal &= _field_equal(name, value)
+
+    if not matched:
+        # Nothing can come after this row
+        return Q(pk__in=[])
+    return condition
+
+
+class KeysetPage:
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __repr__(self):
+        return f"<KeysetPage of {len(self.object_list)} rows>"
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not self._has_next or not self.object_list:
+            return None
+        return self.paginator.cursor_for(self.object_list[-1])
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous or not self.object_list:
+            return None
+        return self.paginator.cursor_for(self.object_list[0], backwards=True)
+
+
+class KeysetPaginator:
+    """
+    Paginates an ordered queryset without counting it. Cost of fetching a
+    page does not depend on how deep the page is.
+    """
+
+    keyset = True
+
+    def __init__(self, queryset, per_page):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.model = queryset.model
+        self.ordering = list(queryset.query.order_by)
+        self.fields = split_ordering(self.ordering)
+
+        if not self.ordering or self.fields[-1][0] not in ("id", "pk"):
+            raise ValueError("Keyset pagination requires ordering ending with id.")
+
+    def cursor_for(self, obj, backwards=False):
+        values = []
+        for name, _ in self.fields:
+            value = getattr(obj, name)
+            field = _model_field(self.model, name)
+            # Let the model field produce JSON friendly representation
+            if value is not None and field is not None:
+                value = field.value_to_string(obj)
+            values.append(value)
+        return encode_cursor(self.ordering, values, backwards)
+
+    def _to_python(self, values):
+        result = []
+        for (name, _), value in zip(self.fields, values):
+            field = _model_field(self.model, name)
+            if value is not None and field is not None:
+                value = field.to_python(value)
+            result.append(value)
+        return result
+
+    def _page_queryset(self, cursor):
+        """
+        Returns (queryset of up to per_page + 1 rows, backwards, seeking),
+        the extra row tells whether there is another page.
+        """
+        decoded = decode_cursor(cursor, self.ordering)
+
+        if decoded is None:
+            return self.queryset[: self.per_page + 1], False, False
+
+        values, backwards = decoded
+        values = self._to_python(values)
+
+        if backwards:
+            # Walk the reversed ordering and flip the rows back afterwards
+            fields = [(name, not descending) for name, descending in self.fields]
+            ordering = [("" if desc else "-") + name for name, desc in self.fields]
+            queryset = self.queryset.order_by(*ordering)
+        else:
+            fields = self.fields
+            queryset = self.queryset
+
+        queryset = queryset.filter(seek_filter(self.model, fields, values))
+        return queryset[: self.per_page + 1], backwards, True
+
+    def _page(self, rows, backwards, seeking):
+        more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+
+        if not seeking:
+            return KeysetPage(rows, self, more, False)
+        if backwards:
+            rows.reverse()
+            return KeysetPage(rows, self, True, more)
+        return KeysetPage(rows, self, more, True)
+
+    def get_page(self, cursor=None):
+        queryset, backwards, seeking = self._page_queryset(cursor)
+        return self._page(list(queryset), backwards, seeking)
+
+    async def aget_page(self, cursor=None):
+        queryset, backwards, seeking = self._page_queryset(cursor)
+        rows = [row async for row in queryset.aiterator()]
+        return self._page(rows, backwards, seeking)
+
+
+def get_page(request, queryset, per_page):
+    """
+    Returns page of queryset using pagination mode set in
+    settings.LIBRARY_PAGINATION ("offset" or "keyset").
+    """
+    if settings.LIBRARY_PAGINATION == "keyset":
+        paginator = KeysetPaginator(queryset, per_page)
+        return paginator.get_page(request.GET.get("cursor"))
+
+    paginator = Paginator(queryset, per_page)
+    with phase("count"):
+        paginator.count
+    return paginator.get_page(request.GET.get("page"))
+
+
+async def aget_page(request, queryset, per_page):
+    """
+    Async get_page(), for async views.
+    """
+    if settings.LIBRARY_PAGINATION == "keyset":
+        paginator = KeysetPaginator(queryset, per_page)
+        return await paginator.aget_page(request.GET.get("cursor"))
+
+    # Paginator counts and slices synchronously, so count in advance and
+    # load rows of the page before they are iterated in template
+    paginator = Paginator(queryset, per_page)
+    with phase("count"):
+        paginator.count = await queryset.acount()
+    page = paginator.get_page(request.GET.get("page"))
+    page.object_list = [row async for row in page.object_list.aiterator()]
+    return page
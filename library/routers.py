@@ -0,0 +1,156 @@
+"""
+Database routers of sharded library tables and of read replicas.
+
+ShardRouter keeps instances of library models on the shard of their author
+(see library/sharding.py) and everything else on the primary.
+
+ReplicaRouter sends reads of library models to read replicas.
+
+Replicas are listed in settings.LIBRARY_REPLICAS, writes always go to the
+primary ("default"). Reads stay on the primary
+
+- inside transactions on the primary, which must see their own changes,
+- for the rest of a request, or a command, that wrote anything,
+- for settings.LIBRARY_REPLICA_PIN_SECONDS after the user's last change
+  (see ReplicaPinMiddleware), so users always see their own changes even
+  though replicas lag behind. The window has to be longer than the lag.
+
+Time of user's last change is the generation of their list cache.
+"""
+
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+from .cache import get_generation
+from .sharding import (
+    PRIMARY,
+    SHARDED_MODELS,
+    is_sharded,
+    is_sharded_model,
+    shard_for,
+    shards,
+)
+
+ROUTED_APPS = {"library"}
+
+_pinned = ContextVar("library_pinned_to_primary", default=False)
+
+
+def replicas():
+    return getattr(settings, "LIBRARY_REPLICAS", [])
+
+
+def recently_changed(user_id):
+    # Generation is the time of the last change in nanoseconds
+    age = time.time() - get_generation(user_id) / 10**9
+    return age < settings.LIBRARY_REPLICA_PIN_SECONDS
+
+
+def pin_to_primary(pinned=True):
+    """
+    Keeps reads of the current context on primary, returns token for
+    unpin().
+    """
+    return _pinned.set(pinned)
+
+
+def unpin(token):
+    _pinned.reset(token)
+
+
+def is_pinned():
+    return _pinned.get()
+
+
+class ShardRouter:
+    """
+    Querysets are put on their shard by of_author() and of_pk(), this router
+    places instances that are saved, and lets relations cross shards.
+    """
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get("instance")
+        if not is_sharded() or instance is None:
+            return None
+
+        if is_sharded_model(model):
+            if is_sharded_model(instance):
+                return instance._state.db or None
+            # Entries of the user
+            return shard_for(instance.pk)
+        if instance._state.db in shards():
+            # Author of an entry on a shard is on the primary
+            return PRIMARY
+        return None
+
+    def db_for_write(self, model, **hints):
+        if not is_sharded():
+            return None
+
+        if not is_sharded_model(model):
+            return PRIMARY
+        instance = hints.get("instance")
+        if instance is None:
+            return None
+        if not is_sharded_model(instance):
+            # Entry is being given its author
+            return shard_for(instance.pk)
+        if instance._state.db in shards():
+            return instance._state.db
+        if instance.author_id is None:
+            # Validated before author is known
+            return None
+        # New, or loaded from a replica
+        return shard_for(instance.author_id)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {*shards(), *replicas()}
+        if is_sharded() and {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == PRIMARY or db not in shards():
+            return None
+        # Operations without a model, e.g. RunPython, decide for themselves
+        if model_name is None:
+            return app_label == "library"
+        return app_label == "library" and model_name in SHARDED_MODELS
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label not in ROUTED_APPS or not replicas():
+            return None
+
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            # Related objects come from where the instance came from
+            return instance._state.db
+        if _pinned.get() or connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+        return random.choice(replicas())
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label not in ROUTED_APPS or not replicas():
+            return None
+
+        # Whatever comes next in this request must see the change
+        _pinned.set(True)
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY, *replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get schema together with the data from primary
+        if db in replicas():
+            return False
+        return None
@@ -0,0 +1,83 @@
+"""
+Full-text search over titles and descriptions.
+
+On SQLite every Item and Spell is mirrored into an FTS5 table (see migration
+0004_search_index), which database triggers keep in sync on every insert,
+update and delete. Other databases fall back to plain ``icontains`` filter.
+"""
+
+import re
+
+from django.db import connections, models
+from django.db.models import F, Func, Q, Value
+
+# Markers wrapped around matched words in snippets, replaced with <mark> tags
+# by the highlight template filter after the rest of the text is escaped
+HIGHLIGHT_START = "\x02"
+HIGHLIGHT_END = "\x03"
+SNIPPET_WORDS = 16
+
+
+class SearchField(models.TextField):
+    """
+    Hidden FTS5 column named after the table itself, target of MATCH.
+    """
+
+
+@SearchField.register_lookup
+class Match(models.Lookup):
+    lookup_name = "match"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} MATCH {rhs}", lhs_params + rhs_params
+
+
+class Snippet(Func):
+    function = "snippet"
+    output_field = models.TextField()
+
+    def __init__(self, table, column, **extra):
+        super().__init__(
+            table,
+            Value(column),
+            Value(HIGHLIGHT_START),
+            Value(HIGHLIGHT_END),
+            Value("…"),
+            Value(SNIPPET_WORDS),
+            **extra,
+        )
+
+
+def fts_query(text):
+    """
+    Turns user input into FTS5 query where every word is a prefix match,
+    e.g. 'fire sw' -> '"fire"* "sw"*'. Quoting every word keeps FTS5 syntax
+    characters in user input from breaking the query.
+    """
+    words = re.findall(r"\w+", text)
+    return " ".join('"{}"*'.format(word) for word in words)
+
+
+def search(queryset, text):
+    """
+    Filters queryset to entries matching text in title or description and
+    annotates them with relevance (higher is better) and highlighted
+    description_snippet.
+    """
+    query = fts_query(text)
+
+    if connections[queryset.db].vendor != "sqlite" or not query:
+        return queryset.filter(
+            Q(title__icontains=text) | Q(description__icontains=text)
+        ).annotate(
+            relevance=Value(0.0, output_field=models.FloatField()),
+            description_snippet=F("description"),
+        )
+
+    # bm25 rank is lower for better matches
+    return queryset.filter(search_index__document__match=query).annotate(
+        relevance=-F("search_index__rank"),
+        description_snippet=Snippet(F("search_index__document"), 1),
+    )
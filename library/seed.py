@@ -0,0 +1,166 @@
+"""
+Generator of synthetic users, items and spells for benchmarks and load
+testing. Values follow rough distributions of a real tome: most items are
+common and cheap, higher rarities are scarce and expensive, low level spells
+are the most frequent and descriptions range from empty to several
+paragraphs.
+
+Output depends only on the seed, so runs with the same arguments produce
+the same data.
+"""
+
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import bump_generation
+from .models import Item, Spell
+from .stats import record
+
+SEED_BATCH_SIZE = 2000
+SEED_PASSWORD = "seed-password"
+SEED_USERNAME = "seed_user_{}"
+# Entries are spread over this period before now
+SEED_HISTORY = timedelta(days=730)
+
+RARITY_WEIGHTS = {
+    Item.COMMON: 50,
+    Item.UNCOMMON: 25,
+    Item.RARE: 13,
+    Item.VERY_RARE: 7,
+    Item.LEGENDARY: 4,
+    Item.ARTIFACT: 1,
+}
+# Median value in gold pieces of an item of each rarity
+RARITY_VALUE = {
+    Item.COMMON: 10,
+    Item.UNCOMMON: 100,
+    Item.RARE: 1000,
+    Item.VERY_RARE: 5000,
+    Item.LEGENDARY: 25000,
+    Item.ARTIFACT: 100000,
+}
+LEVEL_WEIGHTS = [12, 16, 14, 12, 10, 9, 8, 7, 6, 6]
+
+ADJECTIVES = [
+    "Ancient", "Burning", "Cursed", "Divine", "Elven", "Frozen", "Gilded",
+    "Hollow", "Infernal", "Jade", "Lunar", "Mystic", "Obsidian", "Radiant",
+    "Silent", "Storm", "Twisted", "Vile", "Wild", "Zealous",
+]  # fmt: skip
+ITEM_NOUNS = [
+    "Amulet", "Axe", "Boots", "Bow", "Cloak", "Crown", "Dagger", "Gauntlets",
+    "Helm", "Lantern", "Mace", "Orb", "Potion", "Ring", "Rod", "Scroll",
+    "Shield", "Spear", "Staff", "Sword", "Tome", "Wand",
+]  # fmt: skip
+SPELL_NOUNS = [
+    "Barrier", "Blast", "Bolt", "Call", "Curse", "Gate", "Grasp", "Mark",
+    "Nova", "Orb", "Shroud", "Sight", "Storm", "Touch", "Veil", "Ward",
+    "Wave", "Word",
+]  # fmt: skip
+WORDS = (
+    "the of and a to in is it that for was on are with as by this be at from "
+    "fire frost shadow light blood bone stone iron gold silver dragon giant "
+    "wizard cleric rogue bard druid paladin ranger warlock sorcerer monk "
+    "attack damage saving throw spell slot action bonus reaction creature "
+    "target range radius feet minute hour round concentration ritual curse "
+    "blessing ancient forgotten king queen temple tower dungeon forest sea"
+).split()
+
+
+def description(rng):
+    # Log-normal length, median about 40 words, a few entries much longer,
+    # one in ten without description at all
+    if rng.random() < 0.1:
+        return ""
+    length = min(int(rng.lognormvariate(3.7, 0.9)) + 1, 2000)
+    words = rng.choices(WORDS, k=length)
+    words[0] = words[0].capitalize()
+    return " ".join(words) + "."
+
+
+def created(rng, now):
+    # More entries were created recently
+    age = SEED_HISTORY * (1 - rng.random() ** 0.5)
+    return now - age
+
+
+def generate_item(rng, author, now):
+    rarity = rng.choices(list(RARITY_WEIGHTS), list(RARITY_WEIGHTS.values()))[0]
+    value = int(RARITY_VALUE[rarity] * rng.lognormvariate(0, 0.8))
+    return Item(
+        title=f"{rng.choice(ADJECTIVES)} {rng.choice(ITEM_NOUNS)}",
+        description=description(rng),
+        value=value,
+        rarity=rarity,
+        date_created=created(rng, now),
+        author=author,
+    )
+
+
+def generate_spell(rng, author, now):
+    return Spell(
+        title=f"{rng.choice(ADJECTIVES)} {rng.choice(SPELL_NOUNS)}",
+        description=description(rng),
+        school=rng.randrange(len(Spell.SCHOOLS_OF_MAGIC)),
+        level=rng.choices(range(len(LEVEL_WEIGHTS)), LEVEL_WEIGHTS)[0],
+        date_created=created(rng, now),
+        author=author,
+    )
+
+
+def _insert(model, batch):
+    model.objects.bulk_create(batch)
+    record(model, batch)
+
+
+def _bulk_create(model, objects, batch_size):
+    batch = []
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) >= batch_size:
+            _insert(model, batch)
+            batch = []
+    if batch:
+        _insert(model, batch)
+
+
+def seed(users, items, spells, seed=0, batch_size=SEED_BATCH_SIZE):
+    """
+    Creates users seed_user_0 ... seed_user_{users - 1}, each with items and
+    spells entries, and returns the users. Existing seed users are reused.
+    All users share SEED_PASSWORD.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    # Hashing is slow on purpose, do it once for all users
+    password = make_password(SEED_PASSWORD)
+
+    authors = []
+    with transaction.atomic():
+        for i in range(users):
+            user, _ = User.objects.get_or_create(
+                username=SEED_USERNAME.format(i), defaults={"password": password}
+            )
+            authors.append(user)
+
+        for author in authors:
+            _bulk_create(
+                Item,
+                (generate_item(rng, author, now) for _ in range(items)),
+                batch_size,
+            )
+            _bulk_create(
+                Spell,
+                (generate_spell(rng, author, now) for _ in range(spells)),
+                batch_size,
+            )
+
+    # bulk_create sends no signals
+    for author in authors:
+        bump_generation(author.pk)
+
+    return authors
@@ -0,0 +1,247 @@
+"""
+Horizontal sharding of library tables by author.
+
+Shards are database aliases listed in settings.LIBRARY_SHARDS, the primary
+database is the first one. All items, spells and stats of one user live on
+the same shard, so every query of a user's library runs on one database.
+Users are assigned to shards in ShardAssignment on the primary, new users
+round-robin by id, and move_author() moves them to another shard.
+
+Ids are unique across shards: every shard hands out ids from its own range
+of SHARD_ID_RANGE (see migration 0006), so an id alone tells the shard,
+which detail pages need.
+
+Querysets pick their shard with of_author() and of_pk() of AuthorQuerySet,
+routers only place saved instances (see library/routers.py). Without
+shards everything stays on the primary and queries are unchanged.
+"""
+
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+from django.db.models import Count
+
+PRIMARY = DEFAULT_DB_ALIAS
+# Models stored on shards, everything else is on the primary only
+SHARDED_MODELS = {"item", "spell", "librarystat", "itemsearchindex", "spellsearchindex"}
+# Ids of n-th shard start at n * SHARD_ID_RANGE
+SHARD_ID_RANGE = 10**12
+SHARD_KEY = "library:shard:{user_id}"
+
+
+def shards():
+    return getattr(settings, "LIBRARY_SHARDS", [PRIMARY])
+
+
+def is_sharded():
+    return len(shards()) > 1
+
+
+def is_sharded_model(model):
+    # Model or its instance
+    opts = model._meta
+    return opts.app_label == "library" and opts.model_name in SHARDED_MODELS
+
+
+def shard_for(author_id):
+    """
+    Returns alias of the shard with entries of the author.
+    """
+    if not is_sharded():
+        return PRIMARY
+
+    key = SHARD_KEY.format(user_id=author_id)
+    shard = cache.get(key)
+    if shard is None:
+        shard = _assigned_shard(author_id)
+        cache.set(key, shard, timeout=None)
+    return shard
+
+
+def resolve_shard(user):
+    """
+    Looks up shard of the user once per request, so that of_author(user)
+    runs no query afterwards, which async views must not run.
+    """
+    if user.is_authenticated and is_sharded():
+        user.library_shard = shard_for(user.pk)
+
+
+def _assigned_shard(author_id):
+    from .models import ShardAssignment
+
+    assignments = ShardAssignment.objects.using(PRIMARY)
+    shard = assignments.filter(user_id=author_id).values_list("shard", flat=True)
+    if shard:
+        return shard[0]
+
+    # Stored, so that adding shards later does not move anyone
+    shard = shards()[author_id % len(shards())]
+    try:
+        with transaction.atomic(using=PRIMARY):
+            assignments.create(user_id=author_id, shard=shard)
+    except IntegrityError:
+        # Assigned concurrently
+        return assignments.get(user_id=author_id).shard
+    return shard
+
+
+def shard_for_pk(pk):
+    """
+    Returns alias of the shard that handed out the entry id.
+    """
+    index = int(pk) // SHARD_ID_RANGE
+    if not is_sharded() or not 0 <= index < len(shards()):
+        return PRIMARY
+    return shards()[index]
+
+
+def using_shard(queryset, shard):
+    # Primary is left to routers, so reads can still go to replicas. Works
+    # with managers too.
+    if shard == PRIMARY:
+        return queryset
+    return queryset.using(shard)
+
+
+def each_shard(queryset):
+    """
+    Yields queryset on every shard.
+    """
+    if not is_sharded():
+        yield queryset
+        return
+    for shard in shards():
+        yield queryset.using(shard)
+
+
+def reserve_id_range(connection, tables):
+    """
+    Makes SQLite tables of the shard on connection hand out ids from the
+    shard's range. Ids only ever grow, so it's enough to start them there.
+    """
+    if connection.alias not in shards() or connection.vendor != "sqlite":
+        return
+    start = shards().index(connection.alias) * SHARD_ID_RANGE
+    if not start:
+        return
+
+    with connection.cursor() as cursor:
+        for table in tables:
+            cursor.execute(
+                "UPDATE sqlite_sequence SET seq = max(seq, %s) WHERE name = %s",
+                [start, table],
+            )
+            if not cursor.rowcount:
+                cursor.execute(
+                    "INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)",
+                    [table, start],
+                )
+
+
+def assign(author_id, shard):
+    from .models import ShardAssignment
+
+    ShardAssignment.objects.using(PRIMARY).update_or_create(
+        user_id=author_id, defaults={"shard": shard}
+    )
+    cache.set(SHARD_KEY.format(user_id=author_id), shard, timeout=None)
+
+
+def _copy(model, entries, target):
+    # Search index of the target is filled by its triggers
+    model.objects.using(target).bulk_create(entries)
+    return len(entries)
+
+
+def move_author(author_id, target, batch_size=1000):
+    """
+    Moves items, spells and stats of the author to target shard and assigns
+    the author there. Entries get new ids from the target's range. Returns
+    number of moved entries.
+    """
+    from . import stats
+    from .cache import bump_generation
+    from .models import Item, LibraryStat, Spell
+
+    if target not in shards():
+        raise ValueError(f"Unknown shard {target}")
+    source = shard_for(author_id)
+    if source == target:
+        return 0
+
+    moved = 0
+    with transaction.atomic(using=target):
+        for model in (Item, Spell, LibraryStat):
+            # Left over by an interrupted move, the source has the current ones
+            stale = model.objects.using(target).filter(author_id=author_id)
+            stale._raw_delete(target)
+
+        for model in (Item, Spell):
+            rows = model.objects.using(source).filter(author_id=author_id)
+            batch = []
+            for entry in rows.order_by("pk").iterator(chunk_size=batch_size):
+                entry.pk = None
+                batch.append(entry)
+                if len(batch) >= batch_size:
+                    moved += _copy(model, batch, target)
+                    batch = []
+            if batch:
+                moved += _copy(model, batch, target)
+
+        stats.rebuild([author_id], using=target)
+
+    # Entries are read from the target from now on
+    assign(author_id, target)
+
+    with transaction.atomic(using=source):
+        for model in (Item, Spell, LibraryStat):
+            rows = model.objects.using(source).filter(author_id=author_id)
+            rows._raw_delete(source)
+
+    bump_generation(author_id)
+    return moved
+
+
+def entry_counts():
+    """
+    Returns {shard: {author_id: number of items and spells}}.
+    """
+    from .models import Item, Spell
+
+    counts = defaultdict(Counter)
+    for shard in shards():
+        for model in (Item, Spell):
+            rows = model.objects.using(shard).order_by().values("author_id")
+            for row in rows.annotate(count=Count("pk")):
+                counts[shard][row["author_id"]] += row["count"]
+    return counts
+
+
+def balance_plan(counts):
+    """
+    Returns moves, [(author_id, source, target)], that even out number of
+    entries on shards, given entry_counts(). Moves users from the fullest
+    shard to the emptiest one as long as that narrows the gap.
+    """
+    counts = {shard: Counter(counts.get(shard, {})) for shard in shards()}
+    moves = []
+    while True:
+        loads = {shard: sum(authors.values()) for shard, authors in counts.items()}
+        fullest = max(loads, key=loads.get)
+        emptiest = min(loads, key=loads.get)
+        gap = loads[fullest] - loads[emptiest]
+        # The largest user that fits in half of the gap, so the emptiest
+        # shard does not become the fullest
+        candidates = [
+            (count, author_id)
+            for author_id, count in counts[fullest].items()
+            if 0 < count <= gap / 2
+        ]
+        if not candidates:
+            return moves
+        _, author_id = max(candidates)
+        counts[emptiest][author_id] = counts[fullest].pop(author_id)
+        moves.append((author_id, fullest, emptiest))
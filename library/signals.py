@@ -0,0 +1,77 @@
+from django.contrib.auth.models import User
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import sharding, sqlite, stats, timing
+from .auth import bump_user_version
+from .cache import bump_generation
+from .models import Item, LibraryStat, Spell
+
+
+@receiver(post_save, sender=Item)
+@receiver(post_delete, sender=Item)
+@receiver(post_save, sender=Spell)
+@receiver(post_delete, sender=Spell)
+def invalidate_author_cache(sender, instance, **kwargs):
+    bump_generation(instance.author_id)
+
+
+@receiver(post_save, sender=User)
+def reset_new_user_cache(sender, instance, created, **kwargs):
+    # Pages cached for deleted user with the same id must not be reused
+    if created:
+        bump_generation(instance.pk)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    bump_user_version(instance.pk)
+
+
+@receiver(pre_delete, sender=User)
+def delete_sharded_entries(sender, instance, **kwargs):
+    # Deleting the user cascades on the primary only, no other shard has
+    # foreign keys to users
+    for shard in sharding.shards()[1:]:
+        for model in (Item, Spell, LibraryStat):
+            rows = model.objects.using(shard).filter(author_id=instance.pk)
+            rows._raw_delete(shard)
+
+
+@receiver(pre_save, sender=Item)
+@receiver(pre_save, sender=Spell)
+@receiver(pre_delete, sender=Item)
+@receiver(pre_delete, sender=Spell)
+def remember_stat_values(sender, instance, raw=False, **kwargs):
+    # What the entry counted in before the change, subtracted afterwards
+    if raw or instance._state.adding:
+        return
+    if not getattr(instance, "_deleted_with_author", False):
+        instance._stat_old_values = stats.loaded_values(instance)
+
+
+@receiver(post_save, sender=Item)
+@receiver(post_save, sender=Spell)
+def update_stats_on_save(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        stats.entry_saved(instance, created)
+
+
+@receiver(post_delete, sender=Item)
+@receiver(post_delete, sender=Spell)
+def update_stats_on_delete(sender, instance, **kwargs):
+    stats.entry_deleted(instance)
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor == "sqlite":
+        sqlite.apply_pragmas(connection)
+
+
+@receiver(connection_created)
+def time_queries(sender, connection, **kwargs):
+    if timing.record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(timing.record_query)
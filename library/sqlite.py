@@ -0,0 +1,32 @@
+"""
+Tuning of SQLite connections.
+
+PRAGMAs in settings.LIBRARY_SQLITE_PRAGMAS are set on every new connection
+(see library.signals). Production profile of settings turns on write-ahead
+log, so readers no longer block the writer and commits only append to the
+log, and makes a writer wait for a lock instead of failing right away.
+"""
+
+from django.conf import settings
+
+
+def pragmas():
+    return getattr(settings, "LIBRARY_SQLITE_PRAGMAS", {})
+
+
+def apply_pragmas(connection):
+    # Straight on the driver's connection, so that they don't count as
+    # queries of whatever request opened the connection
+    for name, value in pragmas().items():
+        connection.connection.execute(f"PRAGMA {name} = {value}")
+
+
+def current_pragmas(connection):
+    """
+    Returns {name: value} of configured PRAGMAs as SQLite reports them.
+    """
+    connection.ensure_connection()
+    return {
+        name: connection.connection.execute(f"PRAGMA {name}").fetchone()[0]
+        for name in pragmas()
+    }
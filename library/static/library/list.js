@@ -0,0 +1,113 @@
+// Loads results of item and spell lists in place on filter, sort and page
+// changes, from the fragment endpoint in data-results-url of #results.
+// Address bar follows, so reload, back and forward work as before. Without
+// this script, or when a request fails, forms and links load the whole page.
+(function () {
+  "use strict";
+
+  var results = document.getElementById("results");
+  if (!results || !window.fetch || !window.history.pushState) {
+    return;
+  }
+  var filters = document.getElementById("filter");
+  var messages = document.getElementById("messages");
+  var listPath = window.location.pathname;
+
+  // Links and forms of the page that carry the current query
+  function followQuery(query) {
+    var params = query.replace(/^\?/, "");
+    document.querySelectorAll("[data-export]").forEach(function (link) {
+      var url = link.href.split("?")[0];
+      link.href = url + "?" + params + "&format=" + link.dataset.export;
+    });
+    var bulkQuery = document.querySelector("#bulk-form input[name=query]");
+    if (bulkQuery) {
+      bulkQuery.value = params;
+    }
+  }
+
+  function swap(target, template) {
+    if (target && template) {
+      target.replaceChildren(template.content);
+    }
+  }
+
+  function load(query, withFilters, push) {
+    var headers = {};
+    if (withFilters) {
+      headers["X-Library-Filters"] = "1";
+    }
+    results.setAttribute("aria-busy", "true");
+
+    return fetch(results.dataset.resultsUrl + query, {
+      headers: headers,
+      credentials: "same-origin",
+    })
+      .then(function (response) {
+        // E.g. logged out in the meantime
+        if (!response.ok || response.redirected) {
+          throw new Error(response.status);
+        }
+        return response.text();
+      })
+      .then(function (html) {
+        var fragment = document.createElement("template");
+        fragment.innerHTML = html;
+        var content = fragment.content;
+
+        swap(messages, content.querySelector("template[data-messages]"));
+        swap(filters, content.querySelector("template[data-filters]"));
+        content.querySelectorAll("template").forEach(function (template) {
+          template.remove();
+        });
+        results.replaceChildren(content);
+        results.removeAttribute("aria-busy");
+
+        followQuery(query);
+        if (push) {
+          window.history.pushState({ query: query }, "", listPath + query);
+        }
+      })
+      .catch(function () {
+        window.location.href = listPath + query;
+      });
+  }
+
+  // Filter and sort form, also when it was replaced by a new one
+  document.addEventListener("submit", function (event) {
+    var form = event.target;
+    if (!filters || !filters.contains(form)) {
+      return;
+    }
+    event.preventDefault();
+    var params = new URLSearchParams(new FormData(form));
+    // Views apply filter only when submit button is part of the query
+    params.set("submit", "");
+    load("?" + params.toString(), true, true);
+  });
+
+  // Page links
+  results.addEventListener("click", function (event) {
+    var link = event.target.closest("a");
+    if (
+      !link ||
+      !link.closest(".paginated") ||
+      event.ctrlKey ||
+      event.metaKey ||
+      event.shiftKey
+    ) {
+      return;
+    }
+    var url = new URL(link.href);
+    if (url.pathname !== listPath) {
+      return;
+    }
+    event.preventDefault();
+    load(url.search, false, true);
+    results.scrollIntoView();
+  });
+
+  window.addEventListener("popstate", function () {
+    load(window.location.search, true, false);
+  });
+})();
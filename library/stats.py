@@ -0,0 +1,356 @@
+"""
+Per-user statistics of items and spells, materialized in LibraryStat.
+
+Every saved or deleted entry adds or subtracts its contribution to the
+groups it belongs to (see library.signals), bulk operations record whole
+batches at once. rebuild() recomputes everything from Item and Spell and
+fixes rows that drifted, e.g. after changes made outside of the ORM.
+Stats are stored on the shard of their author, next to the entries.
+"""
+
+from collections import Counter, defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Coalesce, ExtractMonth, ExtractYear
+from django.utils import timezone
+
+from . import sharding
+from .models import Item, LibraryStat, Spell
+
+# Fields that decide which groups an entry counts in
+STAT_FIELDS = {
+    Item: ("rarity", "value", "date_created"),
+    Spell: ("school", "level", "date_created"),
+}
+# Key of items without rarity
+NO_RARITY = 0
+
+
+def month_key(date):
+    date = timezone.localtime(date)
+    return date.year * 100 + date.month
+
+
+def contributions(model, values, month=None):
+    """
+    Returns [(kind, key, value)] of groups an entry with given field values
+    counts in.
+    """
+    if month is None:
+        month = month_key(values["date_created"])
+
+    if model is Item:
+        rarity = values["rarity"] if values["rarity"] is not None else NO_RARITY
+        return [
+            (LibraryStat.ITEM_RARITY, rarity, values["value"] or 0),
+            (LibraryStat.ITEM_MONTH, month, 0),
+        ]
+
+    return [
+        (LibraryStat.SPELL_SCHOOL, values["school"], 0),
+        (LibraryStat.SPELL_LEVEL, values["level"], 0),
+        (LibraryStat.SPELL_MONTH, month, 0),
+    ]
+
+
+def current_values(instance):
+    return {name: getattr(instance, name) for name in STAT_FIELDS[type(instance)]}
+
+
+def loaded_values(instance):
+    """
+    Returns field values of instance as they are stored in database, loading
+    them only when instance was not fully loaded from it.
+    """
+    names = STAT_FIELDS[type(instance)]
+    loaded = getattr(instance, "_loaded_values", {})
+    if not all(name in loaded for name in names):
+        manager = type(instance)._base_manager.db_manager(instance._state.db)
+        loaded = manager.filter(pk=instance.pk).values(*names).get()
+    return {name: loaded[name] for name in names}
+
+
+def remember_values(instance):
+    # Saved values become the loaded ones for the next save
+    instance._loaded_values = {
+        **getattr(instance, "_loaded_values", {}),
+        **current_values(instance),
+    }
+
+
+def add(deltas, model, values, sign, month=None):
+    for kind, key, value in contributions(model, values, month):
+        count_delta, value_delta = deltas[kind, key]
+        deltas[kind, key] = (count_delta + sign, value_delta + sign * value)
+
+
+def add_rows(deltas, model, rows):
+    """
+    add() of many dicts of field values, equal ones are counted together
+    and month of every date is computed once.
+    """
+    names = STAT_FIELDS[model]
+    months = {}
+    for key, count in Counter(tuple(map(row.get, names)) for row in rows).items():
+        values = dict(zip(names, key))
+        date = values["date_created"]
+        if date not in months:
+            months[date] = month_key(date)
+        add(deltas, model, values, count, months[date])
+
+
+def apply(author_id, deltas):
+    """
+    Adds deltas, {(kind, key): (count, value)}, to stats of the author.
+    """
+    for (kind, key), (count, value) in deltas.items():
+        if not count and not value:
+            continue
+
+        rows = LibraryStat.objects.of_author(author_id).filter(kind=kind, key=key)
+        if rows.update(count=F("count") + count, value=F("value") + value):
+            continue
+
+        try:
+            with transaction.atomic(using=sharding.shard_for(author_id)):
+                LibraryStat.objects.create(
+                    author_id=author_id, kind=kind, key=key, count=count, value=value
+                )
+        except IntegrityError:
+            # Created concurrently in the meantime
+            rows.update(count=F("count") + count, value=F("value") + value)
+
+
+def new_deltas():
+    return defaultdict(lambda: (0, 0))
+
+
+def old_values(instance):
+    # Remembered by pre_save or pre_delete signal, unless the entry was
+    # changed before they were connected
+    if hasattr(instance, "_stat_old_values"):
+        return instance._stat_old_values
+    return loaded_values(instance)
+
+
+def entry_saved(instance, created):
+    deltas = new_deltas()
+    if not created:
+        add(deltas, type(instance), old_values(instance), -1)
+    add(deltas, type(instance), current_values(instance), 1)
+    apply(instance.author_id, deltas)
+    remember_values(instance)
+
+
+def entry_deleted(instance):
+    # Stats of deleted author are deleted with it, see
+    # models.cascade_from_author()
+    if getattr(instance, "_deleted_with_author", False):
+        return
+    deltas = new_deltas()
+    add(deltas, type(instance), old_values(instance), -1)
+    apply(instance.author_id, deltas)
+
+
+def record(model, objects, sign=1):
+    """
+    Records entries created (or deleted with sign=-1) in bulk, which sends
+    no signals. Queries once per changed group, not once per entry.
+    """
+    by_author = defaultdict(new_deltas)
+    for obj in objects:
+        add(by_author[obj.author_id], model, current_values(obj), sign)
+
+    for author_id, deltas in by_author.items():
+        apply(author_id, deltas)
+
+
+def _grouped(queryset, kind, key, value=None):
+    rows = queryset.order_by().values("author_id", key).annotate(count=Count("pk"))
+    if value is not None:
+        rows = rows.annotate(total=value)
+    for row in rows:
+        yield (row["author_id"], kind, row[key]), (row["count"], row.get("total", 0))
+
+
+def groups_of(queryset):
+    """
+    Aggregates stats of entries in queryset of Item or Spell, returns
+    {(author_id, kind, key): (count, value)}.
+    """
+    month = ExtractYear("date_created") * 100 + ExtractMonth("date_created")
+    queryset = queryset.annotate(stat_month=month)
+
+    if queryset.model is Item:
+        queryset = queryset.annotate(stat_rarity=Coalesce("rarity", NO_RARITY))
+        groups = (
+            _grouped(
+                queryset,
+                LibraryStat.ITEM_RARITY,
+                "stat_rarity",
+                Coalesce(Sum("value"), 0),
+            ),
+            _grouped(queryset, LibraryStat.ITEM_MONTH, "stat_month"),
+        )
+    else:
+        groups = (
+            _grouped(queryset, LibraryStat.SPELL_SCHOOL, "school"),
+            _grouped(queryset, LibraryStat.SPELL_LEVEL, "level"),
+            _grouped(queryset, LibraryStat.SPELL_MONTH, "stat_month"),
+        )
+
+    result = {}
+    for rows in groups:
+        result.update(rows)
+    return result
+
+
+def _on_shards(queryset, using=None):
+    # Given shard only, or every one of them
+    if using is not None:
+        return [queryset.using(using)]
+    return sharding.each_shard(queryset)
+
+
+def compute(author_ids=None, using=None):
+    """
+    Aggregates stats straight from Item and Spell.
+    """
+    result = {}
+    for model in (Item, Spell):
+        queryset = model.objects.all()
+        if author_ids is not None:
+            queryset = queryset.filter(author_id__in=author_ids)
+        for shard_queryset in _on_shards(queryset, using):
+            result.update(groups_of(shard_queryset))
+    return result
+
+
+def record_change(before, after):
+    """
+    Applies difference of groups_of() of the same entries before and after
+    a set-based UPDATE or DELETE, which sends no signals.
+    """
+    by_author = defaultdict(new_deltas)
+    for author_id, kind, key in before.keys() | after.keys():
+        count_before, value_before = before.get((author_id, kind, key), (0, 0))
+        count_after, value_after = after.get((author_id, kind, key), (0, 0))
+        by_author[author_id][kind, key] = (
+            count_after - count_before,
+            value_after - value_before,
+        )
+
+    for author_id, deltas in by_author.items():
+        apply(author_id, deltas)
+
+
+def stored(author_ids=None, using=None):
+    rows = LibraryStat.objects.filter(count__gt=0)
+    if author_ids is not None:
+        rows = rows.filter(author_id__in=author_ids)
+    return {
+        (author_id, kind, key): (count, value)
+        for shard_rows in _on_shards(rows, using)
+        for author_id, kind, key, count, value in shard_rows.values_list(
+            "author_id", "kind", "key", "count", "value"
+        )
+    }
+
+
+def rebuild(author_ids=None, using=None):
+    """
+    Recomputes stats of given authors, or everyone, and replaces stored
+    ones, on given shard or all of them. Returns number of groups that
+    differed from computed ones.
+    """
+    drift = 0
+    for shard in [using] if using is not None else sharding.shards():
+        drift += _rebuild(author_ids, shard)
+    return drift
+
+
+def _rebuild(author_ids, shard):
+    with transaction.atomic(using=shard):
+        computed = compute(author_ids, using=shard)
+        old = stored(author_ids, using=shard)
+        drift = sum(
+            1
+            for group in computed.keys() | old.keys()
+            if computed.get(group) != old.get(group)
+        )
+
+        rows = LibraryStat.objects.using(shard)
+        if author_ids is not None:
+            rows = rows.filter(author_id__in=author_ids)
+        rows.delete()
+
+        LibraryStat.objects.using(shard).bulk_create(
+            LibraryStat(
+                author_id=author_id, kind=kind, key=key, count=count, value=value
+            )
+            for (author_id, kind, key), (count, value) in computed.items()
+        )
+
+    return drift
+
+
+def user_stats(user):
+    """
+    Returns stats of user for the stats page, loaded with one query.
+    """
+    groups = defaultdict(Counter)
+    values = Counter()
+    for kind, key, count, value in (
+        LibraryStat.objects.of_author(user)
+        .filter(count__gt=0)
+        .values_list("kind", "key", "count", "value")
+    ):
+        groups[kind][key] = count
+        if kind == LibraryStat.ITEM_RARITY:
+            values[key] = value
+
+    rarities = dict(Item.RARITIES)
+    rarities[NO_RARITY] = "None"
+    by_rarity = [
+        {
+            "label": rarities.get(key, key),
+            "count": groups[LibraryStat.ITEM_RARITY][key],
+            "value": values[key],
+        }
+        for key in sorted(groups[LibraryStat.ITEM_RARITY])
+    ]
+
+    growth = []
+    items_total = spells_total = 0
+    item_months = groups[LibraryStat.ITEM_MONTH]
+    spell_months = groups[LibraryStat.SPELL_MONTH]
+    for key in sorted(item_months.keys() | spell_months.keys()):
+        items_total += item_months[key]
+        spells_total += spell_months[key]
+        growth.append(
+            {
+                "month": f"{key // 100}-{key % 100:02}",
+                "items": item_months[key],
+                "spells": spell_months[key],
+                "items_total": items_total,
+                "spells_total": spells_total,
+            }
+        )
+
+    def counted(kind, choices):
+        labels = dict(choices)
+        return [
+            {"label": labels.get(key, key), "count": groups[kind][key]}
+            for key in sorted(groups[kind])
+        ]
+
+    return {
+        "item_count": sum(groups[LibraryStat.ITEM_RARITY].values()),
+        "item_value": sum(values.values()),
+        "spell_count": sum(groups[LibraryStat.SPELL_SCHOOL].values()),
+        "by_rarity": by_rarity,
+        "by_school": counted(LibraryStat.SPELL_SCHOOL, Spell.SCHOOLS_OF_MAGIC),
+        "by_level": counted(LibraryStat.SPELL_LEVEL, Spell.SPELL_LEVELS),
+        "growth": growth,
+    }
@@ -0,0 +1,60 @@
+from django import template
+from django.conf import settings
+from django.templatetags.cache import CacheNode
+from django.utils.html import conditional_escape
+from django.utils.safestring import mark_safe
+
+from library.search import HIGHLIGHT_END, HIGHLIGHT_START
+
+register = template.Library()
+
+
+@register.filter(needs_autoescape=True)
+def highlight(text, autoescape=True):
+    """
+    Escapes search snippet and marks words matched by search.
+    """
+    if text is None:
+        return ""
+    if autoescape:
+        text = conditional_escape(text)
+
+    text = text.replace(HIGHLIGHT_START, "<mark>").replace(HIGHLIGHT_END, "</mark>")
+    return mark_safe(text)
+
+
+@register.simple_tag
+def local_assets():
+    """
+    Whether styles and scripts come from local bundles instead of CDNs, see
+    library.assets.
+    """
+    return settings.LIBRARY_LOCAL_ASSETS
+
+
+class FragmentTimeout:
+    # Stands in for the timeout variable of Django's {% cache %}
+    def resolve(self, context):
+        return settings.LIBRARY_FRAGMENT_CACHE_TIMEOUT
+
+
+@register.tag
+def fragment(parser, token):
+    """
+    Caches the enclosed part of a template, like Django's {% cache %} with
+    settings.LIBRARY_FRAGMENT_CACHE_TIMEOUT:
+
+        {% fragment item_row item.pk item.last_modified %}
+            ...
+        {% endfragment %}
+
+    Fragment is rendered again when any of the values after its name change,
+    so they have to cover everything it shows.
+    """
+    nodelist = parser.parse(("endfragment",))
+    parser.delete_first_token()
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' tag requires a name")
+    vary_on = [parser.compile_filter(bit) for bit in bits[2:]]
+    return CacheNode(nodelist, FragmentTimeout(), bits[1], vary_on, None)
@@ -0,0 +1,16 @@
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+from library import sharding
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Runs tests on the primary database only, with shards from settings
+    (DJANGO_DB_SHARDS) created but left to tests that use them explicitly,
+    see ShardedTest. The rest count queries and ids of one database.
+    """
+
+    def run_suite(self, suite, **kwargs):
+        with override_settings(LIBRARY_SHARDS=[sharding.PRIMARY]):
+            return super().run_suite(suite, **kwargs)
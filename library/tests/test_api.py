@@ -0,0 +1,193 @@
+import json
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from library import api
+from library.models import Item, Spell
+
+
+class ApiTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="testing321")
+        cls.other_user = User.objects.create_user(username="otheruser", password="x")
+
+        cls.spear = Item.objects.create(
+            title="Spear", description="Long", value=10, rarity=1, author=cls.user
+        )
+        cls.axe = Item.objects.create(title="Axe", value=500, rarity=3, author=cls.user)
+        cls.bow = Item.objects.create(title="Bow", author=cls.other_user)
+        cls.slow = Spell.objects.create(
+            title="Slow", school=8, level=3, author=cls.user
+        )
+
+    def setUp(self):
+        self.client.login(username="testuser", password="testing321")
+
+    def get(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual("application/json", response["Content-Type"])
+        return response, json.loads(response.content)
+
+    def send(self, method, url, data):
+        return getattr(self.client, method)(
+            url, json.dumps(data), content_type="application/json"
+        )
+
+
+class ApiListTest(ApiTestCase):
+    url = reverse("library:api-item-list")
+
+    def test_list_contains_only_user_entries(self):
+        response, data = self.get(self.url)
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(["Axe", "Spear"], [item["title"] for item in data["results"]])
+        self.assertEqual(
+            set(api.ITEM_EXPORT_FIELDS), set(data["results"][0]), data["results"][0]
+        )
+
+    def test_filters_and_sorting_are_applied(self):
+        _, data = self.get(
+            self.url,
+            min_value=5,
+            rarity=[1, 3],
+            sort_criteria="value",
+            sort_direction="asc",
+        )
+
+        self.assertEqual(["Spear", "Axe"], [item["title"] for item in data["results"]])
+
+    def test_search(self):
+        _, data = self.get(self.url, title="long", fields="title")
+
+        self.assertEqual([{"id": self.spear.id, "title": "Spear"}], data["results"])
+
+    def test_invalid_filter_is_reported(self):
+        response, data = self.get(self.url, min_value="many", sort_criteria="color")
+
+        self.assertEqual(400, response.status_code)
+        self.assertEqual({"min_value", "sort_criteria"}, set(data["errors"]))
+
+    def test_sparse_fieldset_selects_only_requested_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            _, data = self.get(self.url, fields="title,value")
+
+        self.assertEqual({"id", "title", "value"}, set(data["results"][0]))
+        select = next(q["sql"] for q in queries if 'FROM "library_item"' in q["sql"])
+        self.assertNotIn('"library_item"."description"', select)
+        self.assertNotIn('"library_item"."last_modified"', select)
+
+    def test_unknown_field_is_rejected(self):
+        response, data = self.get(self.url, fields="title,author")
+
+        self.assertEqual(400, response.status_code)
+        self.assertEqual("Unknown fields: author", data["error"])
+
+    def test_cursor_pagination(self):
+        for i in range(5):
+            Item.objects.create(title=f"Item {i}", author=self.user)
+
+        _, first = self.get(self.url, limit=3, fields="title")
+        _, second = self.get(self.url, limit=3, fields="title", cursor=first["next"])
+        _, third = self.get(self.url, limit=3, fields="title", cursor=second["next"])
+        _, back = self.get(self.url, limit=3, fields="title", cursor=second["previous"])
+
+        titles = [
+            item["title"] for page in (first, second, third) for item in page["results"]
+        ]
+        self.assertEqual(7, len(set(titles)))
+        self.assertIsNone(first["previous"])
+        self.assertIsNone(third["next"])
+        self.assertEqual(first["results"], back["results"])
+
+    def test_authentication_required(self):
+        self.client.logout()
+        response, data = self.get(self.url)
+
+        self.assertEqual(401, response.status_code)
+
+    def test_create(self):
+        response = self.send(
+            "post", reverse("library:api-spell-list"), {"title": "Haste", "level": 3}
+        )
+
+        self.assertEqual(201, response.status_code)
+        spell = Spell.objects.get(title="Haste")
+        self.assertEqual(self.user, spell.author)
+        self.assertEqual(spell.id, response.json()["id"])
+
+    def test_create_validates_like_form(self):
+        response = self.send("post", self.url, {"value": 5})
+
+        self.assertEqual(400, response.status_code)
+        self.assertIn("title", response.json()["errors"])
+
+    def test_invalid_json(self):
+        response = self.client.post(self.url, "{", content_type="application/json")
+
+        self.assertEqual(400, response.status_code)
+
+    def test_serialization_without_orjson(self):
+        with mock.patch.object(api, "orjson", None):
+            response, data = self.get(self.url, fields="date_created")
+
+        self.assertEqual(200, response.status_code)
+        self.assertTrue(data["results"][0]["date_created"].endswith("Z"))
+
+
+class ApiDetailTest(ApiTestCase):
+    def url(self, obj):
+        name = (
+            "library:api-spell-detail"
+            if isinstance(obj, Spell)
+            else "library:api-item-detail"
+        )
+        return reverse(name, args=[obj.pk])
+
+    def test_detail(self):
+        response, data = self.get(self.url(self.slow), fields="title,level")
+
+        self.assertEqual({"id": self.slow.id, "title": "Slow", "level": 3}, data)
+
+    def test_other_users_entry_is_not_found(self):
+        response, _ = self.get(self.url(self.bow))
+
+        self.assertEqual(404, response.status_code)
+        response = self.client.delete(self.url(self.bow))
+        self.assertEqual(404, response.status_code)
+        self.assertTrue(Item.objects.filter(pk=self.bow.pk).exists())
+
+    def test_patch_changes_only_given_fields(self):
+        response = self.send("patch", self.url(self.spear), {"value": 99})
+
+        self.assertEqual(200, response.status_code)
+        self.spear.refresh_from_db()
+        self.assertEqual(99, self.spear.value)
+        self.assertEqual("Long", self.spear.description)
+        self.assertEqual(1, self.spear.rarity)
+
+    def test_put_replaces_entry(self):
+        response = self.send("put", self.url(self.spear), {"title": "Pike"})
+
+        self.assertEqual(200, response.status_code)
+        self.spear.refresh_from_db()
+        self.assertEqual("Pike", self.spear.title)
+        self.assertEqual(0, self.spear.value)
+
+    def test_delete(self):
+        response = self.client.delete(self.url(self.axe))
+
+        self.assertEqual(204, response.status_code)
+        self.assertFalse(Item.objects.filter(pk=self.axe.pk).exists())
+
+    def test_method_not_allowed(self):
+        response = self.client.post(self.url(self.axe))
+
+        self.assertEqual(405, response.status_code)
+        self.assertIn("PATCH", response["Allow"])
@@ -0,0 +1,176 @@
+import base64
+import gzip
+import hashlib
+import json
+import tempfile
+from pathlib import Path
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import include, path, re_path, reverse
+
+from library import assets
+
+STORAGE = "library.assets.CompressedManifestStaticFilesStorage"
+
+# URLs of the project as with LIBRARY_SERVE_STATIC on
+urlpatterns = [
+    re_path(r"^static/(?P<path>.*)$", assets.serve),
+    path("", include("RPG_Tome.urls")),
+]
+
+# Stand-ins for vendored files, vendor_assets strips their source maps
+VENDORED = {
+    "library/vendor/bootstrap/bootstrap.min.css": ".btn { color: red; }",
+    "library/vendor/fontawesome/css/all.min.css": (
+        "/* Font Awesome */ @font-face { src: url(../webfonts/fa-solid-900.woff2) }"
+    ),
+    "library/vendor/fontawesome/webfonts/fa-solid-900.woff2": "font",
+    "library/vendor/jquery/jquery.slim.min.js": "var jQuery = 1",
+    "library/vendor/popper/popper.min.js": "var Popper = 2;",
+    "library/vendor/bootstrap/bootstrap.min.js": ("var bootstrap = 3;\n" * 100),
+}
+
+
+class BundleTest(SimpleTestCase):
+    def test_minify_css(self):
+        css = "/* comment */\na ,\nb {\n  color: red;\n  margin: 0 auto;\n}\n"
+
+        self.assertEqual("a,b{color: red;margin: 0 auto}", assets.minify_css(css))
+
+    def test_urls_are_rebased_to_bundle(self):
+        css = (
+            "a { background: url('../img/x.png') } "
+            "b { background: url(data:image/png;base64,AA) } "
+            "i { background: url(https://example.com/y.png) }"
+        )
+
+        rebased = assets.rebase_urls(
+            css, "library/vendor/x/css/all.css", "library/b.css"
+        )
+
+        self.assertIn("url('vendor/x/img/x.png')", rebased)
+        self.assertIn("url(data:image/png;base64,AA)", rebased)
+        self.assertIn("url(https://example.com/y.png)", rebased)
+
+    def test_js_parts_are_separated(self):
+        bundled = assets.bundle(
+            "b.js", ["a.js", "b.js"], {"a.js": "a()", "b.js": "b()"}.get
+        )
+
+        self.assertEqual("a()\n;\nb()\n;", bundled)
+
+    def test_source_maps_are_dropped(self):
+        parts = {
+            "a.css": "a { color: red }\n/*# sourceMappingURL=a.css.map */",
+            "a.js": "a()\n//# sourceMappingURL=a.js.map",
+        }
+
+        self.assertEqual("a{color: red}", assets.bundle("b.css", ["a.css"], parts.get))
+        self.assertEqual("a()\n;", assets.bundle("b.js", ["a.js"], parts.get))
+
+    def test_integrity(self):
+        data = b"alert(1)"
+        digest = base64.b64encode(hashlib.sha384(data).digest()).decode()
+
+        assets.check_integrity(data, f"sha384-{digest}")
+        with self.assertRaises(ValueError):
+            assets.check_integrity(b"alert(2)", f"sha384-{digest}")
+
+    def test_vendored_assets_match_bundles(self):
+        vendored = {f"library/{asset.path}" for asset in assets.VENDOR}
+        parts = {part for parts in assets.BUNDLES.values() for part in parts}
+
+        self.assertEqual({"library/background.css"}, parts - vendored)
+
+
+class CollectStaticTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        directory = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(directory.cleanup)
+        source = Path(directory.name) / "source"
+        for name, content in VENDORED.items():
+            path = source / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(content)
+        cls.root = Path(directory.name) / "root"
+
+        settings = override_settings(
+            STATICFILES_STORAGE=STORAGE,
+            STATICFILES_DIRS=[source],
+            STATIC_ROOT=cls.root,
+            LIBRARY_LOCAL_ASSETS=True,
+            ROOT_URLCONF=__name__,
+        )
+        settings.enable()
+        cls.addClassCleanup(settings.disable)
+        call_command("collectstatic", interactive=False, verbosity=0)
+
+        cls.manifest = json.loads((cls.root / "staticfiles.json").read_text())["paths"]
+
+    def test_bundles_are_hashed_and_compressed(self):
+        css = self.manifest["library/bundle.css"]
+        font = self.manifest["library/vendor/fontawesome/webfonts/fa-solid-900.woff2"]
+
+        content = (self.root / css).read_text()
+        self.assertTrue(content.startswith(".btn{color: red}"))
+        # Font is referenced by its hashed name
+        self.assertIn(f'url("{font.removeprefix("library/")}")', content)
+
+        js = self.root / self.manifest["library/bundle.js"]
+        self.assertEqual(
+            js.read_bytes(), gzip.decompress(Path(f"{js}.gz").read_bytes())
+        )
+
+    def test_small_files_are_not_compressed(self):
+        font = self.manifest["library/vendor/fontawesome/webfonts/fa-solid-900.woff2"]
+
+        self.assertFalse((self.root / f"{font}.gz").exists())
+
+    def test_pages_use_bundles(self):
+        response = self.client.get(reverse("account:login"))
+
+        self.assertContains(response, staticfiles_storage.url("library/bundle.css"))
+        self.assertContains(response, staticfiles_storage.url("library/bundle.js"))
+        self.assertNotContains(response, "cdn.jsdelivr.net")
+
+    def test_hashed_file_is_cached_forever(self):
+        js = self.manifest["library/bundle.js"]
+
+        response = self.client.get(f"/static/{js}", HTTP_ACCEPT_ENCODING="gzip, br")
+
+        self.assertEqual("gzip", response["Content-Encoding"])
+        self.assertIn("text/javascript", response["Content-Type"])
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(
+            (self.root / js).read_bytes(),
+            gzip.decompress(b"".join(response.streaming_content)),
+        )
+
+    def test_plain_file_without_accepted_encoding(self):
+        js = self.manifest["library/bundle.js"]
+
+        response = self.client.get(f"/static/{js}")
+
+        self.assertNotIn("Content-Encoding", response)
+        self.assertEqual(
+            (self.root / js).read_bytes(), b"".join(response.streaming_content)
+        )
+
+    def test_file_without_hash_is_revalidated(self):
+        response = self.client.get("/static/library/bundle.js")
+        self.assertIn("no-cache", response["Cache-Control"])
+
+        response = self.client.get(
+            "/static/library/bundle.js",
+            HTTP_IF_MODIFIED_SINCE=response["Last-Modified"],
+        )
+        self.assertEqual(304, response.status_code)
+
+    def test_files_outside_static_root_are_not_served(self):
+        self.assertEqual(404, self.client.get("/static/../manage.py").status_code)
+        self.assertEqual(404, self.client.get("/static/missing.css").status_code)
@@ -0,0 +1,140 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import AsyncClient, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from library import views
+from library.models import Item, Spell
+from library.pagination import KeysetPaginator, aget_page
+
+
+class AsyncViewTest(TestCase):
+    """
+    Async views requested through ASGI handler, where sync queries would
+    raise SynchronousOnlyOperation.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="testing321")
+        cls.other_user = User.objects.create_user(username="otheruser", password="x")
+
+        for i in range(12):
+            Item.objects.create(
+                title=f"Sword {i}", value=i, rarity=i % 3 + 1, author=cls.user
+            )
+        cls.item = Item.objects.create(title="Bow", rarity=6, author=cls.other_user)
+        cls.spell = Spell.objects.create(
+            title="Slow", school=8, level=3, author=cls.user
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.async_client = AsyncClient()
+        self.async_client.force_login(self.user)
+
+    def test_views_are_async(self):
+        self.assertTrue(asyncio.iscoroutinefunction(views.item_list))
+        self.assertTrue(asyncio.iscoroutinefunction(views.spell_list))
+        self.assertTrue(views.ItemDetailView.view_is_async)
+        self.assertTrue(views.SpellDetailView.view_is_async)
+
+    async def test_item_list(self):
+        response = await self.async_client.get(reverse("library:item-list"))
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual("miss", response["X-Library-Cache"])
+        self.assertContains(response, "Sword 11")
+        self.assertNotContains(response, "Bow")
+        # Facet counts come from async queries too
+        self.assertContains(response, "Common (4)")
+
+        response = await self.async_client.get(reverse("library:item-list"))
+        self.assertEqual("hit", response["X-Library-Cache"])
+
+    async def test_filtered_second_page(self):
+        response = await self.async_client.get(
+            reverse("library:item-list"),
+            {
+                "submit": "",
+                "sort_criteria": "value",
+                "sort_direction": "asc",
+                "page": 2,
+            },
+        )
+
+        self.assertContains(response, "Sword 10")
+        self.assertNotContains(response, "Sword 9<")
+
+    @override_settings(LIBRARY_PAGINATION="keyset")
+    async def test_keyset_pagination(self):
+        response = await self.async_client.get(reverse("library:spell-list"))
+
+        self.assertContains(response, "Slow")
+
+    async def test_detail(self):
+        url = reverse("library:item-detail", args=[self.item.pk])
+
+        response = await self.async_client.get(url)
+
+        self.assertContains(response, "Bow")
+        self.assertIn("ETag", response)
+        self.assertIn("Last-Modified", response)
+
+    async def test_spell_detail(self):
+        response = await self.async_client.get(
+            reverse("library:spell-detail", args=[self.spell.pk])
+        )
+
+        self.assertContains(response, "Slow")
+
+    async def test_missing_entry(self):
+        response = await self.async_client.get(
+            reverse("library:spell-detail", args=[0])
+        )
+
+        self.assertEqual(404, response.status_code)
+
+    async def test_login_required(self):
+        client = AsyncClient()
+
+        for url in (
+            reverse("library:item-list"),
+            reverse("library:item-detail", args=[self.item.pk]),
+        ):
+            response = await client.get(url)
+            self.assertEqual(302, response.status_code)
+            self.assertTrue(response.url.startswith(reverse("account:login")))
+
+
+class AsyncPaginationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="testing321")
+        Item.objects.bulk_create(
+            Item(title=f"Item {i}", value=i % 4, author=cls.user) for i in range(10)
+        )
+
+    async def test_keyset_pages_match_sync_ones(self):
+        paginator = KeysetPaginator(Item.objects.order_by("value", "id"), 3)
+
+        cursor = None
+        while True:
+            page = await paginator.aget_page(cursor)
+            expected = await sync_to_async(lambda: list(paginator.get_page(cursor)))()
+            self.assertEqual(expected, list(page))
+            if not page.has_next():
+                break
+            cursor = page.next_cursor
+
+    async def test_offset_page_is_loaded(self):
+        request = RequestFactory().get("/", {"page": 4})
+
+        page = await aget_page(request, Item.objects.order_by("id"), 3)
+
+        self.assertEqual(4, page.paginator.num_pages)
+        self.assertIsInstance(page.object_list, list)
+        self.assertEqual(["Item 9"], [item.title for item in page])
@@ -0,0 +1,129 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from library.models import Item
+
+
+@override_settings(LIBRARY_AUTH_CACHE=True)
+class CachedUserTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="x")
+        cls.item = Item.objects.create(title="Sword", author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+        self.url = reverse("library:item-detail", args=[self.item.pk])
+
+    def tables(self):
+        """
+        Returns session and user tables queried by a request of the page.
+        """
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url)
+        self.assertEqual(200, response.status_code)
+        sql = " ".join(query["sql"] for query in context.captured_queries)
+        return [table for table in ("django_session", "auth_user") if table in sql]
+
+    def test_user_is_loaded_once(self):
+        self.assertEqual(["django_session", "auth_user"], self.tables())
+
+        self.assertEqual(["django_session"], self.tables())
+        self.assertEqual(["django_session"], self.tables())
+
+    def test_saved_user_is_loaded_again(self):
+        self.tables()
+
+        self.user.first_name = "Test"
+        self.user.save()
+
+        self.assertEqual(["django_session", "auth_user"], self.tables())
+
+    def test_changed_password_logs_out_other_sessions(self):
+        self.tables()
+
+        self.user.set_password("y")
+        self.user.save()
+
+        response = self.client.get(self.url)
+        self.assertRedirects(response, f"{reverse('account:login')}?next={self.url}")
+
+    def test_deactivated_user_is_logged_out(self):
+        self.tables()
+
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.client.get(self.url)
+        self.assertEqual(302, response.status_code)
+
+    def test_logout(self):
+        self.tables()
+
+        self.client.logout()
+
+        response = self.client.get(self.url)
+        self.assertEqual(302, response.status_code)
+
+    def test_user_of_request_is_the_logged_in_one(self):
+        self.tables()
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(self.user, response.wsgi_request.user)
+        self.assertTrue(response.wsgi_request.user.is_authenticated)
+
+    @override_settings(LIBRARY_AUTH_CACHE=False)
+    def test_off(self):
+        self.tables()
+
+        self.assertEqual(["django_session", "auth_user"], self.tables())
+
+    def test_anonymous_session(self):
+        self.client.logout()
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(302, response.status_code)
+        self.assertFalse(response.wsgi_request.user.is_authenticated)
+
+
+@override_settings(LIBRARY_AUTH_CACHE=True)
+class SessionEngineTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="x")
+
+    def setUp(self):
+        cache.clear()
+
+    def assertNoQueriesOfAuth(self):
+        url = reverse("library:item-list")
+        self.client.get(url)
+
+        with self.assertNumQueries(0):
+            # List comes from the cache too
+            response = self.client.get(url)
+
+        self.assertEqual(self.user, response.wsgi_request.user)
+
+    @override_settings(SESSION_ENGINE="django.contrib.sessions.backends.cached_db")
+    def test_cached_db(self):
+        self.client.force_login(self.user)
+
+        self.assertNoQueriesOfAuth()
+
+    @override_settings(SESSION_ENGINE="django.contrib.sessions.backends.signed_cookies")
+    def test_signed_cookies(self):
+        self.client.force_login(self.user)
+
+        self.assertNoQueriesOfAuth()
+
+        self.client.logout()
+        response = self.client.get(reverse("library:item-list"))
+        self.assertEqual(302, response.status_code)
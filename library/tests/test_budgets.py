@@ -0,0 +1,163 @@
+"""
+Query count and latency budgets of every named route in library.urls and
+users.urls, checked against budgets.json on seeded data.
+
+After an intended change of a view regenerate the budget file with
+
+    UPDATE_BUDGETS=1 python manage.py test library.tests.test_budgets
+
+and review the diff. On slow machines time budgets can be scaled, e.g.
+BUDGET_TIME_FACTOR=3.
+"""
+
+import json
+import math
+import os
+import statistics
+import time
+from pathlib import Path
+
+from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, get_resolver, reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from library.models import Item, Spell
+from library.seed import seed
+
+BUDGET_FILE = Path(__file__).with_name("budgets.json")
+NAMESPACES = ("library", "account")
+REPEAT = 3
+# Generated time budgets are this many times the measured time, at least
+# MIN_TIME_BUDGET_MS, so that they only catch real regressions
+TIME_HEADROOM = 5
+MIN_TIME_BUDGET_MS = 50
+# Routes that change state are requested with (method, data, content type),
+# bulk actions on an id nobody has so that the seeded data stays the same
+BULK_REQUEST = {"ids": [0], "action": "delete"}
+REQUESTS = {
+    "account:logout": ("post", {}, None),
+    "library:item-bulk": ("post", BULK_REQUEST, None),
+    "library:spell-bulk": ("post", BULK_REQUEST, None),
+    "library:api-item-bulk": ("post", BULK_REQUEST, "application/json"),
+    "library:api-spell-bulk": ("post", BULK_REQUEST, "application/json"),
+}
+
+
+def named_routes():
+    """
+    Yields (route name, URL pattern) of every named route in NAMESPACES.
+    """
+    for resolver in get_resolver().url_patterns:
+        if not isinstance(resolver, URLResolver):
+            continue
+        if resolver.namespace not in NAMESPACES:
+            continue
+        for pattern in resolver.url_patterns:
+            if pattern.name:
+                yield f"{resolver.namespace}:{pattern.name}", pattern
+
+
+def load_budgets():
+    with open(BUDGET_FILE) as file:
+        return json.load(file)
+
+
+class RouteBudgetTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.other_user = seed(users=2, items=300, spells=300)
+        cls.item = Item.objects.filter(author=cls.user).first()
+        cls.spell = Spell.objects.filter(author=cls.user).first()
+
+    def url_for(self, name, pattern):
+        kwargs = {}
+        for argument in pattern.pattern.converters:
+            if argument == "pk":
+                entry = self.spell if "spell" in name else self.item
+                kwargs["pk"] = entry.pk
+            elif argument == "uidb64":
+                kwargs["uidb64"] = urlsafe_base64_encode(force_bytes(self.user.pk))
+            elif argument == "token":
+                kwargs["token"] = default_token_generator.make_token(self.user)
+            else:
+                raise AssertionError(f"Don't know how to fill {argument} of {name}")
+        return reverse(name, kwargs=kwargs)
+
+    def send(self, name, url):
+        if name not in REQUESTS:
+            return self.client.get(url)
+        method, data, content_type = REQUESTS[name]
+        if content_type is None:
+            return getattr(self.client, method)(url, data)
+        return getattr(self.client, method)(url, data, content_type=content_type)
+
+    def request(self, name, url):
+        self.client.force_login(self.user)
+        # Lists are measured as rendered, not from cache
+        cache.clear()
+
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            response = self.send(name, url)
+            if response.streaming:
+                b"".join(response.streaming_content)
+            elapsed = (time.perf_counter() - start) * 1000
+
+        self.assertLess(response.status_code, 400, name)
+        return len(context.captured_queries), elapsed
+
+    def measure(self):
+        results = {}
+        for name, pattern in named_routes():
+            url = self.url_for(name, pattern)
+            runs = [self.request(name, url) for _ in range(REPEAT)]
+            results[name] = {
+                "queries": max(queries for queries, _ in runs),
+                "ms": statistics.median(elapsed for _, elapsed in runs),
+            }
+        return results
+
+    def test_routes_stay_within_budget(self):
+        results = self.measure()
+
+        if os.environ.get("UPDATE_BUDGETS"):
+            budgets = {
+                name: {
+                    "queries": result["queries"],
+                    "ms": max(
+                        MIN_TIME_BUDGET_MS, math.ceil(result["ms"] * TIME_HEADROOM)
+                    ),
+                }
+                for name, result in sorted(results.items())
+            }
+            with open(BUDGET_FILE, "w") as file:
+                json.dump(budgets, file, indent=2)
+                file.write("\n")
+
+        budgets = load_budgets()
+        factor = float(os.environ.get("BUDGET_TIME_FACTOR", 1))
+
+        for name, result in results.items():
+            with self.subTest(route=name):
+                self.assertIn(name, budgets, "Route has no budget, see module docs")
+                budget = budgets[name]
+                self.assertLessEqual(
+                    result["queries"],
+                    budget["queries"],
+                    f"{name} runs {result['queries']} queries",
+                )
+                self.assertLessEqual(
+                    result["ms"],
+                    budget["ms"] * factor,
+                    f"{name} takes {result['ms']:.1f} ms",
+                )
+
+    def test_budget_file_has_no_stale_routes(self):
+        routes = {name for name, _ in named_routes()}
+
+        self.assertEqual(set(), set(load_budgets()) - routes)
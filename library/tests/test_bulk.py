@@ -0,0 +1,272 @@
+import json
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from library import bulk
+from library.cache import get_generation
+from library.forms import ItemBulkForm, SpellBulkForm
+from library.models import Item, Spell
+from library.search import search
+from library.stats import compute, stored
+
+
+class BulkTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="testing321")
+        cls.other_user = User.objects.create_user(username="otheruser", password="x")
+
+        cls.spear = Item.objects.create(
+            title="Spear", description="Long", value=10, rarity=1, author=cls.user
+        )
+        cls.axe = Item.objects.create(title="Axe", value=155, rarity=3, author=cls.user)
+        cls.rope = Item.objects.create(title="Rope", value=None, author=cls.user)
+        cls.bow = Item.objects.create(title="Bow", value=20, author=cls.other_user)
+        cls.slow = Spell.objects.create(
+            title="Slow", school=8, level=3, author=cls.user
+        )
+        cls.haste = Spell.objects.create(
+            title="Haste", school=8, level=3, author=cls.user
+        )
+        cls.sleep = Spell.objects.create(
+            title="Sleep", school=4, level=1, author=cls.other_user
+        )
+
+    def run_action(self, model, **data):
+        return bulk.run_action(model, self.user, data)
+
+    def assertStatsConsistent(self):
+        self.assertEqual(compute(), stored())
+
+
+class RunActionTest(BulkTestCase):
+    def test_delete_is_single_query_and_limited_to_author(self):
+        ids = [self.spear.pk, self.axe.pk, self.bow.pk]
+
+        with CaptureQueriesContext(connection) as context:
+            count = self.run_action(Item, ids=ids, action=bulk.DELETE)
+
+        self.assertEqual(2, count)
+        self.assertEqual(
+            ["Bow", "Rope"], sorted(Item.objects.values_list("title", flat=True))
+        )
+        deletes = [
+            query["sql"]
+            for query in context.captured_queries
+            if query["sql"].startswith("DELETE")
+        ]
+        self.assertEqual(1, len(deletes), deletes)
+        self.assertStatsConsistent()
+
+    def test_delete_removes_entries_from_search_index(self):
+        self.run_action(Item, ids=[self.spear.pk], action=bulk.DELETE)
+
+        self.assertFalse(search(Item.objects.all(), "spear").exists())
+
+    def test_set_rarity_is_single_update(self):
+        ids = [self.spear.pk, self.rope.pk, self.bow.pk]
+
+        with CaptureQueriesContext(connection) as context:
+            count = self.run_action(Item, ids=ids, action=bulk.SET_RARITY, rarity=5)
+
+        self.assertEqual(2, count)
+        updates = [
+            query["sql"]
+            for query in context.captured_queries
+            if query["sql"].startswith('UPDATE "library_item"')
+        ]
+        self.assertEqual(1, len(updates), updates)
+        self.assertEqual(
+            {"Spear": 5, "Axe": 3, "Rope": 5, "Bow": 1},
+            dict(Item.objects.values_list("title", "rarity")),
+        )
+        self.assertStatsConsistent()
+
+    def test_adjust_value_rounds_and_keeps_empty_values(self):
+        ids = [self.spear.pk, self.axe.pk, self.rope.pk, self.bow.pk]
+
+        count = self.run_action(Item, ids=ids, action=bulk.ADJUST_VALUE, percent=-10)
+
+        self.assertEqual(3, count)
+        self.assertEqual(
+            {"Spear": 9, "Axe": 140, "Rope": None, "Bow": 20},
+            dict(Item.objects.values_list("title", "value")),
+        )
+        self.assertStatsConsistent()
+
+    def test_set_school_and_level(self):
+        ids = [self.slow.pk, self.sleep.pk]
+
+        self.run_action(Spell, ids=ids, action=bulk.SET_SCHOOL, school=2)
+        self.run_action(Spell, ids=ids, action=bulk.SET_LEVEL, level=9)
+
+        self.assertEqual(
+            {"Slow": (2, 9), "Haste": (8, 3), "Sleep": (4, 1)},
+            {
+                title: (school, level)
+                for title, school, level in Spell.objects.values_list(
+                    "title", "school", "level"
+                )
+            },
+        )
+        self.assertStatsConsistent()
+
+    def test_generation_is_bumped_once_per_batch(self):
+        ids = [self.spear.pk, self.axe.pk, self.bow.pk]
+
+        with mock.patch("library.bulk.bump_generation") as bump_generation:
+            self.run_action(Item, ids=ids, action=bulk.DELETE)
+
+        bump_generation.assert_called_once_with(self.user.pk)
+
+    def test_nothing_selected_changes_nothing(self):
+        generation = get_generation(self.user.pk)
+
+        count = self.run_action(Item, ids=[self.bow.pk], action=bulk.DELETE)
+
+        self.assertEqual(0, count)
+        self.assertEqual(generation, get_generation(self.user.pk))
+        self.assertTrue(Item.objects.filter(pk=self.bow.pk).exists())
+
+
+class BulkFormTest(TestCase):
+    def test_action_requires_its_field(self):
+        form = ItemBulkForm({"ids": ["1"], "action": bulk.SET_RARITY})
+
+        self.assertFalse(form.is_valid())
+        self.assertIn("rarity", form.errors)
+
+    def test_delete_needs_no_other_field(self):
+        form = SpellBulkForm({"ids": ["1", "2"], "action": bulk.DELETE})
+
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual([1, 2], form.cleaned_data["ids"])
+
+    def test_ids_are_required_and_numeric(self):
+        self.assertIn("ids", ItemBulkForm({"action": bulk.DELETE}).errors)
+        self.assertIn("ids", ItemBulkForm({"ids": ["x"], "action": bulk.DELETE}).errors)
+
+    def test_percent_cannot_go_below_zero_value(self):
+        form = ItemBulkForm(
+            {"ids": ["1"], "action": bulk.ADJUST_VALUE, "percent": -101}
+        )
+
+        self.assertIn("percent", form.errors)
+
+
+class BulkViewTest(BulkTestCase):
+    url = reverse("library:item-bulk")
+
+    def setUp(self):
+        self.client.login(username="testuser", password="testing321")
+
+    def test_list_has_checkboxes_for_bulk_form(self):
+        response = self.client.get(reverse("library:item-list"))
+
+        self.assertContains(response, 'id="bulk-form"')
+        self.assertContains(
+            response, f'name="ids" value="{self.spear.pk}" form="bulk-form"'
+        )
+
+    def test_action_redirects_back_to_filtered_list(self):
+        response = self.client.post(
+            self.url,
+            {
+                "ids": [self.spear.pk, self.axe.pk],
+                "action": bulk.SET_RARITY,
+                "rarity": 2,
+                "query": "rarity=1&page=2",
+            },
+            follow=True,
+        )
+
+        self.assertRedirects(
+            response, reverse("library:item-list") + "?rarity=1&page=2"
+        )
+        self.assertContains(response, "2 items updated")
+        self.assertEqual(2, Item.objects.filter(rarity=2).count())
+
+    def test_spell_delete(self):
+        response = self.client.post(
+            reverse("library:spell-bulk"),
+            {"ids": [self.slow.pk, self.sleep.pk], "action": bulk.DELETE},
+            follow=True,
+        )
+
+        self.assertRedirects(response, reverse("library:spell-list"))
+        self.assertContains(response, "1 spells deleted")
+        self.assertTrue(Spell.objects.filter(pk=self.sleep.pk).exists())
+
+    def test_invalid_action_changes_nothing(self):
+        response = self.client.post(
+            self.url, {"ids": [self.spear.pk], "action": "melt"}, follow=True
+        )
+
+        self.assertContains(response, "Select items and action to apply")
+        self.assertTrue(Item.objects.filter(pk=self.spear.pk).exists())
+
+    def test_only_post_is_allowed(self):
+        self.assertEqual(405, self.client.get(self.url).status_code)
+
+    def test_login_required(self):
+        self.client.logout()
+
+        response = self.client.post(
+            self.url, {"ids": [self.spear.pk], "action": bulk.DELETE}
+        )
+
+        self.assertEqual(302, response.status_code)
+        self.assertTrue(Item.objects.filter(pk=self.spear.pk).exists())
+
+
+class BulkApiTest(BulkTestCase):
+    url = reverse("library:api-item-bulk")
+
+    def setUp(self):
+        self.client.login(username="testuser", password="testing321")
+
+    def post(self, url, data):
+        response = self.client.post(
+            url, json.dumps(data), content_type="application/json"
+        )
+        return response, json.loads(response.content)
+
+    def test_returns_affected_count(self):
+        response, data = self.post(
+            self.url,
+            {
+                "ids": [self.spear.pk, self.axe.pk, self.bow.pk],
+                "action": bulk.ADJUST_VALUE,
+                "percent": 100,
+            },
+        )
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual({"action": bulk.ADJUST_VALUE, "count": 2}, data)
+        self.assertEqual(20, Item.objects.get(pk=self.spear.pk).value)
+        self.assertEqual(20, Item.objects.get(pk=self.bow.pk).value)
+
+    def test_spells(self):
+        _, data = self.post(
+            reverse("library:api-spell-bulk"),
+            {
+                "ids": [self.slow.pk, self.haste.pk],
+                "action": bulk.SET_LEVEL,
+                "level": 4,
+            },
+        )
+
+        self.assertEqual(2, data["count"])
+        self.assertEqual(2, Spell.objects.filter(level=4).count())
+
+    def test_invalid_request_is_reported(self):
+        response, data = self.post(self.url, {"ids": "all", "action": bulk.DELETE})
+
+        self.assertEqual(400, response.status_code)
+        self.assertIn("ids", data["errors"])
+        self.assertEqual(4, Item.objects.count())
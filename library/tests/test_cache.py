@@ -0,0 +1,210 @@
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.template import Context, Template, TemplateSyntaxError
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from library import cache as list_cache
+from library.models import Item, Spell
+
+
+class ListCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="testing321")
+        cls.other_user = User.objects.create_user(
+            username="otheruser", password="testing123"
+        )
+        cls.item = Item.objects.create(title="Spear", author=cls.user)
+        cls.spell = Spell.objects.create(title="Slow", author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client.login(username="testuser", password="testing321")
+
+    def get(self, url_name="library:item-list", **data):
+        return self.client.get(reverse(url_name), data=data)
+
+    def test_second_request_is_served_from_cache(self):
+        self.assertEqual("miss", self.get()["X-Library-Cache"])
+
+        with self.assertNumQueries(2):
+            # Only session and user are loaded
+            response = self.get()
+
+        self.assertEqual("hit", response["X-Library-Cache"])
+        self.assertContains(response, self.item.title)
+
+    def test_parameter_order_does_not_matter(self):
+        self.get(submit="", rarity=[1, 3], title="sp")
+        response = self.get(title="sp", rarity=[3, 1], submit="")
+
+        self.assertEqual("hit", response["X-Library-Cache"])
+
+    def test_different_page_is_not_cache_hit(self):
+        self.get(page=1)
+
+        self.assertEqual("miss", self.get(page=2)["X-Library-Cache"])
+
+    def test_save_invalidates_user_pages(self):
+        self.get()
+        self.get("library:spell-list")
+        Item.objects.create(title="Lance", author=self.user)
+
+        response = self.get()
+
+        self.assertEqual("miss", response["X-Library-Cache"])
+        self.assertContains(response, "Lance")
+        self.assertEqual("miss", self.get("library:spell-list")["X-Library-Cache"])
+
+    def test_delete_invalidates_user_pages(self):
+        self.get("library:spell-list")
+        self.spell.delete()
+
+        response = self.get("library:spell-list")
+
+        self.assertEqual("miss", response["X-Library-Cache"])
+        self.assertNotContains(response, self.spell.title)
+
+    def test_other_user_changes_keep_cache(self):
+        self.get()
+        Item.objects.create(title="Lance", author=self.other_user)
+
+        self.assertEqual("hit", self.get()["X-Library-Cache"])
+
+    def test_pages_are_not_shared_between_users(self):
+        self.get()
+        self.client.login(username="otheruser", password="testing123")
+
+        response = self.get()
+
+        self.assertEqual("miss", response["X-Library-Cache"])
+        self.assertNotContains(response, self.item.title)
+
+    def test_hits_and_misses_are_counted(self):
+        self.get()
+        self.get()
+        self.get()
+
+        self.assertEqual({"hits": 2, "misses": 1}, list_cache.stats())
+
+    def test_file_based_cache(self):
+        with tempfile.TemporaryDirectory() as location:
+            backend = "django.core.cache.backends.filebased.FileBasedCache"
+            with override_settings(
+                CACHES={"default": {"BACKEND": backend, "LOCATION": location}}
+            ):
+                self.get()
+                self.assertEqual("hit", self.get()["X-Library-Cache"])
+
+                self.item.save()
+                self.assertEqual("miss", self.get()["X-Library-Cache"])
+
+
+class FragmentCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="testing321")
+        cls.item = Item.objects.create(
+            title="Spear", description="Long spear", rarity=1, author=cls.user
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.login(username="testuser", password="testing321")
+
+    def get(self, **data):
+        return self.client.get(reverse("library:item-list"), data=data)
+
+    def row_key(self, item, snippet=""):
+        return make_template_fragment_key(
+            "item_row", [item.pk, item.last_modified, snippet]
+        )
+
+    def test_row_is_kept_while_entry_is_unchanged(self):
+        self.get()
+        cache.set(self.row_key(self.item), "<p>cached row</p>")
+        # New entry renders the page again, but not the row of the old one
+        Item.objects.create(title="Lance", author=self.user)
+
+        response = self.get()
+
+        self.assertEqual("miss", response["X-Library-Cache"])
+        self.assertContains(response, "cached row")
+        self.assertContains(response, "Lance")
+
+    def test_changed_entry_is_rendered_again(self):
+        self.get()
+        self.item.title = "Pike"
+        self.item.save()
+
+        response = self.get()
+
+        self.assertContains(response, "Pike")
+        self.assertNotContains(response, "Spear")
+
+    def test_search_snippet_is_part_of_row_key(self):
+        self.get()
+
+        response = self.get(submit="", title="spear")
+
+        self.assertContains(response, "<mark>spear</mark>")
+
+    def test_filter_panel_shows_current_counts(self):
+        self.assertContains(self.get(), "Common (1)")
+        Item.objects.create(title="Lance", rarity=1, author=self.user)
+
+        self.assertContains(self.get(), "Common (2)")
+
+    def test_filter_panel_keeps_parameters(self):
+        self.get(submit="", title="spe")
+
+        response = self.get(submit="", title="lan")
+
+        self.assertContains(response, 'value="lan"')
+        self.assertNotContains(response, 'value="spe"')
+
+    def test_filter_state_ignores_order(self):
+        request = RequestFactory().get("/", {"rarity": [1, 3], "title": "sp"})
+        reordered = RequestFactory().get("/", {"title": "sp", "rarity": [3, 1]})
+        counts = {"rarity": {1: 2, 3: 0}}
+
+        self.assertEqual(
+            list_cache.filter_state(request, counts),
+            list_cache.filter_state(reordered, {"rarity": {3: 0, 1: 2}}),
+        )
+        self.assertNotEqual(
+            list_cache.filter_state(request, counts),
+            list_cache.filter_state(request, {"rarity": {1: 3, 3: 0}}),
+        )
+
+
+class FragmentTagTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def render(self, source, **context):
+        template = Template("{% load library_tags %}" + source)
+        return template.render(Context(context))
+
+    def test_fragment_is_cached_per_key(self):
+        source = "{% fragment row key %}{{ value }}{% endfragment %}"
+
+        self.assertEqual("a", self.render(source, key=1, value="a"))
+        self.assertEqual("a", self.render(source, key=1, value="b"))
+        self.assertEqual("c", self.render(source, key=2, value="c"))
+
+    @override_settings(LIBRARY_FRAGMENT_CACHE_TIMEOUT=0)
+    def test_zero_timeout_does_not_keep_fragments(self):
+        source = "{% fragment row %}{{ value }}{% endfragment %}"
+
+        self.render(source, value="a")
+
+        self.assertEqual("b", self.render(source, value="b"))
+
+    def test_name_is_required(self):
+        with self.assertRaises(TemplateSyntaxError):
+            Template("{% load library_tags %}{% fragment %}{% endfragment %}")
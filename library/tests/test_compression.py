@@ -0,0 +1,179 @@
+import gzip
+import unittest
+
+from django.contrib.auth.models import User
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from library import compression
+from library.models import Item
+
+PAGE = "<p>" + "Long sword of the north. " * 100 + "</p>"
+
+
+class EncodingTest(SimpleTestCase):
+    def test_qualities(self):
+        self.assertEqual(
+            {"gzip": 1.0, "br": 0.5, "identity": 0.0},
+            compression.accepted_encodings("gzip, br;q=0.5, identity;q=0"),
+        )
+
+    def test_choice(self):
+        self.assertEqual("gzip", compression.choose_encoding("gzip, deflate"))
+        self.assertEqual("gzip", compression.choose_encoding("*"))
+        self.assertIsNone(compression.choose_encoding("gzip;q=0, deflate"))
+        self.assertIsNone(compression.choose_encoding(""))
+
+    @unittest.skipIf(compression.brotli is None, "brotli is not installed")
+    def test_brotli_is_preferred(self):
+        self.assertEqual("br", compression.choose_encoding("gzip, deflate, br"))
+        self.assertEqual("gzip", compression.choose_encoding("gzip, br;q=0"))
+
+
+class MinifyTest(SimpleTestCase):
+    def test_whitespace_and_comments(self):
+        html = "<div>\n  <!-- rows -->\n  <p>A  \n  B</p>\n</div>\n"
+
+        self.assertEqual("<div> <p>A B</p> </div>", compression.minify_html(html))
+
+    def test_kept_blocks(self):
+        html = (
+            "<pre>a\n  b</pre>  <textarea>x\n\ny</textarea>\n"
+            "<script>\n// <!-- not a comment -->\nrun();\n</script>"
+        )
+
+        self.assertEqual(
+            "<pre>a\n  b</pre> <textarea>x\n\ny</textarea> "
+            "<script>\n// <!-- not a comment -->\nrun();\n</script>",
+            compression.minify_html(html),
+        )
+
+
+class CompressResponseTest(SimpleTestCase):
+    def compress(self, response, accept="gzip"):
+        request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING=accept)
+        return compression.compress_response(request, response)
+
+    def test_gzip(self):
+        response = self.compress(HttpResponse(PAGE))
+
+        self.assertEqual("gzip", response["Content-Encoding"])
+        self.assertEqual(PAGE, gzip.decompress(response.content).decode())
+        self.assertEqual(str(len(response.content)), response["Content-Length"])
+        self.assertEqual("Accept-Encoding", response["Vary"])
+
+    def test_length_is_padded(self):
+        lengths = {len(self.compress(HttpResponse(PAGE)).content) for _ in range(20)}
+
+        self.assertGreater(len(lengths), 1)
+
+    def test_small_body_stays(self):
+        response = self.compress(HttpResponse("<p>Sword</p>"))
+
+        self.assertNotIn("Content-Encoding", response)
+        self.assertEqual(b"<p>Sword</p>", response.content)
+
+    def test_other_types_stay(self):
+        response = self.compress(HttpResponse(PAGE, content_type="image/png"))
+
+        self.assertNotIn("Content-Encoding", response)
+        self.assertNotIn("Vary", response)
+
+    def test_already_encoded_stays(self):
+        response = HttpResponse(PAGE)
+        response["Content-Encoding"] = "br"
+
+        self.assertEqual(PAGE.encode(), self.compress(response).content)
+
+    def test_client_without_compression(self):
+        response = self.compress(HttpResponse(PAGE), accept="identity")
+
+        self.assertNotIn("Content-Encoding", response)
+        self.assertEqual("Accept-Encoding", response["Vary"])
+
+    def test_etag_becomes_weak(self):
+        response = HttpResponse(PAGE)
+        response["ETag"] = '"items-1"'
+
+        self.assertEqual('W/"items-1"', self.compress(response)["ETag"])
+
+    def test_streaming(self):
+        chunks = [f"{i},Sword {i}\n".encode() for i in range(200)]
+        response = StreamingHttpResponse(iter(chunks), content_type="text/csv")
+
+        response = self.compress(response)
+        compressed = list(response.streaming_content)
+
+        self.assertEqual("gzip", response["Content-Encoding"])
+        # Every chunk is sent as soon as it is compressed
+        self.assertGreater(len(compressed), len(chunks))
+        self.assertEqual(b"".join(chunks), gzip.decompress(b"".join(compressed)))
+
+
+class MiddlewareTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="x")
+        for i in range(20):
+            Item.objects.create(title=f"Sword {i}", author=cls.user)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_list_page_is_compressed(self):
+        plain = self.client.get(reverse("library:item-list"))
+        response = self.client.get(
+            reverse("library:item-list"), HTTP_ACCEPT_ENCODING="gzip"
+        )
+
+        self.assertEqual("gzip", response["Content-Encoding"])
+        self.assertLess(len(response.content), len(plain.content) / 3)
+        self.assertIn("Sword 19", gzip.decompress(response.content).decode())
+
+    def test_weak_etag_still_matches(self):
+        url = reverse("library:item-list")
+        etag = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip")["ETag"]
+
+        response = self.client.get(
+            url, HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=etag
+        )
+
+        self.assertEqual(304, response.status_code)
+
+    def test_export_streams_compressed(self):
+        response = self.client.get(
+            reverse("library:item-export"),
+            {"format": "csv"},
+            HTTP_ACCEPT_ENCODING="gzip",
+        )
+
+        content = gzip.decompress(b"".join(response.streaming_content)).decode()
+        self.assertIn("Sword 19", content)
+
+    async def test_async_client(self):
+        response = await self.async_client.get(
+            reverse("account:login"), ACCEPT_ENCODING="gzip"
+        )
+
+        self.assertEqual("gzip", response["Content-Encoding"])
+
+    @override_settings(LIBRARY_MINIFY_HTML=True)
+    def test_minified_page(self):
+        plain = self.client.get(reverse("library:item-list"))
+
+        with self.settings(LIBRARY_MINIFY_HTML=False):
+            verbose = self.client.get(reverse("library:item-list"))
+
+        self.assertNotIn(b"\n  ", plain.content)
+        self.assertNotIn(b"<!--", plain.content)
+        self.assertLess(len(plain.content), len(verbose.content))
+        self.assertContains(plain, "Sword 19")
+
+    @override_settings(LIBRARY_COMPRESSION=False)
+    def test_off(self):
+        response = self.client.get(
+            reverse("library:item-list"), HTTP_ACCEPT_ENCODING="gzip"
+        )
+
+        self.assertNotIn("Content-Encoding", response)
@@ -0,0 +1,139 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils.http import http_date
+
+from library.models import Item, Spell
+
+
+class ConditionalDetailTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="testing321")
+        cls.other_user = User.objects.create_user(
+            username="otheruser", password="testing123"
+        )
+
+    def setUp(self):
+        self.client.login(username="testuser", password="testing321")
+        self.item = Item.objects.create(title="Spear", author=self.user)
+        self.spell = Spell.objects.create(title="Slow", author=self.user)
+        self.item_url = reverse("library:item-detail", args=[self.item.id])
+        self.spell_url = reverse("library:spell-detail", args=[self.spell.id])
+
+    def test_detail_has_validators(self):
+        for url in (self.item_url, self.spell_url):
+            response = self.client.get(url)
+
+            self.assertEqual(200, response.status_code)
+            self.assertTrue(response.has_header("ETag"))
+            self.assertTrue(response.has_header("Last-Modified"))
+            self.assertIn("private", response["Cache-Control"])
+
+    def test_matching_etag_is_not_modified(self):
+        for url in (self.item_url, self.spell_url):
+            etag = self.client.get(url)["ETag"]
+
+            # Session, user and the entry itself
+            with self.assertNumQueries(3):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+            self.assertEqual(304, response.status_code)
+            self.assertEqual(b"", response.content)
+            self.assertTemplateNotUsed(response, "library/item_detail.html")
+
+    def test_if_modified_since_is_not_modified(self):
+        since = http_date((self.item.last_modified + timedelta(seconds=1)).timestamp())
+
+        response = self.client.get(self.item_url, HTTP_IF_MODIFIED_SINCE=since)
+
+        self.assertEqual(304, response.status_code)
+
+    def test_changed_entry_is_sent_again(self):
+        etag = self.client.get(self.item_url)["ETag"]
+        self.item.title = "Lance"
+        self.item.save()
+
+        response = self.client.get(self.item_url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(200, response.status_code)
+        self.assertContains(response, "Lance")
+
+    def test_etag_differs_per_user(self):
+        etag = self.client.get(self.item_url)["ETag"]
+        self.client.login(username="otheruser", password="testing123")
+
+        response = self.client.get(self.item_url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(200, response.status_code)
+
+
+class ConditionalListTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="testing321")
+        Item.objects.create(title="Spear", author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client.login(username="testuser", password="testing321")
+        self.url = reverse("library:item-list")
+
+    def test_matching_etag_is_not_modified_without_queries(self):
+        for url_name in ("library:item-list", "library:spell-list"):
+            etag = self.client.get(reverse(url_name))["ETag"]
+
+            # Only session and user are loaded
+            with self.assertNumQueries(2):
+                response = self.client.get(reverse(url_name), HTTP_IF_NONE_MATCH=etag)
+
+            self.assertEqual(304, response.status_code)
+
+    def test_new_session_changes_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+        self.client.logout()
+        self.client.login(username="testuser", password="testing321")
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(200, response.status_code)
+        self.assertNotEqual(etag, response["ETag"])
+
+    def test_etag_depends_on_parameters(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        response = self.client.get(self.url, data={"page": 2}, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(200, response.status_code)
+
+    def test_new_entry_changes_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+        Item.objects.create(title="Lance", author=self.user)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(200, response.status_code)
+        self.assertContains(response, "Lance")
+
+    def test_deleted_entry_changes_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+        Item.objects.get(title="Spear").delete()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(200, response.status_code)
+
+    def test_pending_messages_are_rendered(self):
+        etag = self.client.get(self.url)["ETag"]
+        # Creating item leaves success message for the list page
+        self.client.post(reverse("library:item-create"), data={"title": "Lance"})
+        etag = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)["ETag"]
+        self.client.post(reverse("library:item-create"), data={"title": ""})
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(200, response.status_code)
+        self.assertContains(response, "Item is not valid")
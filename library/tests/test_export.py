@@ -0,0 +1,82 @@
+import csv
+import io
+import json
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from library.models import Item, Spell
+
+
+class ExportViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="testing321")
+        other_user = User.objects.create_user(username="otheruser", password="x")
+
+        Item.objects.create(
+            title="Spear", description='Long, "pointy"', value=10, author=cls.user
+        )
+        Item.objects.create(title="Axe", value=500, rarity=3, author=cls.user)
+        Item.objects.create(title="Bow", author=other_user)
+        Spell.objects.create(title="Slow", school=6, level=3, author=cls.user)
+
+    def setUp(self):
+        self.client.login(username="testuser", password="testing321")
+
+    def export(self, url_name, **data):
+        response = self.client.get(reverse(url_name), data=data)
+        self.assertEqual(200, response.status_code)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_csv_export_contains_only_user_items(self):
+        content = self.export("library:item-export", format="csv")
+        rows = list(csv.DictReader(io.StringIO(content)))
+
+        self.assertEqual({"Spear", "Axe"}, {row["title"] for row in rows})
+        spear = next(row for row in rows if row["title"] == "Spear")
+        self.assertEqual('Long, "pointy"', spear["description"])
+        self.assertEqual("10", spear["value"])
+
+    def test_jsonl_export(self):
+        content = self.export("library:spell-export", format="jsonl")
+        rows = [json.loads(line) for line in content.splitlines()]
+
+        self.assertEqual(1, len(rows))
+        self.assertEqual("Slow", rows[0]["title"])
+        self.assertEqual(6, rows[0]["school"])
+        self.assertEqual(3, rows[0]["level"])
+
+    def test_export_uses_list_filter_and_sort(self):
+        content = self.export(
+            "library:item-export",
+            format="jsonl",
+            submit="",
+            min_value=5,
+            sort_criteria="value",
+            sort_direction="desc",
+        )
+        titles = [json.loads(line)["title"] for line in content.splitlines()]
+
+        self.assertEqual(["Axe", "Spear"], titles)
+
+    def test_export_is_attachment(self):
+        response = self.client.get(reverse("library:item-export"), {"format": "jsonl"})
+
+        self.assertEqual(
+            'attachment; filename="items.jsonl"', response["Content-Disposition"]
+        )
+
+    def test_unknown_format_falls_back_to_csv(self):
+        response = self.client.get(reverse("library:item-export"), {"format": "xml"})
+
+        self.assertTrue(response["Content-Type"].startswith("text/csv"))
+
+    def test_anonymous_user_can_not_export(self):
+        self.client.logout()
+
+        response = self.client.get(reverse("library:item-export"))
+
+        self.assertEqual(302, response.status_code)
@@ -0,0 +1,76 @@
+from types import SimpleNamespace
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from library.facets import ITEM_FACETS, SPELL_FACETS, facet_counts
+from library.forms import ItemFilterForm, SpellFilterForm
+from library.models import Item, Spell
+
+
+class FacetCountsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="testing321")
+        other_user = User.objects.create_user(username="otheruser", password="x")
+
+        Item.objects.create(title="Fire sword", value=10, rarity=3, author=cls.user)
+        Item.objects.create(title="Ice sword", value=500, rarity=3, author=cls.user)
+        Item.objects.create(title="Fire ring", value=700, rarity=5, author=cls.user)
+        Item.objects.create(title="Fire axe", value=10, rarity=3, author=other_user)
+        Spell.objects.create(title="Fireball", school=5, level=3, author=cls.user)
+        Spell.objects.create(title="Shield", school=1, level=1, author=cls.user)
+        Spell.objects.create(title="Fire bolt", school=5, level=0, author=cls.user)
+
+        cls.request = SimpleNamespace(user=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client.login(username="testuser", password="testing321")
+
+    def item_counts(self, **data):
+        form = ItemFilterForm(data) if data else ItemFilterForm()
+        return facet_counts(self.request, Item, form, ITEM_FACETS)
+
+    def test_counts_are_scoped_to_user(self):
+        self.assertEqual({"rarity": {3: 2, 5: 1}}, self.item_counts())
+
+    def test_counts_reflect_other_filters_but_not_own(self):
+        counts = self.item_counts(min_value=100, rarity=[5])
+
+        self.assertEqual({"rarity": {3: 1, 5: 1}}, counts)
+
+    def test_counts_reflect_search(self):
+        self.assertEqual({"rarity": {3: 1, 5: 1}}, self.item_counts(title="fire"))
+
+    def test_one_grouped_query_per_facet(self):
+        form = SpellFilterForm({"title": "fire", "school": [5], "level": [0]})
+
+        with self.assertNumQueries(len(SPELL_FACETS)):
+            counts = facet_counts(self.request, Spell, form, SPELL_FACETS)
+
+        # School counts ignore school filter, level counts ignore level filter
+        self.assertEqual({5: 1}, counts["school"])
+        self.assertEqual({0: 1, 3: 1}, counts["level"])
+
+    def test_counts_are_shown_in_labels(self):
+        response = self.client.get(reverse("library:item-list"))
+
+        self.assertContains(response, "Rare (2)")
+        self.assertContains(response, "Legendary (1)")
+        self.assertContains(response, "Common (0)")
+
+    def test_counts_are_cached_until_entries_change(self):
+        url = reverse("library:spell-list")
+        self.client.get(url)
+
+        with self.assertNumQueries(2):
+            # Only session and user are loaded
+            response = self.client.get(url)
+        self.assertContains(response, "Evocation (2)")
+
+        Spell.objects.create(title="Burn", school=5, author=self.user)
+
+        self.assertContains(self.client.get(url), "Evocation (3)")
@@ -0,0 +1,210 @@
+import io
+import json
+import os
+import tempfile
+from datetime import datetime
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from library import importer
+from library.cache import get_generation
+from library.importer import ITEM_VALIDATOR, SPELL_VALIDATOR, import_file
+from library.models import Item, Spell
+
+ITEMS_CSV = """title,description,value,rarity
+Sword,Sharp,100,2
+Shield,,,
+,No title,5,1
+Spear,Pointy,-5,9
+"""
+
+
+class RowValidatorTest(TestCase):
+    def test_valid_row_is_converted(self):
+        data, errors = ITEM_VALIDATOR.clean(
+            {"title": " Sword ", "description": "Sharp", "value": "100", "rarity": "2"}
+        )
+
+        self.assertEqual({}, errors)
+        self.assertEqual("Sword", data["title"])
+        self.assertEqual(100, data["value"])
+        self.assertEqual(2, data["rarity"])
+
+    def test_empty_optional_fields_get_model_defaults(self):
+        data, errors = SPELL_VALIDATOR.clean({"title": "Slow"})
+
+        self.assertEqual({}, errors)
+        self.assertEqual("", data["description"])
+        self.assertEqual(0, data["level"])
+        self.assertIsNotNone(data["date_created"])
+
+    def test_form_and_model_rules_are_applied(self):
+        _, errors = ITEM_VALIDATOR.clean(
+            {"title": "x" * 101, "value": "-1", "rarity": "9"}
+        )
+
+        self.assertEqual({"title", "value", "rarity"}, set(errors))
+
+    def test_missing_title_is_required(self):
+        _, errors = ITEM_VALIDATOR.clean({"title": "", "value": "1"})
+
+        self.assertEqual({"title": ["This field is required."]}, errors)
+
+    def test_naive_date_created_is_made_aware(self):
+        data, errors = ITEM_VALIDATOR.clean(
+            {"title": "Old", "date_created": "2020-01-02 03:04:05"}
+        )
+
+        self.assertEqual({}, errors)
+        self.assertTrue(timezone.is_aware(data["date_created"]))
+        self.assertEqual(2020, data["date_created"].year)
+
+
+class ImportFileTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="x")
+
+    def test_csv_import_reports_invalid_rows_by_line(self):
+        result = import_file(Item, io.BytesIO(ITEMS_CSV.encode()), "csv", self.user)
+
+        self.assertEqual(4, result.rows)
+        self.assertEqual(2, result.created)
+        self.assertEqual([4, 5], [error.line for error in result.errors])
+        self.assertIn("title", result.errors[0].errors)
+        self.assertEqual({"value", "rarity"}, set(result.errors[1].errors))
+
+        shield = Item.objects.get(title="Shield")
+        self.assertEqual(self.user, shield.author)
+        self.assertEqual(0, shield.value)
+        self.assertEqual(Item.COMMON, shield.rarity)
+
+    def test_jsonl_import(self):
+        lines = [
+            json.dumps({"title": "Slow", "school": 6, "level": 3}),
+            "",
+            "not json",
+            json.dumps(["list"]),
+            json.dumps({"title": "Haste", "date_created": "2021-05-01T10:00:00Z"}),
+        ]
+        data = "\n".join(lines).encode()
+
+        result = import_file(Spell, io.BytesIO(data), "jsonl", self.user)
+
+        self.assertEqual(2, result.created)
+        self.assertEqual([3, 4], [error.line for error in result.errors])
+        self.assertEqual(
+            datetime(2021, 5, 1, 10, tzinfo=timezone.utc),
+            Spell.objects.get(title="Haste").date_created,
+        )
+
+    def test_rows_are_inserted_in_batches(self):
+        rows = "title\n" + "".join(f"Item {i}\n" for i in range(5))
+
+        with mock.patch("library.importer._insert", wraps=importer._insert) as insert:
+            result = import_file(
+                Item, io.BytesIO(rows.encode()), "csv", self.user, batch_size=2
+            )
+
+        self.assertEqual(5, result.created)
+        self.assertEqual([2, 2, 1], [len(c.args[1]) for c in insert.mock_calls])
+
+    def test_import_bumps_generation_once(self):
+        generation = get_generation(self.user.pk)
+
+        import_file(Item, io.BytesIO(ITEMS_CSV.encode()), "csv", self.user)
+
+        self.assertGreater(get_generation(self.user.pk), generation)
+
+    def test_imported_entries_are_searchable(self):
+        import_file(Item, io.BytesIO(ITEMS_CSV.encode()), "csv", self.user)
+
+        self.assertEqual(
+            ["Sword"],
+            [
+                item.title
+                for item in Item.objects.filter(search_index__document__match="sharp")
+            ],
+        )
+
+
+class ImportCommandTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="x")
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "items.csv")
+        self.report = os.path.join(directory.name, "errors.jsonl")
+        with open(self.path, "w") as file:
+            file.write(ITEMS_CSV)
+
+    def test_command_imports_file_and_writes_report(self):
+        out = io.StringIO()
+        call_command(
+            "import_tome",
+            self.path,
+            user="testuser",
+            batch_size=1,
+            report=self.report,
+            stdout=out,
+            stderr=io.StringIO(),
+        )
+
+        self.assertIn("Imported 2 of 4 items, 2 rows with errors", out.getvalue())
+        self.assertEqual(2, Item.objects.filter(author=self.user).count())
+        with open(self.report) as report:
+            self.assertEqual([4, 5], [json.loads(line)["line"] for line in report])
+
+    def test_command_requires_existing_user(self):
+        with self.assertRaises(CommandError):
+            call_command("import_tome", self.path, user="nobody")
+
+
+class ImportViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="testing321")
+
+    def setUp(self):
+        self.client.login(username="testuser", password="testing321")
+
+    def upload(self, url_name, name, content):
+        file = SimpleUploadedFile(name, content.encode())
+        return self.client.post(reverse(url_name), {"file": file})
+
+    def test_import_page_is_shown(self):
+        response = self.client.get(reverse("library:item-import"))
+
+        self.assertEqual(200, response.status_code)
+        self.assertTemplateUsed(response, "library/import.html")
+
+    def test_valid_upload_redirects_to_list(self):
+        response = self.upload(
+            "library:spell-import", "spells.jsonl", '{"title": "Slow", "level": 3}\n'
+        )
+
+        self.assertRedirects(response, reverse("library:spell-list"))
+        self.assertEqual(3, Spell.objects.get(author=self.user).level)
+
+    def test_upload_with_errors_shows_report(self):
+        response = self.upload("library:item-import", "items.csv", ITEMS_CSV)
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(2, Item.objects.filter(author=self.user).count())
+        self.assertEqual([4, 5], [error.line for error in response.context["errors"]])
+        self.assertContains(response, "Imported 2 of 4 entries")
+
+    def test_import_requires_login(self):
+        self.client.logout()
+        response = self.client.get(reverse("library:item-import"))
+
+        self.assertEqual(302, response.status_code)
@@ -1,8 +1,11 @@
+from itertools import product
+from types import SimpleNamespace
+
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.test import TestCase
 
-from library.models import Item, Spell
+from library.models import DESCRIPTION_PREVIEW_LENGTH, Item, Spell
 
 
 class ItemModelTest(TestCase):
@@ -64,3 +67,92 @@ class SpellModelTest(TestCase):
     def test_school_and_value_displayed_correctly(self):
         self.assertEqual(self.spell.get_school_display(), "Necromancy")
         self.assertEqual(self.spell.get_level_display(), "4th")
+
+
+class ListQuerysetTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="testuser")
+        Item.objects.create(title="Tome", description="x" * 5000, author=cls.user)
+        Item.objects.create(title="Ring", description="Short", author=cls.user)
+        Item.objects.create(title="Rope", description=None, author=cls.user)
+
+    def test_description_is_not_loaded(self):
+        items = Item.list_queryset(Item.objects.all())
+
+        for item in items:
+            self.assertIn("description", item.get_deferred_fields())
+
+    def test_description_preview_is_truncated_in_database(self):
+        previews = {
+            item.title: item.description_preview
+            for item in Item.list_queryset(Item.objects.all())
+        }
+
+        self.assertEqual("x" * DESCRIPTION_PREVIEW_LENGTH + "…", previews["Tome"])
+        self.assertEqual("Short", previews["Ring"])
+        self.assertIsNone(previews["Rope"])
+
+
+class ListQueryIndexTest(TestCase):
+    """
+    Every filter/sort combination offered by list views has to be answered
+    from an author (or full-text) index, without full table scan. Ordering has
+    to come from the index too, unless value range filter was chosen over it.
+    """
+
+    ITEM_FILTERS = {
+        "title": "sword",
+        "min_value": 10,
+        "max_value": 500,
+        "rarity": [1, 3],
+    }
+    SPELL_FILTERS = {
+        "title": "fire",
+        "school": [2, 5],
+        "level": [0, 3],
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.request = SimpleNamespace(user=User.objects.create(username="testuser"))
+
+    def filter_combinations(self, filters):
+        # Every subset of filters, from none to all of them
+        for mask in product([False, True], repeat=len(filters)):
+            yield {
+                name: value if enabled else type(value)()
+                for enabled, (name, value) in zip(mask, filters.items())
+            }
+
+    def assert_plans_use_index(self, model, filters, table):
+        for data in self.filter_combinations(filters):
+            for (criteria, _), (direction, _) in product(
+                model.SORT_CRITERIA, model.SORT_DIRECTION
+            ):
+                sort = {"sort_criteria": criteria, "sort_direction": direction}
+                queryset = model.sort_queryset(
+                    model.get_queryset(self.request, data), sort
+                )
+                plan = queryset.explain()
+
+                with self.subTest(filters=data, sort=sort):
+                    self.assertNotIn(f"SCAN {table} ", plan + " ")
+
+                    # Search starts from full-text index, matches are then
+                    # looked up by primary key and sorted
+                    if data["title"]:
+                        self.assertIn(f"SCAN {table}_fts VIRTUAL TABLE", plan)
+                        continue
+
+                    self.assertIn(f"SEARCH {table} USING INDEX", plan)
+
+                    value_range = data.get("min_value") or data.get("max_value")
+                    if not value_range or criteria == "value":
+                        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_item_list_queries_use_index(self):
+        self.assert_plans_use_index(Item, self.ITEM_FILTERS, "library_item")
+
+    def test_spell_list_queries_use_index(self):
+        self.assert_plans_use_index(Spell, self.SPELL_FILTERS, "library_spell")
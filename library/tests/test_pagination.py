@@ -0,0 +1,139 @@
+from datetime import timedelta
+from random import Random
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from library.models import Item, Spell
+from library.pagination import KeysetPaginator, encode_cursor
+from library.search import search
+
+PER_PAGE = 3
+
+
+class KeysetPaginationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="testing321")
+        now = timezone.now()
+        # Seeded, so every run pages through the same entries
+        randint = Random(11).randint
+
+        items = []
+        spells = []
+        for i in range(11):
+            items.append(
+                Item(
+                    title=f"Item{i % 4}",
+                    # Repeated and missing values exercise the id tiebreaker
+                    value=None if i % 5 == 0 else randint(1, 3),
+                    rarity=None if i % 4 == 0 else randint(1, 3),
+                    date_created=now - timedelta(days=i % 3),
+                    author=cls.user,
+                )
+            )
+            spells.append(
+                Spell(
+                    title=f"Spell{i % 4}",
+                    school=randint(0, 2),
+                    level=randint(0, 2),
+                    date_created=now - timedelta(days=i % 3),
+                    author=cls.user,
+                )
+            )
+        Item.objects.bulk_create(items)
+        Spell.objects.bulk_create(spells)
+
+    def walk_forward(self, queryset):
+        paginator = KeysetPaginator(queryset, PER_PAGE)
+        page = paginator.get_page()
+        pages = [page]
+        while page.has_next():
+            page = paginator.get_page(page.next_cursor)
+            pages.append(page)
+        return pages
+
+    def walk_backward(self, queryset, last_page):
+        paginator = KeysetPaginator(queryset, PER_PAGE)
+        page = last_page
+        pages = [page]
+        while page.has_previous():
+            page = paginator.get_page(page.previous_cursor)
+            pages.append(page)
+        return list(reversed(pages))
+
+    def assert_pagination_matches(self, model):
+        for criteria, _ in model.SORT_CRITERIA:
+            for direction, _ in model.SORT_DIRECTION:
+                data = {"sort_criteria": criteria, "sort_direction": direction}
+                queryset = model.sort_queryset(model.objects.all(), data)
+                expected = [obj.id for obj in queryset]
+
+                with self.subTest(criteria=criteria, direction=direction):
+                    pages = self.walk_forward(queryset)
+                    forward = [obj.id for page in pages for obj in page]
+                    self.assertEqual(expected, forward)
+
+                    backward = self.walk_backward(queryset, pages[-1])
+                    self.assertEqual(
+                        [[obj.id for obj in page] for page in pages],
+                        [[obj.id for obj in page] for page in backward],
+                    )
+
+    def test_item_keyset_pagination_all_sort_criteria(self):
+        self.assert_pagination_matches(Item)
+
+    def test_spell_keyset_pagination_all_sort_criteria(self):
+        self.assert_pagination_matches(Spell)
+
+    def test_keyset_pagination_by_search_relevance(self):
+        Item.objects.filter(id__in=Item.objects.all()[:4]).update(title="Item Item")
+        for direction, _ in Item.SORT_DIRECTION:
+            data = {"sort_criteria": "relevance", "sort_direction": direction}
+            queryset = Item.sort_queryset(search(Item.objects.all(), "item"), data)
+            expected = [obj.id for obj in queryset]
+
+            with self.subTest(direction=direction):
+                pages = self.walk_forward(queryset)
+                self.assertEqual(expected, [obj.id for page in pages for obj in page])
+
+    def test_cursor_from_other_ordering_starts_from_first_page(self):
+        queryset = Item.sort_queryset(Item.objects.all())
+        cursor = encode_cursor(["title", "id"], ["Item1", 1])
+
+        page = KeysetPaginator(queryset, PER_PAGE).get_page(cursor)
+
+        self.assertFalse(page.has_previous())
+        self.assertEqual(list(queryset[:PER_PAGE]), page.object_list)
+
+    def test_tampered_cursor_starts_from_first_page(self):
+        queryset = Item.sort_queryset(Item.objects.all())
+
+        page = KeysetPaginator(queryset, PER_PAGE).get_page("not-a-cursor")
+
+        self.assertFalse(page.has_previous())
+
+    def test_queryset_without_id_ordering_is_rejected(self):
+        with self.assertRaises(ValueError):
+            KeysetPaginator(Item.objects.order_by("title"), PER_PAGE)
+
+    @override_settings(LIBRARY_PAGINATION="keyset")
+    def test_item_list_view_uses_cursor_links(self):
+        cache.clear()
+        self.client.login(username="testuser", password="testing321")
+
+        response = self.client.get(reverse("library:item-list"))
+        next_cursor = response.context["page_obj"].next_cursor
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "cursor=")
+
+        response = self.client.get(
+            reverse("library:item-list"), data={"cursor": next_cursor}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context["page_obj"].has_previous())
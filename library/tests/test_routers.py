@@ -0,0 +1,108 @@
+import time
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, TransactionTestCase, override_settings
+
+from library import routers
+from library.cache import GENERATION_KEY
+from library.middleware import replica_pin_middleware
+from library.models import Item
+
+REPLICAS = ["replica0", "replica1"]
+
+
+class RouterTestCase(TransactionTestCase):
+    # Not TestCase, its transaction would keep every read on primary
+
+    def setUp(self):
+        # Router pins the context it writes in, keep that inside the test
+        self.addCleanup(routers.unpin, routers.pin_to_primary(False))
+
+
+@override_settings(LIBRARY_REPLICAS=REPLICAS, LIBRARY_REPLICA_PIN_SECONDS=10)
+class ReplicaRouterTest(RouterTestCase):
+    router = routers.ReplicaRouter()
+
+    def test_reads_go_to_replicas_and_writes_to_primary(self):
+        self.assertIn(self.router.db_for_read(Item), REPLICAS)
+        self.assertEqual("default", self.router.db_for_write(Item))
+
+    def test_reads_after_write_stay_on_primary(self):
+        self.router.db_for_write(Item)
+
+        self.assertEqual("default", self.router.db_for_read(Item))
+
+    def test_reads_in_transaction_stay_on_primary(self):
+        with transaction.atomic():
+            self.assertEqual("default", self.router.db_for_read(Item))
+
+    def test_related_objects_come_from_the_same_database(self):
+        item = Item(title="Axe")
+        item._state.db = "replica1"
+
+        self.assertEqual("replica1", self.router.db_for_read(Item, instance=item))
+
+    def test_other_apps_are_not_routed(self):
+        self.assertIsNone(self.router.db_for_read(User))
+        self.assertIsNone(self.router.db_for_write(User))
+
+    def test_migrations_skip_replicas(self):
+        self.assertFalse(self.router.allow_migrate("replica0", "library"))
+        self.assertIsNone(self.router.allow_migrate("default", "library"))
+
+    @override_settings(LIBRARY_REPLICAS=[])
+    def test_without_replicas_nothing_is_routed(self):
+        self.assertIsNone(self.router.db_for_read(Item))
+        self.assertIsNone(self.router.db_for_write(Item))
+
+
+@override_settings(LIBRARY_REPLICAS=REPLICAS, LIBRARY_REPLICA_PIN_SECONDS=10)
+class ReplicaPinMiddlewareTest(RouterTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username="testuser", password="x")
+
+    def read_database(self, user):
+        request = RequestFactory().get("/")
+        request.user = user
+        databases = []
+
+        def view(request):
+            databases.append(routers.ReplicaRouter().db_for_read(Item))
+            return HttpResponse()
+
+        replica_pin_middleware(view)(request)
+        return databases[0]
+
+    def set_last_change(self, seconds_ago):
+        generation = int((time.time() - seconds_ago) * 10**9)
+        cache.set(GENERATION_KEY.format(user_id=self.user.pk), generation)
+
+    def test_user_who_just_changed_entry_reads_primary(self):
+        self.set_last_change(seconds_ago=1)
+
+        self.assertEqual("default", self.read_database(self.user))
+
+    def test_reads_return_to_replicas_after_pin_window(self):
+        self.set_last_change(seconds_ago=60)
+
+        self.assertIn(self.read_database(self.user), REPLICAS)
+
+    def test_anonymous_user_reads_replicas(self):
+        self.assertIn(self.read_database(AnonymousUser()), REPLICAS)
+
+    def test_pin_ends_with_request(self):
+        self.set_last_change(seconds_ago=0)
+        self.read_database(self.user)
+
+        self.assertFalse(routers.is_pinned())
+
+    @override_settings(LIBRARY_REPLICAS=[])
+    def test_user_is_not_loaded_without_replicas(self):
+        user = mock.Mock(spec=["pk"])
+
+        self.assertIsNone(self.read_database(user))
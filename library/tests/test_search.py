@@ -0,0 +1,154 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+
+from library.models import Item, Spell
+from library.search import fts_query, search
+from library.templatetags.library_tags import highlight
+
+
+class FullTextSearchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="testing321")
+        cls.other_user = User.objects.create_user(
+            username="otheruser", password="testing123"
+        )
+
+        cls.sword = Item.objects.create(
+            title="Flaming Sword",
+            description="A blade wreathed in <fire>",
+            author=cls.user,
+        )
+        cls.staff = Item.objects.create(
+            title="Staff of Fireballs",
+            description="Fire, fire and even more fire.",
+            author=cls.user,
+        )
+        cls.shield = Item.objects.create(
+            title="Shield",
+            description="Protects from arrows",
+            author=cls.user,
+        )
+        Item.objects.create(
+            title="Fire Ring",
+            description="Belongs to someone else",
+            author=cls.other_user,
+        )
+        cls.spell = Spell.objects.create(
+            title="Slow",
+            description="Creature is wreathed in fog",
+            author=cls.user,
+        )
+
+    def setUp(self):
+        # Tests read page_obj, which is not in context of cached pages
+        cache.clear()
+        self.client.login(username="testuser", password="testing321")
+
+    def search_items(self, text, sort_criteria="relevance"):
+        return self.client.get(
+            reverse("library:item-list"),
+            data={
+                "submit": "",
+                "title": text,
+                "sort_criteria": sort_criteria,
+                "sort_direction": "desc",
+            },
+        )
+
+    def test_fts_query_quotes_words_as_prefixes(self):
+        self.assertEqual(fts_query('fire "sw OR'), '"fire"* "sw"* "OR"*')
+        self.assertEqual(fts_query("***"), "")
+
+    def test_search_uses_match(self):
+        sql = str(search(Item.objects.all(), "fire").query)
+
+        self.assertIn('"library_item_fts" MATCH', sql)
+
+    def test_search_matches_title_and_description_prefixes(self):
+        response = self.search_items("fir")
+
+        self.assertEqual(
+            {self.sword, self.staff}, set(response.context["page_obj"].object_list)
+        )
+
+    def test_search_is_scoped_to_user(self):
+        response = self.search_items("ring")
+
+        self.assertEqual([], list(response.context["page_obj"].object_list))
+
+    def test_search_results_are_ranked(self):
+        response = self.search_items("fire")
+
+        self.assertEqual(
+            [self.staff, self.sword], list(response.context["page_obj"].object_list)
+        )
+
+    def test_search_snippet_is_highlighted_and_escaped(self):
+        response = self.search_items("fire")
+
+        self.assertContains(response, "wreathed in &lt;<mark>fire</mark>&gt;")
+
+    def test_index_follows_updates_and_deletes(self):
+        self.shield.description = "Protects from fire"
+        self.shield.save()
+        self.staff.delete()
+
+        response = self.search_items("fire")
+
+        self.assertEqual(
+            {self.sword, self.shield}, set(response.context["page_obj"].object_list)
+        )
+
+    def test_spell_search_matches_description(self):
+        response = self.client.get(
+            reverse("library:spell-list"), data={"submit": "", "title": "wreath"}
+        )
+
+        self.assertEqual([self.spell], list(response.context["page_obj"].object_list))
+        self.assertContains(response, "<mark>wreathed</mark>")
+
+    def test_relevance_without_search_uses_default_sorting(self):
+        queryset = Item.sort_queryset(
+            Item.objects.all(),
+            {"sort_criteria": "relevance", "sort_direction": "desc"},
+        )
+
+        self.assertEqual(("-date_created", "-id"), queryset.query.order_by)
+
+    def test_highlight_filter_escapes_html(self):
+        self.assertEqual(
+            "&lt;b&gt;<mark>x</mark>", highlight("<b>\x02x\x03", autoescape=True)
+        )
+
+
+class SearchIndexMigrationTest(TransactionTestCase):
+    def migrate(self, target):
+        """
+        Migrates library app to target, returns apps of its state.
+        """
+        executor = MigrationExecutor(connection)
+        executor.migrate([("library", target)])
+        executor.loader.build_graph()
+        return executor.loader.project_state(("library", target)).apps
+
+    def test_index_follows_inserts_after_reverting_sharding(self):
+        latest = MigrationExecutor(connection).loader.graph.leaf_nodes("library")[0]
+        self.addCleanup(self.migrate, latest[1])
+        apps = self.migrate("0005_library_stats")
+        user = apps.get_model("auth", "User").objects.create(username="testuser")
+
+        apps.get_model("library", "Item").objects.create(
+            title="Flaming Sword", author_id=user.pk
+        )
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT rowid FROM library_item_fts WHERE library_item_fts MATCH %s",
+                ["flaming"],
+            )
+            self.assertEqual(1, len(cursor.fetchall()))
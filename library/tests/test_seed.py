@@ -0,0 +1,56 @@
+import io
+from collections import Counter
+
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from library.models import Item, Spell
+from library.seed import SEED_PASSWORD, seed
+
+
+class SeedTest(TestCase):
+    def test_seed_creates_entries_for_every_user(self):
+        users = seed(users=2, items=30, spells=20)
+
+        self.assertEqual(["seed_user_0", "seed_user_1"], [u.username for u in users])
+        for user in users:
+            self.assertEqual(30, Item.objects.filter(author=user).count())
+            self.assertEqual(20, Spell.objects.filter(author=user).count())
+        self.assertTrue(users[0].check_password(SEED_PASSWORD))
+
+    def test_same_seed_generates_same_data(self):
+        def generated():
+            seed(users=1, items=20, spells=20, seed=7)
+            data = list(Item.objects.values_list("title", "value", "rarity"))
+            Item.objects.all().delete()
+            return data
+
+        self.assertEqual(generated(), generated())
+
+    def test_common_items_and_low_level_spells_prevail(self):
+        seed(users=1, items=500, spells=500)
+
+        rarities = Counter(Item.objects.values_list("rarity", flat=True))
+        self.assertEqual(Item.COMMON, rarities.most_common(1)[0][0])
+        self.assertGreater(rarities[Item.COMMON], rarities[Item.ARTIFACT] * 5)
+
+        levels = Counter(Spell.objects.values_list("level", flat=True))
+        self.assertGreater(levels[1], levels[9])
+
+
+class SeedCommandTest(TestCase):
+    def test_command_seeds_database(self):
+        out = io.StringIO()
+        call_command("seed_tome", users=2, items=5, spells=3, stdout=out)
+
+        self.assertEqual(2, User.objects.count())
+        self.assertEqual(10, Item.objects.count())
+        self.assertEqual(6, Spell.objects.count())
+        self.assertIn(
+            "Created 5 items and 3 spells for each of 2 users", out.getvalue()
+        )
+
+    def test_command_rejects_negative_counts(self):
+        with self.assertRaises(CommandError):
+            call_command("seed_tome", items=-1)
@@ -0,0 +1,316 @@
+import heapq
+import io
+import unittest
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from library import sharding
+from library.admin import sort_key
+from library.models import Item, LibraryStat, ShardAssignment, Spell
+from library.routers import ShardRouter
+from library.search import search
+from library.stats import compute, stored
+
+SHARDS = ["default", "shard1", "shard2"]
+
+
+@override_settings(LIBRARY_SHARDS=SHARDS)
+class ShardForTest(TestCase):
+    # Shards other than the primary are never queried here
+
+    def setUp(self):
+        cache.clear()
+
+    def test_new_users_are_assigned_round_robin(self):
+        users = [User.objects.create_user(username=f"user{i}") for i in range(3)]
+
+        self.assertEqual(
+            sorted(SHARDS), sorted(sharding.shard_for(user.pk) for user in users)
+        )
+        self.assertEqual(
+            SHARDS[users[1].pk % 3], ShardAssignment.objects.get(user=users[1]).shard
+        )
+
+    def test_assignment_is_cached(self):
+        user = User.objects.create_user(username="testuser")
+        sharding.shard_for(user.pk)
+
+        with self.assertNumQueries(0):
+            sharding.shard_for(user.pk)
+
+    def test_assignment_is_kept_when_shards_are_added(self):
+        user = User.objects.create_user(username="testuser")
+        shard = sharding.shard_for(user.pk)
+        cache.clear()
+
+        with self.settings(LIBRARY_SHARDS=[*SHARDS, "shard3", "shard4"]):
+            self.assertEqual(shard, sharding.shard_for(user.pk))
+
+    def test_assign(self):
+        user = User.objects.create_user(username="testuser")
+
+        sharding.assign(user.pk, "shard2")
+
+        self.assertEqual("shard2", sharding.shard_for(user.pk))
+        cache.clear()
+        self.assertEqual("shard2", sharding.shard_for(user.pk))
+
+    def test_shard_of_id(self):
+        self.assertEqual("default", sharding.shard_for_pk(1))
+        self.assertEqual("shard1", sharding.shard_for_pk(sharding.SHARD_ID_RANGE + 1))
+        self.assertEqual("shard2", sharding.shard_for_pk(2 * sharding.SHARD_ID_RANGE))
+        # Out of range ids are looked for, and not found, on the primary
+        self.assertEqual("default", sharding.shard_for_pk(5 * sharding.SHARD_ID_RANGE))
+
+    def test_queries_of_primary_users_are_left_to_routers(self):
+        user = User.objects.create_user(username="testuser")
+        sharding.assign(user.pk, "default")
+
+        self.assertIsNone(Item.objects.of_author(user)._db)
+
+        sharding.assign(user.pk, "shard1")
+        self.assertEqual("shard1", Item.objects.of_author(user).db)
+        self.assertEqual("shard1", Item.objects.of_pk(sharding.SHARD_ID_RANGE).db)
+
+
+@override_settings(LIBRARY_SHARDS=["default"])
+class NotShardedTest(TestCase):
+    def test_everything_is_on_primary_without_queries(self):
+        with self.assertNumQueries(0):
+            self.assertEqual("default", sharding.shard_for(1))
+            self.assertEqual("default", sharding.shard_for_pk(sharding.SHARD_ID_RANGE))
+
+    def test_router_stays_out(self):
+        router = ShardRouter()
+
+        self.assertIsNone(router.db_for_read(Item))
+        self.assertIsNone(router.db_for_write(Item, instance=Item(author_id=1)))
+        self.assertIsNone(router.allow_migrate("default", "library", "item"))
+
+
+@override_settings(LIBRARY_SHARDS=SHARDS)
+class ShardRouterTest(TestCase):
+    router = ShardRouter()
+
+    def test_new_entries_go_to_shard_of_author(self):
+        user = User.objects.create_user(username="testuser")
+        sharding.assign(user.pk, "shard2")
+
+        self.assertEqual(
+            "shard2", self.router.db_for_write(Spell, instance=Spell(author=user))
+        )
+
+    def test_loaded_entries_stay_on_their_shard(self):
+        item = Item(author_id=1)
+        item._state.db = "shard1"
+
+        self.assertEqual("shard1", self.router.db_for_write(Item, instance=item))
+        self.assertEqual("shard1", self.router.db_for_read(Item, instance=item))
+        # Author of the entry is on the primary
+        self.assertEqual("default", self.router.db_for_read(User, instance=item))
+
+    def test_other_models_are_written_to_primary(self):
+        self.assertEqual("default", self.router.db_for_write(User))
+        self.assertEqual("default", self.router.db_for_write(ShardAssignment))
+
+    def test_migrations_of_shards_create_library_tables_only(self):
+        allow_migrate = self.router.allow_migrate
+
+        self.assertIsNone(allow_migrate("default", "auth", "user"))
+        self.assertTrue(allow_migrate("shard1", "library", "item"))
+        self.assertTrue(allow_migrate("shard1", "library", "librarystat"))
+        self.assertTrue(allow_migrate("shard1", "library"))
+        self.assertFalse(allow_migrate("shard1", "library", "shardassignment"))
+        self.assertFalse(allow_migrate("shard1", "auth", "user"))
+        self.assertFalse(allow_migrate("shard2", "sessions"))
+
+
+@override_settings(LIBRARY_SHARDS=SHARDS)
+class BalancePlanTest(SimpleTestCase):
+    def test_moves_users_from_fullest_to_emptiest_shard(self):
+        counts = {"default": {1: 100, 2: 40, 3: 30}, "shard1": {4: 10}}
+
+        moves = sharding.balance_plan(counts)
+
+        self.assertEqual([(2, "default", "shard2"), (3, "default", "shard1")], moves)
+
+    def test_balanced_shards_stay(self):
+        counts = {"default": {1: 10}, "shard1": {2: 10}, "shard2": {3: 12}}
+
+        self.assertEqual([], sharding.balance_plan(counts))
+
+
+class SortKeyTest(unittest.TestCase):
+    def test_merges_shards_in_order_of_queryset(self):
+        queryset = Item.objects.order_by("-value", "title")
+        shard1 = [Item(pk=1, title="B", value=5), Item(pk=2, title="A", value=None)]
+        shard2 = [Item(pk=3, title="A", value=5), Item(pk=4, title="C", value=1)]
+
+        merged = heapq.merge(shard1, shard2, key=sort_key(queryset))
+
+        self.assertEqual([3, 1, 4, 2], [item.pk for item in merged])
+
+
+class AdminTest(TestCase):
+    databases = "__all__"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(username="admin", password="x")
+        cls.item = Item.objects.create(title="Axe", author=cls.admin)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_change_list_and_change_page(self):
+        response = self.client.get(reverse("admin:library_item_changelist"))
+        self.assertContains(response, "Axe")
+        # Actions run on one database
+        self.assertEqual(
+            not sharding.is_sharded(), 'name="action"' in response.content.decode()
+        )
+
+        response = self.client.get(
+            reverse("admin:library_item_change", args=[self.item.pk])
+        )
+        self.assertContains(response, "Axe")
+
+
+@unittest.skipUnless(
+    sharding.is_sharded(),
+    "Needs shards, run with e.g. DJANGO_DB_SHARDS=shard1.sqlite3,shard2.sqlite3",
+)
+# Shards from settings, other tests run on the primary (see tests.runner)
+@override_settings(LIBRARY_SHARDS=sharding.shards())
+class ShardedTest(TestCase):
+    """
+    Runs against the shard databases from settings.
+    """
+
+    databases = "__all__"
+
+    @classmethod
+    def setUpTestData(cls):
+        cache.clear()
+        cls.users = []
+        for i, shard in enumerate(sharding.shards()):
+            user = User.objects.create_superuser(username=f"user{i}", password="x")
+            sharding.assign(user.pk, shard)
+            cls.users.append(user)
+        cls.user = cls.users[-1]
+        cls.shard = sharding.shards()[-1]
+        cls.title = f"Sword {len(cls.users) - 1}"
+
+        for i, user in enumerate(cls.users):
+            Item.objects.create(title=f"Sword {i}", value=i, author=user)
+            Spell.objects.create(title=f"Haste {i}", level=i, author=user)
+
+    def setUp(self):
+        # Shards cached by tests that were rolled back
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_entries_are_stored_on_shard_of_author(self):
+        item = Item.objects.of_author(self.user).get()
+
+        self.assertEqual(self.shard, item._state.db)
+        self.assertEqual(self.shard, sharding.shard_for_pk(item.pk))
+        self.assertFalse(Item.objects.filter(author=self.user).exists())
+        self.assertEqual(compute(), stored())
+
+    def test_views_read_from_shard(self):
+        item = Item.objects.of_author(self.user).get()
+
+        response = self.client.get(reverse("library:item-list"))
+        self.assertContains(response, self.title)
+        self.assertNotContains(response, "Sword 0")
+
+        response = self.client.get(reverse("library:item-detail", args=[item.pk]))
+        self.assertContains(response, self.title)
+
+        response = self.client.get(reverse("library:api-item-detail", args=[item.pk]))
+        self.assertEqual(200, response.status_code)
+
+        response = self.client.get(reverse("library:stats"))
+        self.assertEqual(1, response.context["item_count"])
+
+    def test_async_views_with_cold_cache(self):
+        # Shard is not cached yet, as after a restart
+        cache.clear()
+
+        for url_name in ("library:item-list", "library:item-results"):
+            response = self.client.get(reverse(url_name))
+            self.assertContains(response, self.title)
+        for url_name in ("library:spell-list", "library:spell-results"):
+            cache.clear()
+            response = self.client.get(reverse(url_name))
+            self.assertContains(response, f"Haste {len(self.users) - 1}")
+
+    def test_created_entry_goes_to_shard(self):
+        self.client.post(
+            reverse("library:item-create"),
+            {"title": "Shield", "description": "", "value": 1, "rarity": 1},
+        )
+
+        item = Item.objects.of_author(self.user).get(title="Shield")
+        self.assertEqual(self.shard, item._state.db)
+        self.assertEqual(compute(), stored())
+
+    def test_move_author(self):
+        source, target = self.shard, sharding.PRIMARY
+
+        moved = sharding.move_author(self.user.pk, target)
+
+        self.assertEqual(2, moved)
+        self.assertEqual(target, sharding.shard_for(self.user.pk))
+        self.assertFalse(Item.objects.using(source).filter(author=self.user).exists())
+        self.assertFalse(
+            LibraryStat.objects.using(source).filter(author=self.user).exists()
+        )
+        item = Item.objects.of_author(self.user).get()
+        self.assertEqual(target, sharding.shard_for_pk(item.pk))
+        self.assertTrue(search(Item.objects.of_author(self.user), "sword").exists())
+        self.assertEqual(compute(), stored())
+
+        response = self.client.get(reverse("library:item-detail", args=[item.pk]))
+        self.assertContains(response, self.title)
+
+    def test_rebalance_command(self):
+        out = io.StringIO()
+
+        call_command(
+            "rebalance_shards",
+            "--user",
+            self.user.username,
+            "--to",
+            sharding.PRIMARY,
+            stdout=out,
+        )
+
+        self.assertIn(f"Moved 2 entries of {self.user.username}", out.getvalue())
+        self.assertEqual(sharding.PRIMARY, sharding.shard_for(self.user.pk))
+
+    def test_deleting_user_deletes_entries_on_shard(self):
+        self.user.delete()
+
+        for model in (Item, Spell, LibraryStat):
+            rows = model.objects.using(self.shard).filter(author_id=self.user.pk)
+            self.assertFalse(rows.exists())
+
+    def test_admin_merges_shards(self):
+        response = self.client.get(reverse("admin:library_item_changelist"))
+
+        titles = [item.title for item in response.context["cl"].result_list]
+        # Newest id first, shards hand out ids from growing ranges
+        self.assertEqual(
+            [f"Sword {i}" for i in reversed(range(len(self.users)))], titles
+        )
+        self.assertEqual(len(self.users), response.context["cl"].result_count)
+
+        item = Item.objects.of_author(self.user).get()
+        response = self.client.get(reverse("admin:library_item_change", args=[item.pk]))
+        self.assertContains(response, self.title)
@@ -0,0 +1,30 @@
+from django.db import connections
+from django.test import SimpleTestCase, override_settings
+
+from library.sqlite import current_pragmas
+
+PRAGMAS = {"cache_size": -1000, "busy_timeout": 1234, "temp_store": 2}
+
+
+class SqlitePragmaTest(SimpleTestCase):
+    databases = {"default"}
+
+    def new_connection(self):
+        connection = connections.create_connection("default")
+        self.addCleanup(lambda: connection.connection and connection.connection.close())
+        return connection
+
+    @override_settings(LIBRARY_SQLITE_PRAGMAS=PRAGMAS)
+    def test_pragmas_are_set_on_new_connection(self):
+        connection = self.new_connection()
+
+        self.assertEqual(PRAGMAS, current_pragmas(connection))
+
+    @override_settings(LIBRARY_SQLITE_PRAGMAS=PRAGMAS)
+    def test_pragmas_are_not_counted_as_queries(self):
+        connection = self.new_connection()
+        connection.force_debug_cursor = True
+
+        connection.ensure_connection()
+
+        self.assertEqual([], connection.queries)
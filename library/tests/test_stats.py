@@ -0,0 +1,213 @@
+import io
+from datetime import datetime
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import DatabaseError, transaction
+from django.db.models import F
+from django.db.models.sql import DeleteQuery
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from library.importer import import_file
+from library.models import Item, LibraryStat, Spell
+from library.seed import seed
+from library.stats import compute, rebuild, stored, user_stats
+
+
+class StatsTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="testing321")
+        cls.other_user = User.objects.create_user(username="otheruser", password="x")
+
+    def assert_stats_match(self):
+        # Incrementally maintained stats equal freshly aggregated ones
+        self.assertEqual(compute(), stored())
+
+
+class IncrementalStatsTest(StatsTestCase):
+    def setUp(self):
+        self.item = Item.objects.create(
+            title="Sword", value=100, rarity=Item.RARE, author=self.user
+        )
+        self.spell = Spell.objects.create(
+            title="Slow", school=Spell.TRANSMUTATION, level=3, author=self.user
+        )
+        Item.objects.create(title="Axe", value=5, author=self.other_user)
+
+    def test_created_entries_are_counted(self):
+        stats = user_stats(self.user)
+
+        self.assertEqual(1, stats["item_count"])
+        self.assertEqual(100, stats["item_value"])
+        self.assertEqual(1, stats["spell_count"])
+        self.assertEqual(
+            [{"label": "Rare", "count": 1, "value": 100}], stats["by_rarity"]
+        )
+        self.assert_stats_match()
+
+    def test_update_moves_entry_between_groups(self):
+        self.item.rarity = Item.LEGENDARY
+        self.item.value = 900
+        self.item.save()
+        self.spell.level = 5
+        self.spell.save()
+
+        stats = user_stats(self.user)
+        self.assertEqual(
+            [{"label": "Legendary", "count": 1, "value": 900}], stats["by_rarity"]
+        )
+        self.assertEqual([{"label": "5th", "count": 1}], stats["by_level"])
+        self.assert_stats_match()
+
+    def test_repeated_saves_of_same_instance(self):
+        for value in (1, 2, 3):
+            self.item.value = value
+            self.item.save()
+
+        self.assertEqual(3, user_stats(self.user)["item_value"])
+        self.assert_stats_match()
+
+    def test_update_of_partially_loaded_entry(self):
+        item = Item.objects.only("title").get(pk=self.item.pk)
+        item.value = 7
+        item.save()
+
+        self.assertEqual(7, user_stats(self.user)["item_value"])
+        self.assert_stats_match()
+
+    def test_delete_subtracts_entry(self):
+        self.item.delete()
+        Spell.objects.filter(author=self.user).delete()
+
+        stats = user_stats(self.user)
+        self.assertEqual(0, stats["item_count"])
+        self.assertEqual(0, stats["spell_count"])
+        self.assertEqual([], stats["growth"])
+        self.assert_stats_match()
+
+    def test_deleting_user_deletes_stats(self):
+        user_id = self.user.pk
+
+        self.user.delete()
+
+        self.assertFalse(LibraryStat.objects.filter(author_id=user_id).exists())
+        self.assertFalse(Item.objects.filter(author_id=user_id).exists())
+        self.assert_stats_match()
+
+    def test_failed_user_deletion_keeps_stats_updated(self):
+        with self.assertRaises(DatabaseError), transaction.atomic():
+            with mock.patch.object(
+                DeleteQuery, "delete_batch", side_effect=DatabaseError
+            ):
+                self.user.delete()
+
+        self.client.login(username="testuser", password="testing321")
+        response = self.client.post(
+            reverse("library:item-update", args=[self.item.pk]),
+            data={"title": "Sword", "value": 300, "rarity": Item.RARE},
+        )
+
+        self.assertEqual(302, response.status_code)
+        self.assertEqual(300, user_stats(self.user)["item_value"])
+        self.assert_stats_match()
+
+    def test_growth_is_cumulative_by_month(self):
+        Item.objects.create(
+            title="Old",
+            date_created=timezone.make_aware(datetime(2020, 1, 15)),
+            author=self.user,
+        )
+
+        growth = user_stats(self.user)["growth"]
+        self.assertEqual("2020-01", growth[0]["month"])
+        self.assertEqual(1, growth[0]["items_total"])
+        self.assertEqual(2, growth[-1]["items_total"])
+        self.assertEqual(1, growth[-1]["spells_total"])
+        self.assert_stats_match()
+
+    def test_view_and_edit_through_pages(self):
+        self.client.login(username="testuser", password="testing321")
+        self.client.post(
+            reverse("library:item-update", args=[self.item.pk]),
+            {"title": "Sword", "value": 250, "rarity": Item.RARE},
+        )
+        self.client.post(reverse("library:spell-delete", args=[self.spell.pk]))
+
+        self.assertEqual(250, user_stats(self.user)["item_value"])
+        self.assert_stats_match()
+
+
+class BulkStatsTest(StatsTestCase):
+    def test_import_is_counted(self):
+        data = b"title,value,rarity\nSword,10,1\nShield,20,1\nRing,,\n"
+        import_file(Item, io.BytesIO(data), "csv", self.user)
+
+        stats = user_stats(self.user)
+        self.assertEqual(3, stats["item_count"])
+        self.assertEqual(30, stats["item_value"])
+        self.assert_stats_match()
+
+    def test_seed_is_counted(self):
+        seed(users=2, items=50, spells=50)
+
+        self.assert_stats_match()
+
+
+class RebuildStatsTest(StatsTestCase):
+    def setUp(self):
+        Item.objects.create(title="Sword", value=100, author=self.user)
+        Spell.objects.create(title="Slow", author=self.other_user)
+
+    def test_rebuild_fixes_drift(self):
+        # Changes that bypass signals
+        Item.objects.update(value=F("value") + 1)
+        LibraryStat.objects.filter(kind=LibraryStat.SPELL_LEVEL).delete()
+
+        self.assertEqual(2, rebuild())
+        self.assert_stats_match()
+        self.assertEqual(0, rebuild())
+
+    def test_rebuild_of_one_user(self):
+        LibraryStat.objects.all().update(count=0)
+
+        rebuild([self.user.pk])
+
+        self.assertEqual(1, user_stats(self.user)["item_count"])
+        self.assertEqual(0, user_stats(self.other_user)["spell_count"])
+
+    def test_command(self):
+        LibraryStat.objects.all().delete()
+        out = io.StringIO()
+
+        call_command("rebuild_tome_stats", stdout=out)
+
+        self.assertIn(
+            "Rebuilt stats of all users, 5 groups had drifted", out.getvalue()
+        )
+        self.assert_stats_match()
+
+
+class StatsViewTest(StatsTestCase):
+    def test_page_shows_stats_without_aggregating_entries(self):
+        Item.objects.create(
+            title="Sword", value=100, rarity=Item.RARE, author=self.user
+        )
+        Spell.objects.create(title="Slow", school=Spell.ILLUSION, author=self.user)
+        self.client.login(username="testuser", password="testing321")
+
+        with self.assertNumQueries(3):
+            # Session, user and stats
+            response = self.client.get(reverse("library:stats"))
+
+        self.assertContains(response, "1 items worth 100 gp in total")
+        self.assertContains(response, "Illusion")
+        self.assertTemplateUsed(response, "library/stats.html")
+
+    def test_login_required(self):
+        response = self.client.get(reverse("library:stats"))
+
+        self.assertEqual(302, response.status_code)
@@ -0,0 +1,147 @@
+import pstats
+import re
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import AsyncClient, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from library import timing
+from library.models import Item
+
+
+def parse_server_timing(header):
+    """
+    Returns {name: (duration, description)}.
+    """
+    metrics = {}
+    for entry in header.split(", "):
+        name, *params = entry.split(";")
+        params = dict(param.split("=", 1) for param in params)
+        metrics[name] = (float(params["dur"]), params.get("desc", "").strip('"'))
+    return metrics
+
+
+@override_settings(LIBRARY_SERVER_TIMING=True)
+class ServerTimingTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="x")
+        for i in range(3):
+            Item.objects.create(title=f"Sword {i}", value=i, author=cls.user)
+
+    def setUp(self):
+        # Keeps log lines of requests out of test output
+        self.enterContext(mock.patch.object(timing.logger, "handlers", []))
+        cache.clear()
+        self.client.force_login(self.user)
+        self.async_client = AsyncClient()
+        self.async_client.force_login(self.user)
+
+    def test_list_phases_are_sent(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(
+                reverse("library:item-list"),
+                {"submit": "", "sort_criteria": "value", "sort_direction": "asc"},
+            )
+
+        metrics = parse_server_timing(response["Server-Timing"])
+        self.assertEqual(
+            ["sql", "forms", "count", "facets", "render", "total"], list(metrics)
+        )
+        self.assertEqual(f"{len(context.captured_queries)} queries", metrics["sql"][1])
+        self.assertGreater(metrics["render"][0], 0)
+        self.assertGreaterEqual(metrics["total"][0], metrics["render"][0])
+
+    def test_cached_list_skips_count(self):
+        self.client.get(reverse("library:item-list"))
+
+        response = self.client.get(reverse("library:item-list"))
+
+        self.assertNotIn("count", parse_server_timing(response["Server-Timing"]))
+
+    def test_structured_log_line(self):
+        with self.assertLogs("library.timing", "INFO") as logs:
+            self.client.get(reverse("library:item-list"))
+
+        (record,) = logs.records
+        self.assertEqual("library:item-list", record.timing["route"])
+        self.assertEqual(self.user.pk, record.timing["user"])
+        self.assertEqual(200, record.timing["status"])
+        self.assertIn("sql_ms", record.timing)
+        self.assertIn("render_ms", record.timing)
+        self.assertRegex(
+            record.getMessage(), r"route=library:item-list .*user=\d+ .*queries=\d+"
+        )
+
+    def test_anonymous_user_is_not_logged(self):
+        self.client.logout()
+
+        with self.assertLogs("library.timing", "INFO") as logs:
+            self.client.get(reverse("account:login"))
+
+        self.assertIsNone(logs.records[0].timing["user"])
+
+    async def test_async_view_through_asgi(self):
+        response = await self.async_client.get(reverse("library:item-list"))
+
+        metrics = parse_server_timing(response["Server-Timing"])
+        self.assertIn("render", metrics)
+        # Queries of the view run in other threads
+        self.assertNotEqual("0 queries", metrics["sql"][1])
+
+    @override_settings(LIBRARY_SERVER_TIMING=False)
+    def test_off(self):
+        response = self.client.get(reverse("library:item-list"))
+
+        self.assertNotIn("Server-Timing", response)
+
+
+@override_settings(LIBRARY_SERVER_TIMING=True, LIBRARY_PROFILE_SAMPLE=1)
+class ProfileTest(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+        settings = override_settings(
+            LIBRARY_PROFILE_DIR=self.directory, LIBRARY_PROFILE_KEEP=2
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        # Profiles kept by earlier tests do not count
+        self.addCleanup(setattr, timing, "slowest_profiles", timing.slowest_profiles)
+        timing.slowest_profiles = timing.SlowestProfiles()
+
+    def test_slowest_profiles_are_kept(self):
+        with self.assertLogs("library.timing", "INFO"):
+            for _ in range(4):
+                self.client.get(reverse("account:login"))
+
+        files = sorted(self.directory.glob("*.prof"))
+        self.assertEqual(2, len(files))
+        self.assertTrue(
+            all(re.match(r"\d+\.\dms-account-login-", f.name) for f in files)
+        )
+        self.assertTrue(pstats.Stats(str(files[0])).total_calls)
+
+    def test_faster_request_than_kept_ones_is_not_saved(self):
+        profiles = timing.slowest_profiles
+        for total in (50, 60, 10):
+            timings = timing.Timings()
+            timings.total = total
+            path = profiles.offer(EmptyProfile(), timings, "library:item-list")
+
+        self.assertIsNone(path)
+        self.assertEqual([50, 60], sorted(total for total, _ in profiles.kept))
+
+
+class EmptyProfile:
+    def dump_stats(self, path):
+        Path(path).write_text("")
@@ -4,11 +4,29 @@ from django.urls import resolve, reverse
 from library import views
 
 
+class TestStatsUrls(SimpleTestCase):
+    def test_stats_is_resolved(self):
+        url = reverse("library:stats")
+        self.assertEquals(resolve(url).func, views.stats)
+
+
 class TestItemLibraryUrls(SimpleTestCase):
     def test_item_list_is_resolved(self):
         url = reverse("library:item-list")
         self.assertEquals(resolve(url).func, views.item_list)
 
+    def test_item_export_is_resolved(self):
+        url = reverse("library:item-export")
+        self.assertEquals(resolve(url).func, views.item_export)
+
+    def test_item_import_is_resolved(self):
+        url = reverse("library:item-import")
+        self.assertEquals(resolve(url).func, views.item_import)
+
+    def test_item_bulk_is_resolved(self):
+        url = reverse("library:item-bulk")
+        self.assertEquals(resolve(url).func, views.item_bulk)
+
     def test_item_create_is_resolved(self):
         url = reverse("library:item-create")
         self.assertEquals(resolve(url).func, views.new_item)
@@ -31,6 +49,18 @@ class TestSpellUrls(SimpleTestCase):
         url = reverse("library:spell-list")
         self.assertEquals(resolve(url).func, views.spell_list)
 
+    def test_spell_export_is_resolved(self):
+        url = reverse("library:spell-export")
+        self.assertEquals(resolve(url).func, views.spell_export)
+
+    def test_spell_import_is_resolved(self):
+        url = reverse("library:spell-import")
+        self.assertEquals(resolve(url).func, views.spell_import)
+
+    def test_spell_bulk_is_resolved(self):
+        url = reverse("library:spell-bulk")
+        self.assertEquals(resolve(url).func, views.spell_bulk)
+
     def test_spell_detail_is_resolved(self):
         url = reverse("library:spell-detail", args=[1])
         self.assertEquals(resolve(url).func.view_class, views.SpellDetailView)
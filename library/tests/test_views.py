@@ -3,7 +3,10 @@ from datetime import timedelta
 from random import randint
 
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
 from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 
@@ -511,3 +514,169 @@ class SpellUpdateViewTest(TestCase):
         # User should be redirected after submitting invalid form
         self.assertEqual(res.status_code, 302)
         self.assertNotEqual(spell.title, form_data["title"])
+
+
+class AuthorRequiredQueryTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="testing321")
+        cls.other_user = User.objects.create_user(
+            username="otheruser", password="testing123"
+        )
+
+    def setUp(self):
+        self.client.login(username="testuser", password="testing321")
+        self.item = Item.objects.create(title="Spear", author=self.user)
+        self.spell = Spell.objects.create(title="Slow", author=self.user)
+
+    def assert_single_fetch(self, method, url_name, obj, data=None):
+        url = reverse(url_name, args=[obj.id])
+        table = obj._meta.db_table
+
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(url, data=data)
+
+        fetches = [
+            query["sql"]
+            for query in queries.captured_queries
+            if query["sql"].startswith("SELECT") and f'FROM "{table}"' in query["sql"]
+        ]
+        self.assertEqual(1, len(fetches), fetches)
+        # Ownership is checked by the query itself
+        self.assertIn(f'"{table}"."author_id" = {self.user.id}', fetches[0])
+        return response
+
+    def test_item_update_fetches_item_once(self):
+        response = self.assert_single_fetch("get", "library:item-update", self.item)
+        self.assertEqual(200, response.status_code)
+
+        response = self.assert_single_fetch(
+            "post", "library:item-update", self.item, {"title": "Lance"}
+        )
+        self.assertEqual(302, response.status_code)
+
+    def test_item_delete_fetches_item_once(self):
+        response = self.assert_single_fetch("get", "library:item-delete", self.item)
+        self.assertEqual(200, response.status_code)
+
+        response = self.assert_single_fetch("post", "library:item-delete", self.item)
+        self.assertEqual(302, response.status_code)
+
+    def test_spell_update_fetches_spell_once(self):
+        response = self.assert_single_fetch("get", "library:spell-update", self.spell)
+        self.assertEqual(200, response.status_code)
+
+        response = self.assert_single_fetch(
+            "post", "library:spell-update", self.spell, {"title": "Haste"}
+        )
+        self.assertEqual(302, response.status_code)
+
+    def test_spell_delete_fetches_spell_once(self):
+        response = self.assert_single_fetch("get", "library:spell-delete", self.spell)
+        self.assertEqual(200, response.status_code)
+
+        response = self.assert_single_fetch("post", "library:spell-delete", self.spell)
+        self.assertEqual(302, response.status_code)
+
+    def test_other_user_entry_is_forbidden(self):
+        self.client.login(username="otheruser", password="testing123")
+
+        response = self.client.post(
+            reverse("library:spell-delete", args=[self.spell.id])
+        )
+
+        self.assertEqual(403, response.status_code)
+        self.assertTrue(Spell.objects.filter(id=self.spell.id).exists())
+
+    def test_missing_entry_is_not_found(self):
+        for url_name in (
+            "library:item-update",
+            "library:item-delete",
+            "library:spell-update",
+            "library:spell-delete",
+        ):
+            with self.subTest(url_name):
+                response = self.client.post(reverse(url_name, args=[0]))
+
+                self.assertEqual(404, response.status_code)
+
+    def test_other_user_item_update_is_forbidden(self):
+        self.client.login(username="otheruser", password="testing123")
+
+        response = self.client.get(reverse("library:item-update", args=[self.item.id]))
+
+        self.assertEqual(403, response.status_code)
+
+
+class ResultsFragmentTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="testing321")
+        for i in range(ITEMS_PER_PAGE + 1):
+            Item.objects.create(title=f"Sword {i}", rarity=1, author=cls.user)
+        Spell.objects.create(title="Haste", author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client.login(username="testuser", password="testing321")
+
+    def test_only_results_and_pagination(self):
+        response = self.client.get(reverse("library:item-results"))
+
+        self.assertContains(response, "Sword 10")
+        self.assertContains(response, 'class="paginated"')
+        self.assertNotContains(response, "<nav")
+        self.assertNotContains(response, 'name="sort_criteria"')
+
+    def test_page_links_lead_to_full_page(self):
+        response = self.client.get(reverse("library:item-results"), {"page": 1})
+
+        list_url = reverse("library:item-list")
+        self.assertContains(response, f'href="{list_url}?&amp;page=2"')
+
+    def test_shares_cache_with_list_page(self):
+        self.client.get(reverse("library:item-list"), {"page": 2})
+
+        response = self.client.get(reverse("library:item-results"), {"page": 2})
+
+        self.assertEqual("hit", response["X-Library-Cache"])
+        self.assertContains(response, "Sword 0")
+
+    def test_filter_panel_on_request(self):
+        url = reverse("library:spell-results")
+        data = {"submit": "", "title": "haste"}
+
+        response = self.client.get(url, data)
+        self.assertNotContains(response, "data-filters")
+
+        response = self.client.get(url, data, HTTP_X_LIBRARY_FILTERS="1")
+        self.assertContains(response, "<template data-filters>")
+        self.assertContains(response, 'value="haste"')
+        self.assertIn("X-Library-Filters", response["Vary"])
+
+    def test_invalid_filter_message_comes_along(self):
+        response = self.client.get(
+            reverse("library:item-results"), {"submit": "", "min_value": "x"}
+        )
+
+        self.assertContains(response, "Filter not valid")
+
+    def test_not_modified(self):
+        url = reverse("library:item-results")
+        etag = self.client.get(url)["ETag"]
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(304, response.status_code)
+        # Full page has a different ETag
+        response = self.client.get(
+            reverse("library:item-list"), HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(200, response.status_code)
+
+    def test_login_required(self):
+        self.client.logout()
+
+        response = self.client.get(reverse("library:item-results"))
+
+        self.assertEqual(302, response.status_code)
@@ -0,0 +1,246 @@
+"""
+Where the time of a request goes: SQL, form validation, counting rows for
+the paginator, facet counts and template rendering.
+
+server_timing_middleware measures every request when
+settings.LIBRARY_SERVER_TIMING is on. It sends the phases in Server-Timing
+header, which browser dev tools show next to the request, and logs them to
+"library.timing" logger as one key=value line.
+
+Phases are measured where they happen, with `with phase("forms"):`. SQL
+time of every query is added by database execute wrapper, installed on
+every connection (see library.signals), rendering by the template backend
+below. Phases may overlap, e.g. queries run while rendering count in both.
+Timings live in a context variable, so they follow the request into
+threads and event loops of async views.
+
+With settings.LIBRARY_PROFILE_SAMPLE above zero, that share of requests
+also runs under cProfile, and profiles of the slowest
+LIBRARY_PROFILE_KEEP of them are kept in LIBRARY_PROFILE_DIR, for
+`python -m pstats` or snakeviz. cProfile sees the thread that runs the
+middleware only: under WSGI parts of async views that run on their event
+loop are missing, under ASGI other requests served meanwhile show up too.
+"""
+
+import cProfile
+import heapq
+import itertools
+import logging
+import os
+import random
+import threading
+import time
+from asyncio import iscoroutinefunction
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+from django.template.backends import django as django_backend
+from django.utils.decorators import sync_and_async_middleware
+
+logger = logging.getLogger("library.timing")
+
+# Order of phases in Server-Timing header
+PHASES = ("sql", "forms", "count", "facets", "render")
+
+_current = ContextVar("library_timings", default=None)
+
+
+class Timings:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.total = None
+        self.queries = 0
+        # Milliseconds per phase
+        self.phases = defaultdict(float)
+
+    def add(self, name, seconds):
+        self.phases[name] += seconds * 1000
+
+    def finish(self):
+        self.total = (time.perf_counter() - self.start) * 1000
+
+    def header(self):
+        entries = []
+        for name in PHASES:
+            if name == "sql":
+                entries.append(
+                    f'sql;dur={self.phases[name]:.1f};desc="{self.queries} queries"'
+                )
+            elif name in self.phases:
+                entries.append(f"{name};dur={self.phases[name]:.1f}")
+        entries.append(f"total;dur={self.total:.1f}")
+        return ", ".join(entries)
+
+    def as_dict(self):
+        return {
+            "queries": self.queries,
+            **{f"{name}_ms": round(self.phases[name], 1) for name in PHASES},
+            "total_ms": round(self.total, 1),
+        }
+
+
+@contextmanager
+def phase(name):
+    """
+    Adds time spent in the block to phase of current request, if measured.
+    """
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - start)
+
+
+def record_query(execute, sql, params, many, context):
+    # Database execute wrapper
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.add("sql", time.perf_counter() - start)
+        timings.queries += 1
+
+
+class Template(django_backend.Template):
+    def render(self, context=None, request=None):
+        with phase("render"):
+            return super().render(context, request)
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    """
+    Django template backend that adds rendering to request timings.
+    """
+
+    def from_string(self, template_code):
+        return Template(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return Template(super().get_template(template_name).template, self)
+
+
+class SlowestProfiles:
+    """
+    Keeps profiles of the slowest requests of this process on disk.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # Heap of (total ms, path), fastest kept profile first
+        self.kept = []
+        self.counter = itertools.count()
+
+    def offer(self, profiler, timings, route):
+        directory = Path(settings.LIBRARY_PROFILE_DIR)
+        keep = settings.LIBRARY_PROFILE_KEEP
+
+        with self.lock:
+            if len(self.kept) >= keep and timings.total <= self.kept[0][0]:
+                return None
+            name = route.replace(":", "-") or "unknown"
+            path = directory / (
+                f"{timings.total:09.1f}ms-{name}-{os.getpid()}-{next(self.counter)}.prof"
+            )
+            heapq.heappush(self.kept, (timings.total, path))
+            dropped = heapq.heappop(self.kept) if len(self.kept) > keep else None
+
+        directory.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(path)
+        if dropped is not None:
+            dropped[1].unlink(missing_ok=True)
+        return path
+
+
+slowest_profiles = SlowestProfiles()
+
+
+def _profiler():
+    if random.random() >= settings.LIBRARY_PROFILE_SAMPLE:
+        return None
+    return cProfile.Profile()
+
+
+def _route(request):
+    match = getattr(request, "resolver_match", None)
+    return match.view_name if match is not None else ""
+
+
+def _report(request, response, timings, profiler):
+    timings.finish()
+    response["Server-Timing"] = timings.header()
+
+    route = _route(request)
+    # User only when already loaded, reporting must not query
+    user_id = getattr(getattr(request, "_cached_user", None), "pk", None)
+    values = {
+        "route": route,
+        "method": request.method,
+        "status": response.status_code,
+        "user": user_id,
+        **timings.as_dict(),
+    }
+    if profiler is not None:
+        values["profile"] = slowest_profiles.offer(profiler, timings, route)
+    logger.info(
+        " ".join(f"{key}={value}" for key, value in values.items()),
+        extra={"timing": values},
+    )
+
+
+@sync_and_async_middleware
+def server_timing_middleware(get_response):
+    """
+    Measures phases of the request, see above.
+    """
+    if iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            if not settings.LIBRARY_SERVER_TIMING:
+                return await get_response(request)
+
+            timings = Timings()
+            token = _current.set(timings)
+            profiler = _profiler()
+            try:
+                if profiler is not None:
+                    profiler.enable()
+                response = await get_response(request)
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+                _current.reset(token)
+            _report(request, response, timings, profiler)
+            return response
+
+    else:
+
+        def middleware(request):
+            if not settings.LIBRARY_SERVER_TIMING:
+                return get_response(request)
+
+            timings = Timings()
+            token = _current.set(timings)
+            profiler = _profiler()
+            try:
+                if profiler is not None:
+                    response = profiler.runcall(get_response, request)
+                else:
+                    response = get_response(request)
+            finally:
+                _current.reset(token)
+            _report(request, response, timings, profiler)
+            return response
+
+    return middleware
@@ -1,17 +1,26 @@
 from django.urls import path
 
-from library import views
+from library import api, views
 
 app_name = "library"
 
 urlpatterns = [
     path("", views.index, name="index"),  # home page
+    path("stats/", views.stats, name="stats"),
     path("items/", views.item_list, name="item-list"),
+    path("items/results", views.item_results, name="item-results"),
+    path("items/export", views.item_export, name="item-export"),
+    path("items/import", views.item_import, name="item-import"),
+    path("items/bulk", views.item_bulk, name="item-bulk"),
     path("item/new/", views.new_item, name="item-create"),
     path("item/<int:pk>/", views.ItemDetailView.as_view(), name="item-detail"),
     path("item/<int:pk>/update/", views.ItemUpdateView.as_view(), name="item-update"),
     path("item/<int:pk>/delete/", views.ItemDeleteView.as_view(), name="item-delete"),
     path("spells/", views.spell_list, name="spell-list"),
+    path("spells/results", views.spell_results, name="spell-results"),
+    path("spells/export", views.spell_export, name="spell-export"),
+    path("spells/import", views.spell_import, name="spell-import"),
+    path("spells/bulk", views.spell_bulk, name="spell-bulk"),
     path("spell/new", views.new_spell, name="spell-create"),
     path("spell/<int:pk>/", views.SpellDetailView.as_view(), name="spell-detail"),
     path(
@@ -20,4 +29,10 @@ urlpatterns = [
     path(
         "spell/<int:pk>/delete/", views.SpellDeleteView.as_view(), name="spell-delete"
     ),
+    path("api/items/", api.ItemApiList.as_view(), name="api-item-list"),
+    path("api/items/bulk/", api.ItemApiBulk.as_view(), name="api-item-bulk"),
+    path("api/items/<int:pk>/", api.ItemApiDetail.as_view(), name="api-item-detail"),
+    path("api/spells/", api.SpellApiList.as_view(), name="api-spell-list"),
+    path("api/spells/bulk/", api.SpellApiBulk.as_view(), name="api-spell-bulk"),
+    path("api/spells/<int:pk>/", api.SpellApiDetail.as_view(), name="api-spell-detail"),
 ]
@@ -1,64 +1,346 @@
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.core.paginator import Paginator
+from django.contrib.auth.views import redirect_to_login
+from django.http import Http404
 from django.shortcuts import redirect, render
-from django.views.generic import DeleteView, DetailView, UpdateView
-
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.cache import patch_vary_headers
+from django.views import View
+from django.views.decorators.http import require_POST
+from django.views.generic import DeleteView, UpdateView
+
+from . import bulk
+from .auth import aget_user, alogin_required
+from .cache import acached_facets, acached_page, filter_state
+from .conditional import (
+    detail_validators,
+    list_validators,
+    not_modified,
+    set_validators,
+)
+from .export import ITEM_EXPORT_FIELDS, SPELL_EXPORT_FIELDS, export_response
+from .facets import ITEM_FACETS, SPELL_FACETS, afacet_counts, label_choices
 from .forms import (
+    ImportForm,
+    ItemBulkForm,
     ItemFilterForm,
     ItemsForm,
     ItemSortForm,
+    SpellBulkForm,
     SpellFilterForm,
     SpellsForm,
     SpellSortForm,
 )
 from .helpers import path_without_page
+from .importer import guess_format, import_file
 from .models import Item, Spell
+from .pagination import aget_page
+from .stats import user_stats
+from .timing import phase
 
 ITEMS_PER_PAGE = 10
 SPELLS_PER_PAGE = 10
+# Errors shown on import page, the rest is only counted
+IMPORT_ERRORS_SHOWN = 50
 
 
-@login_required
-def item_list(request):
-    filter_form = ItemFilterForm()
-    sorting_form = ItemSortForm()
+class AuthorRequiredMixin(UserPassesTestMixin):
+    """
+    Lets only author of the entry through. Entry is looked up once, already
+    scoped to current user, and reused for the rest of the request. Missing
+    entry is not found (404), one of other user is forbidden (403).
+    """
+
+    def get_queryset(self):
+        pk = self.kwargs[self.pk_url_kwarg]
+        return super().get_queryset().of_author(self.request.user).of_pk(pk)
+
+    def get_object(self, queryset=None):
+        if queryset is None:
+            if not hasattr(self, "_author_object"):
+                self._author_object = super().get_object()
+            return self._author_object
+        return super().get_object(queryset)
+
+    def test_func(self):
+        try:
+            self.get_object()
+        except Http404:
+            # Only on a miss, tells entries of other users from missing ones
+            pk = self.kwargs[self.pk_url_kwarg]
+            if not self.model.objects.of_pk(pk).filter(pk=pk).exists():
+                raise
+            return False
+        return True
+
+
+class AsyncDetailView(View):
+    """
+    Detail page of any user's entry, with ETag and Last-Modified. Async, so
+    under ASGI it holds a thread only while the entry is being loaded.
+    """
+
+    model = None
+    template_name = None
+
+    async def get(self, request, pk):
+        user = await aget_user(request)
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+
+        try:
+            entry = await self.model.objects.of_pk(pk).aget(pk=pk)
+        except self.model.DoesNotExist:
+            raise Http404(f"No {self.model._meta.verbose_name} found")
+
+        etag, last_modified = detail_validators(request, entry)
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+
+        context = {"object": entry, self.model._meta.model_name: entry}
+        response = render(request, self.template_name, context)
+        return set_validators(response, etag, last_modified)
+
+
+def filter_queryset(request, model, filter_form_class, sort_form_class):
+    """
+    Builds user's queryset filtered and sorted by GET parameters. Returns
+    it together with filter and sort forms.
+    """
+    filter_form = filter_form_class()
+    sorting_form = sort_form_class()
 
     if "submit" in request.GET:
-        filter_form = ItemFilterForm(request.GET)
-        sorting_form = ItemSortForm(request.GET)
+        filter_form = filter_form_class(request.GET)
+        sorting_form = sort_form_class(request.GET)
+        with phase("forms"):
+            filter_form.is_valid()
+            sorting_form.is_valid()
 
         if filter_form.is_valid():
             data = filter_form.cleaned_data
-            items = Item.get_queryset(request, data)
+            queryset = model.get_queryset(request, data)
         else:
-            items = Item.get_queryset(request)
+            queryset = model.get_queryset(request)
             messages.error(request, "Filter not valid, using default.")
 
         if sorting_form.is_valid():
             data = sorting_form.cleaned_data
-            items = Item.sort_queryset(items, data)
+            queryset = model.sort_queryset(queryset, data)
         else:
-            items = Item.sort_queryset(items)
+            queryset = model.sort_queryset(queryset)
             messages.error(request, "Sort not valid, using default.")
 
     else:
-        items = Item.get_queryset(request)
-        items = Item.sort_queryset(items)
-
-    paginator = Paginator(items, ITEMS_PER_PAGE)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+        queryset = model.get_queryset(request)
+        queryset = model.sort_queryset(queryset)
+
+    return queryset, filter_form, sorting_form
+
+
+async def list_results(request, namespace, queryset, per_page, template, list_url):
+    """
+    Returns (html, hit) of results and pagination of a list page. Database
+    is queried only when results are not cached yet. Full list page and its
+    fragment endpoint share the cache, links always lead to the full page.
+    """
+
+    async def render_results():
+        page_obj = await aget_page(request, queryset, per_page)
+        context = {
+            "page_obj": page_obj,
+            "path_without_page": path_without_page(request, reverse(list_url)),
+        }
+        return render_to_string(template, context, request)
+
+    return await acached_page(request, namespace, render_results)
+
+
+async def label_filters(request, namespace, model, filter_form, facets):
+    """
+    Adds facet counts to labels of filter_form, returns state of the filter
+    panel for its fragment cache.
+    """
+    with phase("facets"):
+        counts = await acached_facets(
+            request,
+            namespace,
+            lambda: afacet_counts(request, model, filter_form, facets),
+        )
+    label_choices(filter_form, counts)
+    return filter_state(request, counts)
+
+
+async def results_fragment(
+    request, namespace, model, forms, facets, per_page, templates, list_url
+):
+    """
+    Results and pagination of a list page without the rest of it, for
+    swapping them in place (static/library/list.js). Messages, e.g. about
+    invalid filter, come along. With X-Library-Filters header, the filter
+    panel with current facet counts is appended in a <template>.
+    """
+    with_filters = "X-Library-Filters" in request.headers
+    fragment_namespace = f"{namespace}-results{'-filters' if with_filters else ''}"
+    etag, last_modified = list_validators(request, fragment_namespace)
+    response = not_modified(request, etag, last_modified)
+    if response is not None:
+        return response
+
+    queryset, filter_form, sorting_form = filter_queryset(request, model, *forms)
+    results_template, filters_template = templates
+    results, hit = await list_results(
+        request,
+        namespace,
+        model.list_queryset(queryset),
+        per_page,
+        results_template,
+        list_url,
+    )
+
+    context = {"results": results}
+    if with_filters:
+        context.update(
+            filter_form=filter_form,
+            sorting_form=sorting_form,
+            filter_state=await label_filters(
+                request, namespace, model, filter_form, facets
+            ),
+            filters_template=filters_template,
+        )
+
+    response = render(request, "library/results_fragment.html", context)
+    response["X-Library-Cache"] = "hit" if hit else "miss"
+    patch_vary_headers(response, ["X-Library-Filters"])
+    return set_validators(response, etag, last_modified)
+
+
+@alogin_required
+async def item_list(request):
+    # Client already has current version of the page
+    etag, last_modified = list_validators(request, "items")
+    response = not_modified(request, etag, last_modified)
+    if response is not None:
+        return response
+
+    items, filter_form, sorting_form = filter_queryset(
+        request, Item, ItemFilterForm, ItemSortForm
+    )
+    results, hit = await list_results(
+        request,
+        "items",
+        Item.list_queryset(items),
+        ITEMS_PER_PAGE,
+        "library/item_results.html",
+        "library:item-list",
+    )
 
     context = {
         "filter_form": filter_form,
         "sorting_form": sorting_form,
-        "page_obj": page_obj,
-        "path_without_page": path_without_page(request),
+        "filter_state": await label_filters(
+            request, "items", Item, filter_form, ITEM_FACETS
+        ),
+        "bulk_form": ItemBulkForm(),
+        "results": results,
+    }
+
+    response = render(request, "library/item_list.html", context)
+    response["X-Library-Cache"] = "hit" if hit else "miss"
+    return set_validators(response, etag, last_modified)
+
+
+@alogin_required
+async def item_results(request):
+    return await results_fragment(
+        request,
+        "items",
+        Item,
+        (ItemFilterForm, ItemSortForm),
+        ITEM_FACETS,
+        ITEMS_PER_PAGE,
+        ("library/item_results.html", "library/item_filters.html"),
+        "library:item-list",
+    )
+
+
+@login_required
+def item_export(request):
+    # Same entries as list page shows for these parameters, all pages
+    items, _, _ = filter_queryset(request, Item, ItemFilterForm, ItemSortForm)
+
+    return export_response(
+        items, ITEM_EXPORT_FIELDS, request.GET.get("format"), "items"
+    )
+
+
+def import_entries(request, model, list_url):
+    """
+    Shows upload form and imports uploaded file for current user.
+    """
+    result = None
+
+    if request.method == "POST":
+        form = ImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            upload = form.cleaned_data["file"]
+            result = import_file(model, upload, guess_format(upload.name), request.user)
+            if result.errors:
+                messages.warning(
+                    request,
+                    f"Imported {result.created} of {result.rows} entries",
+                )
+            else:
+                messages.success(request, f"Imported {result.created} entries")
+                return redirect(list_url)
+        else:
+            messages.error(request, "Import file is not valid")
+    else:
+        form = ImportForm()
+
+    context = {
+        "form": form,
+        "result": result,
+        "errors": result.errors[:IMPORT_ERRORS_SHOWN] if result else [],
+        "list_url": list_url,
+        "entries": model._meta.verbose_name_plural,
     }
+    return render(request, "library/import.html", context)
+
+
+@login_required
+def item_import(request):
+    return import_entries(request, Item, "library:item-list")
+
+
+def bulk_entries(request, model, form_class, list_url):
+    """
+    Applies bulk action to entries ticked in the list and returns to it.
+    """
+    form = form_class(request.POST)
+    entries = model._meta.verbose_name_plural
+
+    if form.is_valid():
+        count = bulk.run_action(model, request.user, form.cleaned_data)
+        done = "deleted" if form.cleaned_data["action"] == bulk.DELETE else "updated"
+        messages.success(request, f"{count} {entries} {done}")
+    else:
+        messages.error(request, f"Select {entries} and action to apply")
+
+    # Back to the same filtered page of the list
+    query = request.POST.get("query")
+    if query:
+        return redirect(f"{reverse(list_url)}?{query}")
+    return redirect(list_url)
+
 
-    return render(request, "library/item_list.html", context)
+@login_required
+@require_POST
+def item_bulk(request):
+    return bulk_entries(request, Item, ItemBulkForm, "library:item-list")
 
 
 @login_required
@@ -85,74 +367,90 @@ def new_item(request):
     return render(request, "library/new.html", {"form": form})
 
 
-class ItemDetailView(LoginRequiredMixin, DetailView):
+class ItemDetailView(AsyncDetailView):
     model = Item
     template_name = "library/item_detail.html"
 
 
-class ItemUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
+class ItemUpdateView(LoginRequiredMixin, AuthorRequiredMixin, UpdateView):
     model = Item
     form_class = ItemsForm
     success_url = "/"
 
-    def test_func(self):
-        entry = self.get_object()
-        if self.request.user == entry.author:
-            return True
-        return False
-
 
-class ItemDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
+class ItemDeleteView(LoginRequiredMixin, AuthorRequiredMixin, DeleteView):
     model = Item
     context_object_name = "item"
     success_url = "/"
 
-    def test_func(self):
-        entry = self.get_object()
-        if self.request.user == entry.author:
-            return True
-        return False
 
+@alogin_required
+async def spell_list(request):
+    # Client already has current version of the page
+    etag, last_modified = list_validators(request, "spells")
+    response = not_modified(request, etag, last_modified)
+    if response is not None:
+        return response
+
+    spells, filter_form, sorting_form = filter_queryset(
+        request, Spell, SpellFilterForm, SpellSortForm
+    )
+    results, hit = await list_results(
+        request,
+        "spells",
+        Spell.list_queryset(spells),
+        SPELLS_PER_PAGE,
+        "library/spells/spell_results.html",
+        "library:spell-list",
+    )
 
-@login_required
-def spell_list(request):
-    filter_form = SpellFilterForm()
-    sorting_form = SpellSortForm()
+    context = {
+        "filter_form": filter_form,
+        "sorting_form": sorting_form,
+        "filter_state": await label_filters(
+            request, "spells", Spell, filter_form, SPELL_FACETS
+        ),
+        "bulk_form": SpellBulkForm(),
+        "results": results,
+    }
 
-    if "submit" in request.GET:
-        filter_form = SpellFilterForm(request.GET)
-        sorting_form = SpellSortForm(request.GET)
+    response = render(request, "library/spells/spell_list.html", context)
+    response["X-Library-Cache"] = "hit" if hit else "miss"
+    return set_validators(response, etag, last_modified)
 
-        if filter_form.is_valid():
-            data = filter_form.cleaned_data
-            spells = Spell.get_queryset(request, data)
-        else:
-            spells = Spell.get_queryset(request)
-            messages.error(request, "Filter not valid, using default.")
 
-        if sorting_form.is_valid():
-            data = sorting_form.cleaned_data
-            spells = Spell.sort_queryset(spells, data)
-        else:
-            spells = Spell.sort_queryset(spells)
-            messages.error(request, "Sort not valid, using default.")
+@alogin_required
+async def spell_results(request):
+    return await results_fragment(
+        request,
+        "spells",
+        Spell,
+        (SpellFilterForm, SpellSortForm),
+        SPELL_FACETS,
+        SPELLS_PER_PAGE,
+        ("library/spells/spell_results.html", "library/spells/spell_filters.html"),
+        "library:spell-list",
+    )
 
-    else:
-        spells = Spell.get_queryset(request)
-        spells = Spell.sort_queryset(spells)
 
-    paginator = Paginator(spells, SPELLS_PER_PAGE)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+@login_required
+def spell_export(request):
+    spells, _, _ = filter_queryset(request, Spell, SpellFilterForm, SpellSortForm)
 
-    context = {
-        "filter_form": filter_form,
-        "sorting_form": sorting_form,
-        "page_obj": page_obj,
-        "path_without_page": path_without_page(request),
-    }
+    return export_response(
+        spells, SPELL_EXPORT_FIELDS, request.GET.get("format"), "spells"
+    )
 
-    return render(request, "library/spells/spell_list.html", context)
+
+@login_required
+def spell_import(request):
+    return import_entries(request, Spell, "library:spell-list")
+
+
+@login_required
+@require_POST
+def spell_bulk(request):
+    return bulk_entries(request, Spell, SpellBulkForm, "library:spell-list")
 
 
 @login_required
@@ -179,35 +477,28 @@ def new_spell(request):
     return render(request, "library/spells/new_spell.html", {"form": form})
 
 
-class SpellDetailView(LoginRequiredMixin, DetailView):
+class SpellDetailView(AsyncDetailView):
     model = Spell
     template_name = "library/spells/spell_detail.html"
 
 
-class SpellUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
+class SpellUpdateView(LoginRequiredMixin, AuthorRequiredMixin, UpdateView):
     model = Spell
     template_name = "library/spells/spell_form.html"
     form_class = SpellsForm
     success_url = "/spells/"
 
-    def test_func(self):
-        entry = self.get_object()
-        if self.request.user == entry.author:
-            return True
-        return False
-
 
-class SpellDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
+class SpellDeleteView(LoginRequiredMixin, AuthorRequiredMixin, DeleteView):
     model = Spell
     template_name = "library/spells/spell_confirm_delete.html"
     context_object_name = "spell"
     success_url = "/spells/"
 
-    def test_func(self):
-        entry = self.get_object()
-        if self.request.user == entry.author:
-            return True
-        return False
+
+@login_required
+def stats(request):
+    return render(request, "library/stats.html", user_stats(request.user))
 
 
 @login_required